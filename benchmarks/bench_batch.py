@@ -0,0 +1,58 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from classes.batch_parser import BatchParser
+from benchmarks.workloads import generate_program
+
+
+def write_corpus(directory, grammar, files, tokens_per_file, seed):
+    rng = random.Random(seed)
+    paths = []
+    for index in range(files):
+        text, _ = generate_program(grammar, tokens_per_file, seed=rng.randrange(1 << 30))
+        if index % 10 == 9:
+            # every tenth file gets a stray token so rejections are exercised too
+            text = text.replace(';', '; ;', 1)
+        path = os.path.join(directory, f'program_{index:05d}.txt')
+        with open(path, 'w') as file:
+            file.write(text)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BatchParser throughput by worker count")
+    parser.add_argument('--grammar', default='grammar1.txt')
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--tokens', type=int, default=500, help="tokens per file")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    batch = BatchParser(args.grammar)
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_corpus(directory, batch.grammar, args.files, args.tokens, args.seed)
+
+        baseline = None
+        reference = None
+        print(f"{'workers':>8} {'seconds':>10} {'files/s':>10} {'speedup':>8}")
+        for workers in args.workers:
+            start = time.perf_counter()
+            results = batch.parse_files(paths, workers=workers)
+            elapsed = time.perf_counter() - start
+            outcome = [(result['accepted'], result['error']) for result in results]
+            if reference is None:
+                reference = outcome
+                baseline = elapsed
+                summary = BatchParser.summarize(results)
+            elif outcome != reference:
+                raise RuntimeError(f"Results with {workers} workers differ from the first run")
+            print(f"{workers:>8} {elapsed:>10.3f} {len(paths) / elapsed:>10.0f} {baseline / elapsed:>7.2f}x")
+        print(f"accepted {summary['accepted']} / {summary['files']} files, {summary['tokens']} tokens")
+
+
+if __name__ == '__main__':
+    main()
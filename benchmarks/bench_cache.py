@@ -0,0 +1,59 @@
+import argparse
+import os
+import tempfile
+import time
+
+from classes.grammar import Grammar
+from classes.grammar_cache import GrammarCache
+from classes.ll1_parser import LL1Parser
+from classes.ll1_to_dpda import LL1ToDPDA
+from classes.compiled_dpda import CompiledDPDA
+from benchmarks.workloads import synthetic_grammar_text
+
+
+def build_uncached(grammar_file):
+    grammar = Grammar()
+    grammar.read_from_file(grammar_file)
+    ll1_parser = LL1Parser(grammar)
+    return grammar, ll1_parser, CompiledDPDA(LL1ToDPDA(ll1_parser).convert_to_dpda())
+
+
+def best_of(repeat, function, *args):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grammar artifact cold start with and without GrammarCache")
+    parser.add_argument('--levels', type=int, nargs='+', default=[50, 200, 400],
+                        help="sizes of synthetic grammars (2 non-terminals per level)")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        grammar_files = ['grammar1.txt']
+        for levels in args.levels:
+            path = os.path.join(directory, f'synthetic_{levels}.txt')
+            with open(path, 'w') as file:
+                file.write(synthetic_grammar_text(levels, seed=levels))
+            grammar_files.append(path)
+
+        cache = GrammarCache(cache_dir=os.path.join(directory, 'cache'))
+        print(f"{'grammar':>20} {'build ms':>10} {'cached ms':>10} {'speedup':>8}")
+        for grammar_file in grammar_files:
+            build_time = best_of(args.repeat, build_uncached, grammar_file)
+            cache.load(grammar_file)  # populate
+            cached_time = best_of(args.repeat, cache.load, grammar_file)
+            if not cache.last_hit:
+                raise RuntimeError(f"Cache miss for {grammar_file}")
+            name = os.path.basename(grammar_file)
+            print(f"{name:>20} {build_time * 1000:>10.2f} {cached_time * 1000:>10.2f} "
+                  f"{build_time / cached_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+import argparse
+import random
+
+from classes.compiled_dpda import CompiledDPDA
+from classes.ll1_parser import LL1Parser
+from classes.ll1_to_dpda import LL1ToDPDA
+from benchmarks.bench_dpda import time_call
+from benchmarks.bench_driver import fuzz_corpus
+from benchmarks.bench_first_follow import read_grammar
+from benchmarks.workloads import load_pipeline, generate_token_types, TERMINAL_END_GRAMMAR
+
+
+def check_equivalence(dpda, cases, seed):
+    """Compare acceptance and the 'errors' and 'summary' traces with the DPDA; returns (accepted, rejected)."""
+    compiled = CompiledDPDA(dpda)
+    rng = random.Random(seed)
+    counts = [0, 0]
+    for token_types in fuzz_corpus(dpda.grammar, cases, rng):
+        for trace_level in ('errors', 'summary'):
+            expected = dpda.process_input(token_types, trace_level=trace_level)
+            actual = compiled.process_input(token_types, trace_level=trace_level)
+            if actual != expected:
+                raise RuntimeError(f"CompiledDPDA disagrees with the DPDA on {token_types}:\n{expected}\n{actual}")
+        counts[not expected[0]] += 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Interpreted vs integer-coded DPDA throughput")
+    parser.add_argument('--grammar', default='grammar1.txt')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--cases', type=int, default=5000, help="fuzzed inputs per grammar")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    _, _, dpda = load_pipeline(args.grammar)
+    terminal_end = LL1ToDPDA(LL1Parser(read_grammar(TERMINAL_END_GRAMMAR))).convert_to_dpda()
+    for name, checked in [(args.grammar, dpda), ('terminal-end', terminal_end)]:
+        accepted, rejected = check_equivalence(checked, args.cases, args.seed)
+        print(f"fuzz {name}: {accepted} accepted, {rejected} rejected, all identical to the DPDA")
+
+    grammar = dpda.grammar
+    compile_time, compiled = time_call(CompiledDPDA, dpda)
+    print(f"compile: {compile_time * 1000:.2f} ms")
+
+    print(f"{'tokens':>10} {'steps':>10} {'DPDA st/s':>12} {'compiled st/s':>14} "
+          f"{'codes st/s':>12} {'speedup':>8}")
+    for size in args.sizes:
+        token_string = generate_token_types(grammar, size, seed=args.seed) + ['$']
+        dpda_time, (accepted, _) = time_call(dpda.process_input, token_string, trace_level='off')
+        compiled_time, (compiled_accepted, _) = time_call(compiled.process_input, token_string)
+        codes = compiled.encode(token_string)
+        codes_time, (codes_accepted, _, _, _, steps) = time_call(compiled.process_codes, codes)
+        if not (accepted and compiled_accepted and codes_accepted):
+            raise RuntimeError(f"Engines disagree on a generated program of {size} tokens")
+        print(f"{len(token_string):>10} {steps:>10} {steps / dpda_time:>12.0f} "
+              f"{steps / compiled_time:>14.0f} {steps / codes_time:>12.0f} {dpda_time / codes_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
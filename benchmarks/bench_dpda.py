@@ -0,0 +1,60 @@
+import argparse
+import time
+
+from classes.dpda import GeneralDPDA, TRACE_LEVELS
+from benchmarks.workloads import load_pipeline, generate_token_types
+
+
+def sigma_star_dpda(alphabet):
+    # accepts any token sequence ending in '$' without ever growing the stack
+    dpda = GeneralDPDA()
+    dpda.add_state('q0', is_start=True)
+    dpda.add_state('q1')
+    dpda.add_state('q2', is_accept=True)
+    for symbol in alphabet:
+        dpda.add_input_symbol(symbol)
+    dpda.add_input_symbol('$')
+    dpda.add_stack_symbol('Z0', is_start=True)
+    dpda.add_stack_symbol('S')
+    dpda.add_transition('q0', '', 'Z0', 'q1', ['S', 'Z0'])
+    for symbol in alphabet:
+        dpda.add_transition('q1', symbol, 'S', 'q1', ['S'])
+    dpda.add_transition('q1', '$', 'S', 'q1', [])
+    return dpda
+
+
+def time_call(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DPDA input consumption scaling")
+    parser.add_argument('--grammar', default='grammar1.txt')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 4000, 16000, 64000])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--trace-level', default='off', choices=list(TRACE_LEVELS))
+    args = parser.parse_args()
+
+    grammar, _, dpda = load_pipeline(args.grammar)
+    general = sigma_star_dpda(sorted(grammar.terminals))
+
+    print(f"{'tokens':>10} {'DPDA s':>10} {'tok/s':>12} {'General s':>10} {'tok/s':>12}")
+    for size in args.sizes:
+        token_string = generate_token_types(grammar, size, seed=args.seed) + ['$']
+        dpda_time, (accepted, _) = time_call(dpda.process_input, token_string,
+                                             trace_level=args.trace_level)
+        if not accepted:
+            raise RuntimeError(f"DPDA rejected a generated program of {size} tokens")
+        general_time, (accepted, _) = time_call(general.process_input, token_string,
+                                                   trace_level=args.trace_level)
+        if not accepted:
+            raise RuntimeError(f"GeneralDPDA rejected a generated program of {size} tokens")
+        count = len(token_string)
+        print(f"{count:>10} {dpda_time:>10.3f} {count / dpda_time:>12.0f} "
+              f"{general_time:>10.3f} {count / general_time:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import argparse
+import random
+
+from classes.compiled_dpda import CompiledDPDA
+from classes.ll1_driver import LL1Driver
+from classes.ll1_parser import LL1Parser
+from classes.ll1_to_dpda import LL1ToDPDA
+from benchmarks.bench_dpda import time_call
+from benchmarks.bench_first_follow import read_grammar
+from benchmarks.workloads import (load_pipeline, generate_token_types, mutate, synthetic_grammar_text,
+                                  TERMINAL_END_GRAMMAR)
+
+
+def fuzz_corpus(grammar, cases, rng):
+    # stray '$' and unknown symbols are part of the alphabet on purpose
+    alphabet = sorted(grammar.terminals) + ['$', '<unknown>', sorted(grammar.non_terminals)[0]]
+    for case in range(cases):
+        kind = case % 4
+        if kind == 3:
+            yield [rng.choice(alphabet) for _ in range(rng.randint(0, 12))]
+            continue
+        token_types = generate_token_types(grammar, rng.randint(1, 60), seed=rng.random(), max_depth=rng.randint(2, 6))
+        if kind == 0:
+            yield token_types + ['$']
+        elif kind == 1:
+            yield mutate(token_types, alphabet, rng) + ['$']
+        else:
+            yield mutate(token_types, alphabet, rng)
+
+
+def fuzz(dpda, cases, seed):
+    """Compare acceptance and the 'summary' trace with the DPDA; returns (accepted, rejected)."""
+    driver = LL1Driver(dpda)
+    rng = random.Random(seed)
+    counts = [0, 0]
+    for token_types in fuzz_corpus(dpda.grammar, cases, rng):
+        expected = dpda.process_input(token_types, trace_level='summary')
+        actual = driver.process_input(token_types, trace_level='summary')
+        if actual != expected:
+            raise RuntimeError(f"LL1Driver disagrees with the DPDA on {token_types}:\n{expected}\n{actual}")
+        counts[not expected[0]] += 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Direct LL(1) driver: fuzzed equivalence and throughput")
+    parser.add_argument('--grammar', default='grammar1.txt')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--cases', type=int, default=20000, help="fuzzed inputs per grammar")
+    parser.add_argument('--levels', type=int, nargs='+', default=[3, 10],
+                        help="also fuzz synthetic grammars of these sizes")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    _, _, dpda = load_pipeline(args.grammar)
+    dpdas = [(args.grammar, dpda)]
+    # input left over after the start symbol is derived fails on Z0, which the other grammars never reach
+    dpdas.append(('terminal-end', LL1ToDPDA(LL1Parser(read_grammar(TERMINAL_END_GRAMMAR))).convert_to_dpda()))
+    for levels in args.levels:
+        grammar = read_grammar(synthetic_grammar_text(levels, seed=args.seed))
+        dpdas.append((f'synthetic({levels})', LL1ToDPDA(LL1Parser(grammar)).convert_to_dpda()))
+    for name, fuzzed in dpdas:
+        accepted, rejected = fuzz(fuzzed, args.cases, args.seed)
+        print(f"fuzz {name}: {accepted} accepted, {rejected} rejected, all identical to the DPDA")
+
+    grammar = dpda.grammar
+    driver = LL1Driver(dpda)
+    compiled = CompiledDPDA(dpda)
+    print(f"{'tokens':>10} {'DPDA tok/s':>12} {'compiled tok/s':>15} {'driver tok/s':>13} {'vs DPDA':>8} {'vs compiled':>12}")
+    for size in args.sizes:
+        token_string = generate_token_types(grammar, size, seed=args.seed) + ['$']
+        dpda_time, (accepted, _) = time_call(dpda.process_input, token_string, trace_level='off')
+        compiled_time, (compiled_accepted, _) = time_call(compiled.process_input, token_string)
+        driver_time, (driver_accepted, _) = time_call(driver.process_input, token_string)
+        if not (accepted and compiled_accepted and driver_accepted):
+            raise RuntimeError(f"Engines disagree on a generated program of {size} tokens")
+        count = len(token_string)
+        print(f"{count:>10} {count / dpda_time:>12.0f} {count / compiled_time:>15.0f} {count / driver_time:>13.0f}"
+              f" {dpda_time / driver_time:>7.1f}x {compiled_time / driver_time:>11.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+import argparse
+import os
+import tempfile
+import time
+
+from classes.grammar import Grammar
+from classes.ll1_parser import LL1Parser
+from benchmarks.workloads import synthetic_grammar_text
+
+
+def legacy_first_sets(grammar):
+    """The original round-robin FIRST computation, kept as the baseline."""
+    first_sets = {terminal: {terminal} for terminal in grammar.terminals}
+    for non_terminal in grammar.non_terminals:
+        first_sets[non_terminal] = set()
+    first_sets['eps'] = {'eps'}
+
+    changed = True
+    while changed:
+        changed = False
+        for non_terminal in grammar.non_terminals:
+            for production in grammar.get_productions(non_terminal):
+                if not production:
+                    if 'eps' not in first_sets[non_terminal]:
+                        first_sets[non_terminal].add('eps')
+                        changed = True
+                else:
+                    first_symbol = production[0]
+                    old_size = len(first_sets[non_terminal])
+                    if first_symbol in grammar.terminals:
+                        first_sets[non_terminal].add(first_symbol)
+                    else:
+                        first_sets[non_terminal] |= (first_sets[first_symbol] - {'eps'})
+                        if all(symbol in grammar.non_terminals and 'eps' in first_sets[symbol]
+                               for symbol in production):
+                            first_sets[non_terminal].add('eps')
+                    if len(first_sets[non_terminal]) > old_size:
+                        changed = True
+    return first_sets
+
+
+def legacy_follow_sets(grammar, first_sets):
+    follow_sets = {non_terminal: set() for non_terminal in grammar.non_terminals}
+    follow_sets[grammar.start_symbol].add('$')
+
+    changed = True
+    while changed:
+        changed = False
+        for non_terminal in grammar.non_terminals:
+            for production in grammar.get_productions(non_terminal):
+                for i, symbol in enumerate(production):
+                    if symbol in grammar.non_terminals:
+                        old_size = len(follow_sets[symbol])
+                        if i + 1 < len(production):
+                            next_symbol = production[i + 1]
+                            if next_symbol in grammar.terminals:
+                                follow_sets[symbol].add(next_symbol)
+                            else:
+                                follow_sets[symbol] |= (first_sets[next_symbol] - {'eps'})
+                                if 'eps' in first_sets[next_symbol]:
+                                    follow_sets[symbol] |= follow_sets[non_terminal]
+                        else:
+                            follow_sets[symbol] |= follow_sets[non_terminal]
+                        if len(follow_sets[symbol]) > old_size:
+                            changed = True
+    return follow_sets
+
+
+def legacy_first_follow(grammar):
+    first_sets = legacy_first_sets(grammar)
+    return first_sets, legacy_follow_sets(grammar, first_sets)
+
+
+def worklist_first_follow(grammar):
+    parser = LL1Parser.__new__(LL1Parser)
+    parser.grammar = grammar
+    parser.first_sets = {}
+    parser.follow_sets = {}
+    parser._compute_first_sets()
+    parser._compute_follow_sets()
+    return parser.first_sets, parser.follow_sets
+
+
+def best_of(repeat, function, *args):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def read_grammar(text):
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as file:
+        file.write(text)
+    try:
+        grammar = Grammar()
+        grammar.read_from_file(file.name)
+    finally:
+        os.remove(file.name)
+    return grammar
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FIRST/FOLLOW: round-robin baseline vs worklist + bitsets")
+    parser.add_argument('--levels', type=int, nargs='+', default=[50, 200, 500],
+                        help="sizes of synthetic grammars (2 non-terminals per level)")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    grammars = [('grammar1.txt', Grammar())]
+    grammars[0][1].read_from_file('grammar1.txt')
+    for levels in args.levels:
+        grammars.append((f'synthetic_{levels}', read_grammar(synthetic_grammar_text(levels, seed=levels))))
+
+    print(f"{'grammar':>16} {'non-terms':>9} {'legacy ms':>10} {'worklist ms':>12} {'speedup':>8}")
+    for name, grammar in grammars:
+        legacy_time, legacy_result = best_of(args.repeat, legacy_first_follow, grammar)
+        worklist_time, worklist_result = best_of(args.repeat, worklist_first_follow, grammar)
+        if legacy_result != worklist_result:
+            raise RuntimeError(f"FIRST/FOLLOW sets differ for {name}")
+        print(f"{name:>16} {len(grammar.non_terminals):>9} {legacy_time * 1000:>10.2f} "
+              f"{worklist_time * 1000:>12.2f} {legacy_time / worklist_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
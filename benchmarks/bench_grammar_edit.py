@@ -0,0 +1,65 @@
+import argparse
+import copy
+import random
+import time
+
+from classes.ll1_parser import LL1Parser
+from classes.ll1_to_dpda import LL1ToDPDA
+from benchmarks.bench_first_follow import read_grammar
+from benchmarks.workloads import synthetic_grammar_text
+
+
+def random_edits(levels, count, seed):
+    """Edits that keep the synthetic grammar LL(1): retarget R_i -> C_i S_j R_i."""
+    rng = random.Random(seed)
+    edits = []
+    for level in rng.sample(range(levels - 1), min(count, levels - 1)):
+        edits.append((f'R{level}', f'C{level} S{rng.randrange(level + 1, levels)} R{level}'))
+    return edits
+
+
+def current_recursive_production(grammar, non_terminal):
+    return next(production for production in grammar.get_productions(non_terminal) if production)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental production edits vs rebuilding the LL(1) table")
+    parser.add_argument('--levels', type=int, nargs='+', default=[100, 400, 1000],
+                        help="sizes of synthetic grammars (2 non-terminals per level)")
+    parser.add_argument('--edits', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'grammar':>16} {'rebuild ms':>11} {'edit ms':>9} {'cells/edit':>11} {'speedup':>8}")
+    for levels in args.levels:
+        grammar = read_grammar(synthetic_grammar_text(levels, seed=levels))
+        edits = random_edits(levels, args.edits, args.seed)
+
+        rebuild_grammar = copy.deepcopy(grammar)
+        start = time.perf_counter()
+        for non_terminal, production in edits:
+            old_production = current_recursive_production(rebuild_grammar, non_terminal)
+            rebuild_grammar.replace_production(non_terminal, old_production, production)
+            LL1ToDPDA(LL1Parser(rebuild_grammar)).convert_to_dpda()
+        rebuild_time = (time.perf_counter() - start) / len(edits)
+
+        ll1_parser = LL1Parser(grammar)
+        LL1ToDPDA(ll1_parser).convert_to_dpda()
+        changed_cells = 0
+        start = time.perf_counter()
+        for non_terminal, production in edits:
+            old_production = current_recursive_production(grammar, non_terminal)
+            changed_cells += len(ll1_parser.replace_production(non_terminal, old_production, production))
+        edit_time = (time.perf_counter() - start) / len(edits)
+
+        reference = LL1Parser(rebuild_grammar)
+        if (reference.parse_table != ll1_parser.parse_table or reference.first_sets != ll1_parser.first_sets
+                or reference.follow_sets != ll1_parser.follow_sets):
+            raise RuntimeError(f"Incremental tables differ from a rebuild for synthetic_{levels}")
+
+        print(f"{f'synthetic_{levels}':>16} {rebuild_time * 1000:>11.2f} {edit_time * 1000:>9.2f} "
+              f"{changed_cells / len(edits):>11.1f} {rebuild_time / edit_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+import argparse
+import random
+import time
+
+from classes.lexer import Lexer
+from classes.ll1_to_dpda import LL1ToDPDA
+from classes.incremental_parser import IncrementalParser
+from benchmarks.workloads import load_pipeline, generate_program, sample_lexemes
+
+
+def tree_shape(node):
+    shape = []
+    pending = [node]
+    while pending:
+        node = pending.pop()
+        shape.append((node.symbol, node.production_rule, len(node.children)))
+        pending.extend(reversed(node.children))
+    return shape
+
+
+def subtree_spans(parser, tokens):
+    """(symbol, start, end) in characters for every non-terminal covering tokens."""
+    spans = []
+    pending = [(parser.tree, 0)]
+    while pending:
+        node, first = pending.pop()
+        count = parser.token_counts[node]
+        if not count or node.is_terminal:
+            continue
+        spans.append((node.symbol, tokens[first][1], tokens[first + count - 1][2]))
+        children = []
+        for child in node.children:
+            children.append((child, first))
+            first += parser.token_counts[child]
+        pending.extend(reversed(children))
+    return spans
+
+
+def plan_edits(text, spans, tokens, samples, count, rng, max_tokens):
+    """Non-overlapping edits, last in the text first, so planned offsets stay valid.
+
+    Half replace a token's lexeme by another of the same type; the other half
+    replace a subtree's text by the text of another subtree of the same
+    non-terminal, so every edited program is still valid.
+    """
+    by_symbol = {}
+    for symbol, start, end in spans:
+        if end - start < max_tokens * 8:
+            by_symbol.setdefault(symbol, []).append((start, end))
+    symbols = [symbol for symbol, candidates in by_symbol.items() if len(candidates) > 1]
+
+    edits = []
+    for _ in range(count):
+        if rng.random() < 0.5:
+            token_type, start, end = rng.choice(tokens)
+            edits.append(('lexeme', start, end, rng.choice(samples[token_type])))
+        else:
+            symbol = rng.choice(symbols)
+            (start, end), (donor_start, donor_end) = rng.sample(by_symbol[symbol], 2)
+            edits.append(('subtree', start, end, text[donor_start:donor_end]))
+
+    edits.sort(key=lambda edit: edit[1], reverse=True)
+    planned = []
+    limit = len(text) + 1
+    for edit in edits:
+        if edit[2] < limit:
+            planned.append(edit)
+            limit = edit[1]
+    return planned
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental reparsing vs full reparsing after an edit")
+    parser.add_argument('--grammar', default='grammar1.txt')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 300000])
+    parser.add_argument('--edits', type=int, default=200)
+    parser.add_argument('--max-edit-tokens', type=int, default=40,
+                        help="largest subtree (roughly, in tokens) used as a replacement")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--verify', action='store_true', help="compare the final tree with a full parse")
+    args = parser.parse_args()
+
+    grammar, ll1_parser, dpda = load_pipeline(args.grammar)
+    lexer = Lexer(grammar)
+    samples = sample_lexemes(grammar, lexer, seed=args.seed)
+    rng = random.Random(args.seed)
+
+    print(f"{'tokens':>10} {'full ms':>10} {'lexeme ms':>10} {'subtree ms':>11} {'speedup':>8}")
+    for size in args.sizes:
+        text, _ = generate_program(grammar, size, seed=args.seed, lexer=lexer)
+        incremental = IncrementalParser(LL1ToDPDA(ll1_parser).convert_to_dpda(), lexer)
+        start = time.perf_counter()
+        accepted, _ = incremental.parse(text)
+        full_time = time.perf_counter() - start
+        if not accepted:
+            raise RuntimeError(f"Rejected a generated program of {size} tokens")
+
+        tokens = [token for token in lexer.iter_spans(text) if token[0] != 'ERROR']
+        edits = plan_edits(text, subtree_spans(incremental, tokens), tokens, samples,
+                           args.edits, rng, args.max_edit_tokens)
+        times = {'lexeme': [], 'subtree': []}
+        for kind, edit_start, edit_end, replacement in edits:
+            start = time.perf_counter()
+            accepted, _ = incremental.edit(edit_start, edit_end, replacement)
+            times[kind].append(time.perf_counter() - start)
+            if not accepted:
+                raise RuntimeError(f"Edit {kind} at {edit_start} was rejected")
+
+        if args.verify:
+            reference = IncrementalParser(LL1ToDPDA(ll1_parser).convert_to_dpda(), lexer)
+            reference.parse(incremental.text)
+            if tree_shape(reference.tree) != tree_shape(incremental.tree):
+                raise RuntimeError(f"Incremental tree differs from a full parse for {size} tokens")
+
+        lexeme_time = sum(times['lexeme']) / max(1, len(times['lexeme']))
+        subtree_time = sum(times['subtree']) / max(1, len(times['subtree']))
+        print(f"{len(tokens):>10} {full_time * 1000:>10.1f} {lexeme_time * 1000:>10.3f} "
+              f"{subtree_time * 1000:>11.3f} {full_time / subtree_time:>7.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import argparse
+import random
+
+from classes.compiled_dpda import CompiledDPDA
+from classes.lockstep_dpda import LockstepDPDA
+from classes.ll1_parser import LL1Parser
+from classes.ll1_to_dpda import LL1ToDPDA
+from benchmarks.bench_dpda import time_call
+from benchmarks.bench_driver import fuzz_corpus
+from benchmarks.bench_first_follow import read_grammar
+from benchmarks.workloads import load_pipeline, generate_token_types, synthetic_grammar_text
+
+
+def fragment_dpda(grammar_file, start_symbol):
+    """DPDA for the sub-language of one non-terminal (e.g. Expression)."""
+    grammar, _, _ = load_pipeline(grammar_file)
+    grammar.start_symbol = start_symbol
+    return LL1ToDPDA(LL1Parser(grammar)).convert_to_dpda()
+
+
+def check_equivalence(dpda, cases, seed):
+    """Verdicts and error positions against the DPDA on fuzzed inputs."""
+    compiled = CompiledDPDA(dpda)
+    inputs = list(fuzz_corpus(dpda.grammar, cases, random.Random(seed)))
+    accepted, error_positions = LockstepDPDA(compiled).recognize_batch(inputs, chunk_size=997)
+    for index, token_types in enumerate(inputs):
+        expected, _ = dpda.process_input(token_types)
+        _, position, _, _, _ = compiled.process_codes(compiled.encode(token_types))
+        actual = (bool(accepted[index]), int(error_positions[index]))
+        if actual != (expected, -1 if expected else position):
+            raise RuntimeError(f"LockstepDPDA disagrees with the DPDA on {token_types}: {actual}")
+    return int(accepted.sum()), len(inputs) - int(accepted.sum())
+
+
+def fragments(grammar, count, tokens, seed):
+    rng = random.Random(seed)
+    inputs = []
+    for index in range(count):
+        token_types = generate_token_types(grammar, rng.randint(1, tokens), seed=rng.random(), max_depth=4)
+        if index % 5 == 4:
+            # every fifth fragment loses a token so rejections are exercised too
+            del token_types[rng.randrange(len(token_types))]
+        inputs.append(token_types)
+    return inputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lockstep batch recognition vs a loop over DPDA.process_input")
+    parser.add_argument('--grammar', default='grammar1.txt')
+    parser.add_argument('--start', default='Expression', help="non-terminal the fragments are derived from")
+    parser.add_argument('--counts', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--tokens', type=int, default=12, help="largest fragment size")
+    parser.add_argument('--cases', type=int, default=5000, help="fuzzed inputs per grammar")
+    parser.add_argument('--levels', type=int, nargs='+', default=[3, 10],
+                        help="also fuzz synthetic grammars of these sizes")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    _, _, program_dpda = load_pipeline(args.grammar)
+    dpda = fragment_dpda(args.grammar, args.start)
+    dpdas = [(args.grammar, program_dpda), (f'{args.grammar} ({args.start})', dpda)]
+    for levels in args.levels:
+        grammar = read_grammar(synthetic_grammar_text(levels, seed=args.seed))
+        dpdas.append((f'synthetic({levels})', LL1ToDPDA(LL1Parser(grammar)).convert_to_dpda()))
+    for name, fuzzed in dpdas:
+        accepted, rejected = check_equivalence(fuzzed, args.cases, args.seed)
+        print(f"fuzz {name}: {accepted} accepted, {rejected} rejected, all identical to the DPDA")
+
+    lockstep = LockstepDPDA(dpda)
+    print(f"{'inputs':>10} {'tokens':>10} {'loop in/s':>12} {'lockstep in/s':>14} {'speedup':>8}")
+    for count in args.counts:
+        inputs = fragments(dpda.grammar, count, args.tokens, args.seed)
+        loop_time, verdicts = time_call(lambda: [dpda.process_input(token_types)[0] for token_types in inputs])
+        batch_time, (accepted, _) = time_call(lockstep.recognize_batch, inputs)
+        if verdicts != accepted.tolist():
+            raise RuntimeError(f"Lockstep verdicts differ from the DPDA on {count} fragments")
+        tokens = sum(map(len, inputs))
+        print(f"{count:>10} {tokens:>10} {count / loop_time:>12.0f} {count / batch_time:>14.0f}"
+              f" {loop_time / batch_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
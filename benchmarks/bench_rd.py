@@ -0,0 +1,87 @@
+import argparse
+import random
+import tempfile
+
+from classes.ll1_parser import LL1Parser
+from classes.ll1_to_dpda import LL1ToDPDA
+from classes.rd_generator import RecursiveDescentGenerator
+from classes.tree_traversal import iter_preorder
+from benchmarks.bench_dpda import time_call
+from benchmarks.bench_driver import fuzz_corpus
+from benchmarks.bench_first_follow import read_grammar
+from benchmarks.workloads import load_pipeline, generate_token_types, synthetic_grammar_text
+
+
+def tree_signature(tree):
+    if tree is None:
+        return None
+    return [(node.id, node.symbol, node.is_terminal, node.production_rule, node.parent.id if node.parent else None)
+            for node in iter_preorder(tree)]
+
+
+def check_equivalence(ll1_parser, module, cases, seed):
+    """Acceptance and the (possibly partial) tree must match the DPDA's; returns (accepted, rejected)."""
+    dpda = LL1ToDPDA(ll1_parser).convert_to_dpda()
+    rng = random.Random(seed)
+    counts = [0, 0]
+    for token_types in fuzz_corpus(ll1_parser.grammar, cases, rng):
+        lexemes = [f'x{index}' for index in range(len(token_types))]
+        expected, _, expected_tree = dpda.process_input_with_tree(token_types, lexemes=lexemes, trace_level='off')
+        expected_tree = tree_signature(expected_tree)
+        accepted, tree, _ = module.parse(token_types, lexemes=lexemes)
+        if accepted != expected or tree_signature(tree) != expected_tree:
+            raise RuntimeError(f"Generated parser disagrees with the DPDA on {token_types}")
+        counts[not expected] += 1
+    return counts
+
+
+def check_parsers(parsers, cases, seed, cache_dir):
+    """Generate, load and check a parser per (name, LL1Parser); returns
+    the modules by name."""
+    modules = {}
+    for name, checked in parsers:
+        generator = RecursiveDescentGenerator(checked)
+        generate_time, module = time_call(generator.load, cache_dir)
+        cached_time, _ = time_call(generator.load, cache_dir)
+        accepted, rejected = check_equivalence(checked, module, cases, seed)
+        print(f"{name}: generated in {generate_time * 1000:.1f} ms (cached load {cached_time * 1000:.1f} ms); "
+              f"{accepted} accepted, {rejected} rejected, trees identical to the DPDA")
+        modules[name] = module
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generated recursive-descent parser: equivalence and throughput")
+    parser.add_argument('--grammar', default='grammar1.txt')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 500000])
+    parser.add_argument('--cases', type=int, default=5000, help="fuzzed inputs per grammar")
+    parser.add_argument('--levels', type=int, nargs='+', default=[3, 10],
+                        help="also check synthetic grammars of these sizes")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--check-only', action='store_true', help="run the equivalence check and skip the timings")
+    args = parser.parse_args()
+
+    grammar, ll1_parser, dpda = load_pipeline(args.grammar)
+    parsers = [(args.grammar, ll1_parser)]
+    for levels in args.levels:
+        parsers.append((f'synthetic({levels})', LL1Parser(read_grammar(synthetic_grammar_text(levels, seed=args.seed)))))
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        module = check_parsers(parsers, args.cases, args.seed, cache_dir)[args.grammar]
+    if args.check_only:
+        return
+
+    print(f"{'tokens':>10} {'DPDA tok/s':>12} {'generated tok/s':>16} {'speedup':>8}")
+    for size in args.sizes:
+        token_types = generate_token_types(grammar, size, seed=args.seed)
+        lexemes = [token_type.lower() for token_type in token_types]
+        dpda_time, (accepted, _, _) = time_call(dpda.process_input_with_tree, token_types + ['$'],
+                                                lexemes=lexemes, trace_level='off')
+        generated_time, (generated_accepted, _, _) = time_call(module.parse, token_types, lexemes=lexemes)
+        if not (accepted and generated_accepted):
+            raise RuntimeError(f"Parsers disagree on a generated program of {size} tokens")
+        print(f"{size:>10} {size / dpda_time:>12.0f} {size / generated_time:>16.0f} {dpda_time / generated_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
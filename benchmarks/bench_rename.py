@@ -0,0 +1,63 @@
+import argparse
+import contextlib
+import io
+
+from classes.lexer import Lexer
+from classes.scope_analyzer import ScopeAnalyzer
+from classes.symbole_renamer import SymbolRenamer
+from benchmarks.bench_dpda import time_call
+from benchmarks.workloads import load_pipeline, generate_program
+
+
+def rebuild_rename(renamer, new_names):
+    # the old way: walk every leaf and rebuild the whole source
+    renamed_nodes = {}
+    for declaration_node_id, new_name in new_names.items():
+        declaration_info = renamer.symbol_table.declarations[declaration_node_id]
+        for node_id in [declaration_node_id] + declaration_info['references']:
+            renamed_nodes[node_id] = new_name
+    return renamer._reconstruct_source_with_rename(renamer.parse_tree.get_leaves(), renamed_nodes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Splice-based renaming against rebuilding the source")
+    parser.add_argument('--grammar', default='grammar1.txt')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    grammar, _, dpda = load_pipeline(args.grammar)
+    lexer = Lexer(grammar)
+
+    print(f"{'tokens':>10} {'symbols':>8} {'rebuild s':>10} {'splice s':>10} {'speedup':>8}"
+          f" {'batch s':>10} {'1-by-1 s':>10}")
+    for size in args.sizes:
+        text, _ = generate_program(grammar, size, seed=args.seed, lexer=lexer)
+        tokens = lexer.lex(text).without('ERROR')
+        with contextlib.redirect_stdout(io.StringIO()):
+            accepted, _, parse_tree = dpda.process_input_with_tree(tokens.types + ['$'], tokens=tokens,
+                                                                   trace_level='off')
+            symbol_table = ScopeAnalyzer(parse_tree, grammar).analyze()
+        if not accepted:
+            raise RuntimeError(f"Rejected a generated program of {size} tokens")
+        renamer = SymbolRenamer(parse_tree, symbol_table, lexer)
+
+        declarations = [node_id for node_id, info in symbol_table.declarations.items()
+                        if info['name'] not in {'function', 'return'}]
+        busiest = max(declarations, key=lambda node_id: len(symbol_table.declarations[node_id]['references']))
+        rebuild_time, _ = time_call(rebuild_rename, renamer, {busiest: 'renamed'})
+        splice_time, _ = time_call(renamer.rename_symbols, {busiest: 'renamed'})
+
+        new_names = {node_id: f'renamed_{index}' for index, node_id in enumerate(declarations)}
+        batch_time, renamed = time_call(renamer.rename_symbols, new_names)
+        one_by_one_time, _ = time_call(lambda: [renamer.rename_symbols({node_id: new_name})
+                                                for node_id, new_name in new_names.items()])
+        if renamed.split() != rebuild_rename(renamer, new_names).split():
+            raise RuntimeError("Splice and rebuild renames disagree")
+
+        print(f"{len(tokens):>10} {len(declarations):>8} {rebuild_time:>10.4f} {splice_time:>10.4f}"
+              f" {rebuild_time / splice_time:>7.0f}x {batch_time:>10.4f} {one_by_one_time:>10.4f}")
+
+
+if __name__ == '__main__':
+    main()
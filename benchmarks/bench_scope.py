@@ -0,0 +1,168 @@
+import argparse
+import contextlib
+import io
+import random
+import re
+import sys
+
+from classes.lexer import Lexer
+from classes.scope_analyzer import ScopeAnalyzer
+from benchmarks.bench_dpda import time_call
+from benchmarks.workloads import load_pipeline
+
+
+class LegacyScopeAnalyzer(ScopeAnalyzer):
+    """The analyzer before matchers were precompiled, kept for comparison."""
+
+    def _analyze_with_scopes(self, node, index=0):
+        if not self.symbol_table.scopes:
+            self.symbol_table.enter_scope('global')
+        if not node.is_terminal and node.symbol in self.FUNCTION_SCOPE_SYMBOLS:
+            self.symbol_table.enter_scope(self._get_scope_type(node), node)
+            for child in node.children:
+                self._analyze_with_scopes(child)
+            self.symbol_table.exit_scope()
+        else:
+            if self._legacy_is_variable_node(node):
+                var_name = self._legacy_extract_variable_name(node)
+                if var_name:
+                    if self._legacy_is_declaration_context(node):
+                        self.symbol_table.declare_symbol(var_name, node.id, node)
+                    else:
+                        declaration_id = self.symbol_table.reference_symbol(var_name, node.id, node)
+                        if not declaration_id:
+                            self.symbol_table.declare_symbol(var_name, node.id, node)
+            for child in node.children:
+                self._analyze_with_scopes(child)
+
+    def _legacy_is_declaration_context(self, node):
+        if not node.parent:
+            return True
+        parent = node.parent
+        if parent and len(parent.children) >= 2:
+            siblings = parent.children
+            try:
+                node_index = siblings.index(node)
+                if (node_index + 1 < len(siblings) and
+                        siblings[node_index + 1].symbol in ['=', 'EQUALS', 'ASSIGN']):
+                    var_name = self._legacy_extract_variable_name(node)
+                    if var_name and self.symbol_table.scopes:
+                        return var_name not in self.symbol_table.scopes[-1]['symbols']
+                    return True
+            except ValueError:
+                pass
+        return False
+
+    def _legacy_is_variable_node(self, node):
+        if not node.is_terminal:
+            return False
+        return node.symbol in self.variable_terminals or self._legacy_is_variable_value(node.symbol)
+
+    def _legacy_is_variable_value(self, symbol):
+        for terminal in self.variable_terminals:
+            pattern = self.grammar.terminal_patterns.get(terminal)
+            if pattern:
+                try:
+                    clean_pattern = pattern.replace(' ', '')
+                    compiled_pattern = re.compile(f'^{clean_pattern}$')
+                    if compiled_pattern.match(symbol):
+                        return True
+                except re.error:
+                    continue
+        return False
+
+    def _legacy_extract_variable_name(self, node):
+        if node.is_terminal:
+            if self._legacy_is_variable_value(node.symbol):
+                return node.symbol
+            if node.symbol in self.variable_terminals:
+                return node.symbol
+        return None
+
+
+def generate_statements(statements, seed=None, per_function=200, names=40):
+    """Source text for grammar1.txt with the given number of statements."""
+    rng = random.Random(seed)
+    variables = [f'v{index}' for index in range(names)]
+    lines = []
+
+    def expression():
+        terms = [rng.choice(variables) if rng.random() < 0.6 else str(rng.randint(0, 99))
+                 for _ in range(rng.randint(1, 3))]
+        return f' {rng.choice("+-*/")} '.join(terms)
+
+    written = 0
+    function_index = 0
+    while written < statements:
+        lines.append(f'function f{function_index} ( ) {{')
+        function_index += 1
+        for _ in range(min(per_function, statements - written)):
+            roll = rng.random()
+            if roll < 0.1:
+                lines.append(f'if ( {expression()} ) {{ {rng.choice(variables)} = {expression()} ; }}')
+                written += 2
+            elif roll < 0.15:
+                lines.append(f'while ( {expression()} ) {{ {rng.choice(variables)} = {expression()} ; }}')
+                written += 2
+            elif roll < 0.18:
+                lines.append(f'return {expression()} ;')
+                written += 1
+            else:
+                lines.append(f'{rng.choice(variables)} = {expression()} ;')
+                written += 1
+        lines.append('}')
+    return '\n'.join(lines) + '\n'
+
+
+def table_entries(symbol_table, variable_terminals):
+    # declarations and references of identifier tokens only: the legacy
+    # analyzer also records keywords whose lexemes match the identifier regex
+    def kept(node):
+        return node.token.type in variable_terminals
+    declarations = {node_id: (info['name'], info['scope_id'],
+                              [ref for ref in info['references'] if kept(symbol_table.references[ref]['node'])])
+                    for node_id, info in symbol_table.declarations.items() if kept(info['node'])}
+    references = {node_id: (info['name'], info['declaration_node_id'])
+                  for node_id, info in symbol_table.references.items() if kept(info['node'])}
+    return declarations, references
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scope analysis on large programs")
+    parser.add_argument('--grammar', default='grammar1.txt')
+    parser.add_argument('--statements', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--skip-legacy', action='store_true')
+    args = parser.parse_args()
+
+    # the legacy analyzer recurses once per level of the right-recursive lists
+    sys.setrecursionlimit(1000000)
+    grammar, _, dpda = load_pipeline(args.grammar)
+    lexer = Lexer(grammar)
+
+    print(f"{'statements':>10} {'tokens':>9} {'symbols':>8} {'legacy s':>9} {'new s':>9} {'speedup':>8}")
+    for statements in args.statements:
+        tokens = lexer.lex(generate_statements(statements, seed=args.seed)).without('ERROR')
+        accepted, _, parse_tree = dpda.process_input_with_tree(tokens.types + ['$'], tokens=tokens,
+                                                               trace_level='off')
+        if not accepted:
+            raise RuntimeError(f"Rejected a generated program of {statements} statements")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            analyzer = ScopeAnalyzer(parse_tree, grammar)
+            new_time, symbol_table = time_call(analyzer.analyze)
+        line = f"{statements:>10} {len(tokens):>9} {len(symbol_table.declarations):>8}"
+        if args.skip_legacy:
+            print(line + f" {'-':>9} {new_time:>9.3f}")
+            continue
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            legacy = LegacyScopeAnalyzer(parse_tree, grammar)
+            legacy_time, legacy_table = time_call(legacy.analyze)
+        if table_entries(symbol_table, analyzer.variable_terminals) != table_entries(legacy_table, analyzer.variable_terminals):
+            raise RuntimeError("Legacy and new analyzers disagree")
+        print(line + f" {legacy_time:>9.3f} {new_time:>9.3f} {legacy_time / new_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from classes.parse_service import ParseService, ParseClient
+from benchmarks.workloads import generate_program
+from classes.grammar import Grammar
+
+COLD_START = ("import sys; from classes.batch_parser import BatchParser; "
+              "result = BatchParser(sys.argv[1]).parse_file(sys.argv[2]); "
+              "sys.exit(0 if result['accepted'] else 1)")
+
+
+class BackgroundService:
+    """A ParseService running on its own event loop thread."""
+
+    def __init__(self, grammar_file, workers, path):
+        self.service = ParseService(grammar_file, workers=workers)
+        self.path = path
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+        self.stopping = None
+        self.thread = threading.Thread(target=self.loop.run_until_complete, args=(self._run(),), daemon=True)
+
+    async def _run(self):
+        self.stopping = asyncio.Event()
+        await self.service.start(self.path)
+        self.ready.set()
+        await self.stopping.wait()
+        await self.service.close()
+
+    def __enter__(self):
+        self.thread.start()
+        self.ready.wait()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.loop.call_soon_threadsafe(self.stopping.set)
+        self.thread.join()
+        self.loop.close()
+
+
+def client_run(path, sources, latencies):
+    with ParseClient(path) as client:
+        for source in sources:
+            start = time.perf_counter()
+            response = client.validate(source)
+            latencies.append(time.perf_counter() - start)
+            if not response['ok']:
+                raise RuntimeError(f"Service error: {response['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse service latency and throughput vs one process per file")
+    parser.add_argument('--grammar', default='grammar1.txt')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--tokens', type=int, default=500, help="tokens per source")
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 2, 4])
+    parser.add_argument('--cold-starts', type=int, default=10, help="files checked by separate processes")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    grammar = Grammar()
+    if not grammar.read_from_file(args.grammar):
+        raise ValueError(f"Failed to read grammar from {args.grammar}")
+    sources = [generate_program(grammar, args.tokens, seed=args.seed + index)[0] for index in range(args.requests)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        cold = []
+        for index in range(args.cold_starts):
+            path = os.path.join(directory, f'program_{index}.txt')
+            with open(path, 'w') as file:
+                file.write(sources[index])
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-c', COLD_START, args.grammar, path], check=True,
+                           env=dict(os.environ, PYTHONPATH=os.getcwd()))
+            cold.append(time.perf_counter() - start)
+        print(f"one process per file: {statistics.median(cold) * 1000:.1f} ms per file")
+
+        print(f"{'workers':>8} {'clients':>8} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+        for workers in args.workers:
+            path = os.path.join(directory, f'service_{workers}.sock')
+            with BackgroundService(args.grammar, workers, path):
+                for clients in args.clients:
+                    latencies = []
+                    threads = [threading.Thread(target=client_run, args=(path, sources[index::clients], latencies))
+                               for index in range(clients)]
+                    start = time.perf_counter()
+                    for thread in threads:
+                        thread.start()
+                    for thread in threads:
+                        thread.join()
+                    elapsed = time.perf_counter() - start
+                    if len(latencies) != len(sources):
+                        raise RuntimeError("Some requests were not answered")
+                    latencies.sort()
+                    print(f"{workers:>8} {clients:>8} {len(sources) / elapsed:>10.0f}"
+                          f" {latencies[len(latencies) // 2] * 1000:>8.2f}"
+                          f" {latencies[int(len(latencies) * 0.99)] * 1000:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
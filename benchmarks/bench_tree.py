@@ -0,0 +1,42 @@
+import argparse
+import tracemalloc
+
+from classes.dpda import ParseTreeNode
+from benchmarks.bench_dpda import time_call
+from benchmarks.workloads import load_pipeline, generate_token_types
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse tree construction scaling")
+    parser.add_argument('--grammar', default='grammar1.txt')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--memory', action='store_true',
+                        help="also report memory retained by the tree (slower)")
+    args = parser.parse_args()
+
+    grammar, _, dpda = load_pipeline(args.grammar)
+
+    print(f"{'tokens':>10} {'nodes':>10} {'seconds':>10} {'tok/s':>12}" + (f" {'tree MB':>10}" if args.memory else ''))
+    for size in args.sizes:
+        token_types = generate_token_types(grammar, size, seed=args.seed)
+        lexemes = [token_type.lower() for token_type in token_types]
+        token_string = token_types + ['$']
+        if args.memory:
+            tracemalloc.start()
+        elapsed, (accepted, _, parse_tree) = time_call(
+            dpda.process_input_with_tree, token_string, lexemes=lexemes, trace_level='off')
+        if not accepted:
+            raise RuntimeError(f"Rejected a generated program of {size} tokens")
+        count = len(token_types)
+        line = f"{count:>10} {ParseTreeNode.node_counter:>10} {elapsed:>10.3f} {count / elapsed:>12.0f}"
+        if args.memory:
+            retained, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            line += f" {retained / 1e6:>10.1f}"
+        print(line)
+        del parse_tree
+
+
+if __name__ == '__main__':
+    main()
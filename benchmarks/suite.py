@@ -0,0 +1,217 @@
+import argparse
+import contextlib
+import io
+import json
+import math
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from classes.lexer import Lexer
+from classes.ll1_parser import LL1Parser
+from classes.scope_analyzer import ScopeAnalyzer
+from classes.symbol_index import SymbolIndex
+from classes.symbole_renamer import SymbolRenamer
+from benchmarks.bench_first_follow import read_grammar
+from benchmarks.workloads import (load_pipeline, generate_program, generate_invalid_program,
+                                  synthetic_grammar_text)
+
+FORMAT_VERSION = 1
+
+
+def measure(function, repeat):
+    """(best seconds over repeat runs, peak traced bytes of one more run)."""
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def scaling_exponent(sizes, seconds):
+    """Least-squares slope of log(time) against log(size): 1 is linear."""
+    points = [(math.log(size), math.log(elapsed)) for size, elapsed in zip(sizes, seconds) if size > 0 and elapsed > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    if spread == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+
+
+def pipeline_stages(grammar, dpda, lexer, text, invalid_texts):
+    """[(stage, function, tokens processed)] for one program; later stages
+    reuse the outputs of earlier ones, as the CLI does."""
+    tokens = lexer.lex(text)
+    token_string = tokens.types + ['$']
+    # invalid programs stop at a random point, so a batch of them is timed
+    invalid_inputs = [lexer.lex(invalid_text).types + ['$'] for invalid_text in invalid_texts]
+    invalid_tokens = sum(len(token_types) - 1 for token_types in invalid_inputs)
+    _, _, tree = dpda.process_input_with_tree(token_string, trace_level='off', tokens=tokens)
+    symbol_table = ScopeAnalyzer(tree, grammar, verbose=False).analyze()
+    symbol_index = SymbolIndex(tree, symbol_table)
+    # the symbol with the most occurrences makes the largest rename
+    target = max(symbol_table.declarations, key=lambda node_id: len(symbol_table.declarations[node_id]['references']))
+    renamer = SymbolRenamer(tree, symbol_table, lexer, symbol_index)
+
+    every_symbol = {node_id: f'renamed_{index}' for index, node_id in enumerate(symbol_table.declarations)}
+
+    def rename():
+        with contextlib.redirect_stdout(io.StringIO()):
+            renamer.rename_symbol(target, 'renamed_symbol')
+
+    def reject():
+        for token_types in invalid_inputs:
+            dpda.process_input(token_types, trace_level='off')
+
+    count = len(tokens)
+    return [
+        ('tokenize', lambda: lexer.tokenize(text), count),
+        ('process_input', lambda: dpda.process_input(token_string, trace_level='off'), count),
+        ('process_input_invalid', reject, invalid_tokens),
+        ('process_input_with_tree', lambda: dpda.process_input_with_tree(token_string, trace_level='off',
+                                                                          tokens=tokens), count),
+        ('analyze', lambda: ScopeAnalyzer(tree, grammar, verbose=False).analyze(), count),
+        # one symbol only touches its own occurrences; renaming all of them touches every identifier
+        ('rename_symbol', rename, count),
+        ('rename_all_symbols', lambda: renamer.rename_symbols(every_symbol), count),
+    ]
+
+
+def run_suite(args):
+    grammar, _, dpda = load_pipeline(args.grammar)
+    lexer = Lexer(grammar)
+    results = {}
+
+    def record(stage, size, units, seconds, peak):
+        entry = results.setdefault(stage, {'sizes': [], 'units': [], 'seconds': [], 'throughput': [],
+                                           'peak_bytes': []})
+        entry['sizes'].append(size)
+        entry['units'].append(units)
+        entry['seconds'].append(seconds)
+        entry['throughput'].append(units / seconds if seconds else None)
+        entry['peak_bytes'].append(peak)
+
+    for size in args.sizes:
+        text, _ = generate_program(grammar, size, seed=args.seed, lexer=lexer)
+        invalid_texts = [generate_invalid_program(grammar, size, seed=args.seed + variant, lexer=lexer)[0]
+                         for variant in range(args.invalid_variants)]
+        for stage, function, token_count in pipeline_stages(grammar, dpda, lexer, text, invalid_texts):
+            seconds, peak = measure(function, args.repeat)
+            record(stage, size, token_count, seconds, peak)
+            print(f"  {stage:<24} {size:>8} tokens {seconds * 1000:>10.2f} ms"
+                  f" {token_count / seconds:>12.0f} tok/s {peak / 1024:>10.0f} KiB peak", file=sys.stderr)
+
+    # table construction scales with the grammar, not the input
+    for levels in args.grammar_levels:
+        synthetic = read_grammar(synthetic_grammar_text(levels, seed=args.seed))
+        symbols = len(synthetic.non_terminals) + len(synthetic.terminals)
+        seconds, peak = measure(lambda: LL1Parser(synthetic), args.repeat)
+        record('ll1_construction', levels, symbols, seconds, peak)
+        print(f"  {'ll1_construction':<24} {levels:>8} levels {seconds * 1000:>10.2f} ms"
+              f" {peak / 1024:>29.0f} KiB peak", file=sys.stderr)
+
+    for entry in results.values():
+        entry['exponent'] = scaling_exponent(entry['units'], entry['seconds'])
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Print per-stage time ratios against a saved run; returns the
+    (stage, size, ratio) entries slower than threshold."""
+    regressions = []
+    print(f"{'stage':<24} {'size':>8} {'before ms':>10} {'after ms':>10} {'ratio':>7}")
+    for stage, entry in results.items():
+        old = baseline['results'].get(stage)
+        if old is None:
+            continue
+        old_seconds = dict(zip(old['sizes'], old['seconds']))
+        for size, seconds in zip(entry['sizes'], entry['seconds']):
+            if size not in old_seconds:
+                continue
+            ratio = seconds / old_seconds[size]
+            flag = ' slower' if ratio > threshold else ''
+            print(f"{stage:<24} {size:>8} {old_seconds[size] * 1000:>10.2f} {seconds * 1000:>10.2f}"
+                  f" {ratio:>6.2f}x{flag}")
+            if ratio > threshold:
+                regressions.append((stage, size, ratio))
+    return regressions
+
+
+def print_summary(results):
+    print(f"{'stage':<24} {'largest':>8} {'units/s':>12} {'peak KiB':>10} {'exponent':>9}")
+    for stage, entry in results.items():
+        throughput = entry['throughput'][-1]
+        exponent = entry['exponent']
+        print(f"{stage:<24} {entry['sizes'][-1]:>8} {throughput or 0:>12.0f} {entry['peak_bytes'][-1] / 1024:>10.0f}"
+              f" {exponent if exponent is not None else float('nan'):>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline benchmark suite: throughput, peak memory and scaling")
+    parser.add_argument('--grammar', default='grammar1.txt')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 4000, 16000, 64000],
+                        help="program sizes in tokens")
+    parser.add_argument('--grammar-levels', type=int, nargs='+', default=[5, 10, 20, 40],
+                        help="synthetic grammar sizes for LL(1) table construction")
+    parser.add_argument('--invalid-variants', type=int, default=8,
+                        help="mutated programs per size for the rejection timing")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per measurement (best is kept)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="save the results as JSON")
+    parser.add_argument('--compare', help="JSON results of an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help="time ratio counted as a regression by --compare")
+    args = parser.parse_args()
+
+    results = run_suite(args)
+    print_summary(results)
+
+    report = {
+        'format': FORMAT_VERSION,
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'grammar': args.grammar,
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f"results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if baseline.get('format') != FORMAT_VERSION:
+            raise ValueError(f"{args.compare} was written by another suite version")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} measurement(s) slower than {args.threshold}x the baseline")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
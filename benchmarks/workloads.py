@@ -0,0 +1,254 @@
+import random
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+from classes.grammar import Grammar
+from classes.lexer import Lexer
+from classes.ll1_parser import LL1Parser
+from classes.ll1_to_dpda import LL1ToDPDA
+
+
+def load_pipeline(grammar_file='grammar1.txt'):
+    grammar = Grammar()
+    if not grammar.read_from_file(grammar_file):
+        raise ValueError(f"Failed to read grammar from {grammar_file}")
+    ll1_parser = LL1Parser(grammar)
+    dpda = LL1ToDPDA(ll1_parser).convert_to_dpda()
+    return grammar, ll1_parser, dpda
+
+
+def synthetic_grammar_text(levels, seed=None):
+    """An LL(1) grammar file with 2 * levels non-terminals and 3 * levels terminals.
+
+    S_i -> A_i S_{i+1} R_i | B_i R_i and R_i -> C_i S_j R_i | eps with j > i, so
+    FIRST/FOLLOW information has to travel along long dependency chains.
+    """
+    rng = random.Random(seed)
+    non_terminals = []
+    terminals = []
+    productions = []
+    for level in range(levels):
+        non_terminals += [f'S{level}', f'R{level}']
+        terminals += [f'A{level}', f'B{level}', f'C{level}']
+        if level + 1 < levels:
+            productions.append(f'S{level} -> A{level} S{level + 1} R{level} | B{level} R{level}')
+            target = rng.randrange(level + 1, levels)
+            productions.append(f'R{level} -> C{level} S{target} R{level} | eps')
+        else:
+            productions.append(f'S{level} -> A{level} R{level} | B{level} R{level}')
+            productions.append(f'R{level} -> C{level} R{level} | eps')
+
+    lines = ['START = S0', '',
+             'NON_TERMINALS = ' + ' , '.join(non_terminals), '',
+             'TERMINALS = ' + ' , '.join(terminals), '']
+    lines += productions
+    lines.append('')
+    lines += [f'{terminal} -> /{terminal.lower()}/' for terminal in terminals]
+    return '\n'.join(lines) + '\n'
+
+
+# The start symbol is not nullable and every production ends in a terminal,
+# so input can be left over once the start symbol is fully derived and the
+# automaton is back on Z0; the other grammars always reject at a nullable
+# non-terminal first.
+TERMINAL_END_GRAMMAR = """START = S
+
+NON_TERMINALS = S , T
+
+TERMINALS = A , B , C , D
+
+S -> A T B | C
+T -> D T | eps
+
+A -> /a/
+B -> /b/
+C -> /c/
+D -> /d/
+"""
+
+
+def derivation_bounds(grammar):
+    """Shortest token count and smallest derivation height for every symbol."""
+    infinity = float('inf')
+    min_length = {terminal: 1 for terminal in grammar.terminals}
+    min_height = {terminal: 0 for terminal in grammar.terminals}
+    for non_terminal in grammar.non_terminals:
+        min_length[non_terminal] = infinity
+        min_height[non_terminal] = infinity
+
+    changed = True
+    while changed:
+        changed = False
+        for non_terminal in grammar.non_terminals:
+            for production in grammar.get_productions(non_terminal):
+                length = sum(min_length[symbol] for symbol in production)
+                height = 1 + max((min_height[symbol] for symbol in production), default=0)
+                if length < min_length[non_terminal]:
+                    min_length[non_terminal] = length
+                    changed = True
+                if height < min_height[non_terminal]:
+                    min_height[non_terminal] = height
+                    changed = True
+
+    return min_length, min_height
+
+
+def generate_token_types(grammar, target_tokens, seed=None, max_depth=8):
+    """Random leftmost derivation of roughly target_tokens terminals.
+
+    Right-recursive list productions at the top level keep growing until the
+    budget is used up; everything nested below is chosen uniformly at random
+    and forced towards the shortest derivation past max_depth.
+    """
+    rng = random.Random(seed)
+    min_length, min_height = derivation_bounds(grammar)
+
+    def height(production):
+        return max((min_height[symbol] for symbol in production), default=0)
+
+    tokens = []
+    start_symbol = grammar.start_symbol
+    stack = [(start_symbol, 0)]
+    pending = min_length[start_symbol]
+
+    while stack:
+        symbol, depth = stack.pop()
+        if symbol in grammar.terminals:
+            tokens.append(symbol)
+            pending -= 1
+            continue
+
+        productions = grammar.get_productions(symbol)
+        pending -= min_length[symbol]
+        recursive = [production for production in productions
+                     if production and production[-1] == symbol]
+
+        if len(tokens) + pending >= target_tokens or depth >= max_depth:
+            production = min(productions, key=height)
+        elif depth == 0 and recursive:
+            production = rng.choice(recursive)
+        else:
+            production = rng.choice(productions)
+
+        pending += sum(min_length[child] for child in production)
+        last = len(production) - 1
+        for index in range(last, -1, -1):
+            # tail positions stay at the parent's depth so lists do not nest
+            stack.append((production[index], depth if index == last else depth + 1))
+
+    return tokens
+
+
+def mutate(token_types, alphabet, rng):
+    """A copy with a few random deletions, insertions, swaps and replacements."""
+    mutated = list(token_types)
+    for _ in range(rng.randint(1, 3)):
+        kind = rng.randrange(4)
+        index = rng.randrange(len(mutated) + 1)
+        if kind == 0 and index < len(mutated):
+            del mutated[index]
+        elif kind == 1:
+            mutated.insert(index, rng.choice(alphabet))
+        elif kind == 2 and index + 1 < len(mutated):
+            mutated[index], mutated[index + 1] = mutated[index + 1], mutated[index]
+        elif index < len(mutated):
+            mutated[index] = rng.choice(alphabet)
+    return mutated
+
+
+def _sample_regex(items, rng):
+    out = []
+    for opcode, argument in items:
+        name = str(opcode)
+        if name == 'LITERAL':
+            out.append(chr(argument))
+        elif name in ('MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT'):
+            low, high, sub = argument
+            high = min(high, low + 6)
+            for _ in range(rng.randint(low, high)):
+                out.append(_sample_regex(sub, rng))
+        elif name == 'SUBPATTERN':
+            out.append(_sample_regex(argument[-1], rng))
+        elif name == 'BRANCH':
+            out.append(_sample_regex(rng.choice(argument[1]), rng))
+        elif name == 'IN':
+            out.append(_sample_class(argument, rng))
+        elif name == 'CATEGORY':
+            out.append(_sample_class([(opcode, argument)], rng))
+        elif name == 'ANY':
+            out.append(rng.choice('abcxyz0123'))
+        elif name == 'NOT_LITERAL':
+            out.append('a' if argument != ord('a') else 'b')
+        # anchors and lookarounds generate nothing
+    return ''.join(out)
+
+
+def _sample_class(items, rng):
+    choices = []
+    for opcode, argument in items:
+        name = str(opcode)
+        if name == 'LITERAL':
+            choices.append(chr(argument))
+        elif name == 'RANGE':
+            low, high = argument
+            choices.extend(chr(code) for code in range(low, min(high, low + 25) + 1))
+        elif name == 'CATEGORY':
+            category = str(argument)
+            if 'DIGIT' in category:
+                choices.extend('0123456789')
+            elif 'WORD' in category:
+                choices.extend('abcdefxyz_0123456789')
+            elif 'SPACE' not in category:
+                choices.extend('abc')
+        elif name == 'NEGATE':
+            return 'a'
+    return rng.choice(choices) if choices else 'a'
+
+
+def sample_lexemes(grammar, lexer=None, per_terminal=8, seed=None, attempts=200):
+    """A few lexemes per terminal, sampled from its regex, that the lexer maps back to it."""
+    rng = random.Random(seed)
+    lexer = lexer or Lexer(grammar)
+    samples = {}
+    for terminal, compiled_pattern in lexer.compiled_patterns.items():
+        found = []
+        parsed = sre_parse.parse(compiled_pattern.pattern)
+        for _ in range(attempts):
+            lexeme = _sample_regex(parsed, rng)
+            if lexeme and lexeme not in found and lexer.tokenize(lexeme) == [(terminal, lexeme)]:
+                found.append(lexeme)
+                if len(found) == per_terminal:
+                    break
+        if not found:
+            raise ValueError(f"Could not sample a lexeme for terminal {terminal}")
+        samples[terminal] = found
+    return samples
+
+
+def generate_program(grammar, target_tokens, seed=None, lexer=None, max_depth=8, tokens_per_line=12):
+    """Source text of a random valid program; returns (text, token_types)."""
+    rng = random.Random(seed)
+    token_types = generate_token_types(grammar, target_tokens, seed=seed, max_depth=max_depth)
+    samples = sample_lexemes(grammar, lexer, seed=seed)
+    return _render(token_types, samples, rng, tokens_per_line), token_types
+
+
+def generate_invalid_program(grammar, target_tokens, seed=None, lexer=None, max_depth=8, tokens_per_line=12):
+    """Like generate_program, with a few tokens deleted, inserted, swapped or
+    replaced; almost always rejected, at a random point of the input."""
+    rng = random.Random(seed)
+    token_types = generate_token_types(grammar, target_tokens, seed=seed, max_depth=max_depth)
+    token_types = mutate(token_types, sorted(grammar.terminals), rng)
+    samples = sample_lexemes(grammar, lexer, seed=seed)
+    return _render(token_types, samples, rng, tokens_per_line), token_types
+
+
+def _render(token_types, samples, rng, tokens_per_line):
+    lines = []
+    for start in range(0, len(token_types), tokens_per_line):
+        lines.append(' '.join(rng.choice(samples[token_type])
+                              for token_type in token_types[start:start + tokens_per_line]))
+    return '\n'.join(lines) + '\n'
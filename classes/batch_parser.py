@@ -0,0 +1,120 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from classes.grammar import Grammar
+from classes.lexer import Lexer
+from classes.ll1_parser import LL1Parser
+from classes.ll1_to_dpda import LL1ToDPDA
+from classes.compiled_dpda import CompiledDPDA
+
+# per-process copies installed by _init_worker
+_worker_lexer = None
+_worker_dpda = None
+
+
+def _init_worker(lexer, compiled_dpda):
+    global _worker_lexer, _worker_dpda
+    _worker_lexer = lexer
+    _worker_dpda = compiled_dpda
+
+
+def _check_worker_file(path):
+    return check_file(path, _worker_lexer, _worker_dpda)
+
+
+def _count_types(tokens, counts):
+    # token types without ERROR; counts[0] gets the types passed on, counts[1] the ERRORs
+    for token_type, _ in tokens:
+        if token_type == 'ERROR':
+            counts[1] += 1
+        else:
+            counts[0] += 1
+            yield token_type
+
+
+def check_file(path, lexer, compiled_dpda):
+    """Lex and recognize one file; returns a result dict (never raises).
+
+    Tokens go from the lexer straight into the DPDA, so only a chunk of
+    the file is held at a time; after a rejection the rest is only lexed,
+    for the counts.
+    """
+    start = time.perf_counter()
+    result = {'file': path, 'accepted': False, 'tokens': 0, 'lexical_errors': 0, 'error': None}
+    counts = [0, 0]
+    try:
+        with open(path, 'r') as file:
+            token_types = _count_types(lexer.iter_tokens(file), counts)
+            accepted, trace = compiled_dpda.process_input(token_types, trace_level='errors')
+            for _ in token_types:
+                pass
+    except (OSError, UnicodeDecodeError) as e:
+        result['error'] = f"Cannot read file: {e}"
+        result['time'] = time.perf_counter() - start
+        return result
+
+    result['tokens'], result['lexical_errors'] = counts
+    errors = []
+    if result['lexical_errors']:
+        errors.append(f"{result['lexical_errors']} unrecognized character(s)")
+    if not accepted:
+        errors.append(trace[0] if trace else "Input rejected")
+    result['error'] = '; '.join(errors) or None
+    result['accepted'] = accepted and not result['lexical_errors']
+    result['time'] = time.perf_counter() - start
+    return result
+
+
+class BatchParser:
+    """Validates many source files against one grammar.
+
+    The grammar, LL(1) table, lexer and DPDA are built once (or loaded from a
+    GrammarCache when one is given); with more than one worker the lexer and
+    the compiled DPDA are shipped to every process of a ProcessPoolExecutor a
+    single time, at pool start-up.
+    """
+
+    def __init__(self, grammar_file, cache=None):
+        if cache is not None:
+            self.grammar, self.ll1_parser, self.compiled_dpda = cache.load(grammar_file)
+            self.dpda = LL1ToDPDA(self.ll1_parser).convert_to_dpda()
+        else:
+            self.grammar = Grammar()
+            if not self.grammar.read_from_file(grammar_file):
+                raise ValueError(f"Failed to read grammar from {grammar_file}")
+            self.ll1_parser = LL1Parser(self.grammar)
+            self.dpda = LL1ToDPDA(self.ll1_parser).convert_to_dpda()
+            self.compiled_dpda = CompiledDPDA(self.dpda)
+        self.lexer = Lexer(self.grammar)
+
+    def parse_file(self, path):
+        return check_file(path, self.lexer, self.compiled_dpda)
+
+    def parse_files(self, paths, workers=None, chunksize=None):
+        """Results for every path, in input order.
+
+        workers defaults to os.cpu_count(); 1 runs in this process.
+        """
+        paths = list(paths)
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(paths) < 2:
+            return [self.parse_file(path) for path in paths]
+
+        if chunksize is None:
+            # a few chunks per worker keeps the pool balanced without per-file IPC
+            chunksize = max(1, len(paths) // (workers * 8))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self.lexer, self.compiled_dpda)) as pool:
+            return list(pool.map(_check_worker_file, paths, chunksize=chunksize))
+
+    @staticmethod
+    def summarize(results):
+        accepted = sum(1 for result in results if result['accepted'])
+        return {
+            'files': len(results),
+            'accepted': accepted,
+            'rejected': len(results) - accepted,
+            'tokens': sum(result['tokens'] for result in results),
+            'time': sum(result['time'] for result in results),
+        }
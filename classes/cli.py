@@ -0,0 +1,258 @@
+import argparse
+import contextlib
+import glob
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from classes.batch_parser import BatchParser
+from classes.grammar_cache import GrammarCache
+from classes.parse_service import RequestHandler
+
+EXIT_OK = 0
+EXIT_REJECTED = 1  # some input was rejected or could not be renamed
+EXIT_ERROR = 2  # bad arguments, unreadable files or grammar
+
+# subcommand -> RequestHandler op
+COMMANDS = {
+    'check': 'validate',
+    'tokens': 'tokens',
+    'tree': 'parse',
+    'symbols': 'symbols',
+    'rename': 'rename',
+}
+
+# per-process handler installed by _init_worker
+_worker_handler = None
+
+
+def _init_worker(handler):
+    global _worker_handler
+    _worker_handler = handler
+
+
+def _handle_worker_file(job):
+    return handle_file(_worker_handler, *job)
+
+
+def read_source(path):
+    if path == '-':
+        return sys.stdin.read()
+    with open(path, 'r', encoding='utf-8') as file:
+        return file.read()
+
+
+def handle_file(handler, path, request, source=None):
+    """(path, response); source, when given, is used instead of reading
+    path. A file that cannot be read gets an error response."""
+    if source is None:
+        try:
+            source = read_source(path)
+        except (OSError, UnicodeDecodeError) as e:
+            return path, {'ok': False, 'error': f"Cannot read file: {e}", 'unreadable': True}
+    return path, handler.handle(dict(request, source=source))
+
+
+def expand_inputs(patterns):
+    """Files named by paths and glob patterns, in order and without repeats."""
+    paths = []
+    seen = set()
+    for pattern in patterns:
+        if pattern == '-' or os.path.exists(pattern):
+            matches = [pattern]
+        else:
+            matches = sorted(glob.glob(pattern, recursive=True))
+            if not matches:
+                raise ValueError(f"No files match '{pattern}'")
+        for path in matches:
+            if path not in seen and not os.path.isdir(path):
+                seen.add(path)
+                paths.append(path)
+    if not paths:
+        raise ValueError("No input files")
+    return paths
+
+
+def parse_renames(pairs):
+    renames = {}
+    for pair in pairs:
+        target, separator, new_name = pair.partition('=')
+        if not separator or not target or not new_name:
+            raise ValueError(f"Expected OLD=NEW (a name or node id), got '{pair}'")
+        renames[target] = new_name
+    return renames
+
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('inputs', nargs='+', help="source files or glob patterns ('-' for stdin)")
+    common.add_argument('--grammar', default='grammar1.txt')
+    common.add_argument('--cache-dir', help="grammar cache directory")
+    common.add_argument('--format', choices=('text', 'json', 'ndjson'), default='text')
+    common.add_argument('-q', '--quiet', action='store_true',
+                        help="print nothing for inputs that succeed; problems still go to stderr")
+    common.add_argument('--workers', type=int, default=1, help="worker processes for many files")
+
+    parser = argparse.ArgumentParser(prog='main.py', description="LL(1) toolkit command line")
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.required = True
+    commands.add_parser('check', parents=[common], help="validate inputs against the grammar")
+    commands.add_parser('tokens', parents=[common], help="list the tokens of each input")
+    tree = commands.add_parser('tree', parents=[common], help="print the parse tree of each input")
+    tree.add_argument('--ids', action='store_true', help="show node ids (as used by rename)")
+    commands.add_parser('symbols', parents=[common], help="list declarations and their references")
+    rename = commands.add_parser('rename', parents=[common], help="rename symbols and print or save the result")
+    rename.add_argument('-r', '--rename', action='append', required=True, metavar='OLD=NEW',
+                        help="symbol name or node id and its new name (repeatable)")
+    output = rename.add_mutually_exclusive_group()
+    output.add_argument('-o', '--output', help="write the renamed source here (one input only)")
+    output.add_argument('--in-place', action='store_true', help="overwrite every input with its renamed source")
+    return parser
+
+
+class CommandLine:
+    """Non-interactive front end: one RequestHandler op per subcommand,
+    applied to every input file, printed as text, JSON or NDJSON."""
+
+    def __init__(self, args, out=None, err=None):
+        self.args = args
+        self.out = out or sys.stdout
+        self.err = err or sys.stderr
+        self.op = COMMANDS[args.command]
+        self.exit_code = EXIT_OK
+
+    def run(self):
+        try:
+            paths = expand_inputs(self.args.inputs)
+            request = self._request(paths)
+            cache = GrammarCache(self.args.cache_dir) if self.args.cache_dir else None
+            # the grammar, lexer and cache print their diagnostics; keep them
+            # off stdout, which may be carrying JSON
+            with contextlib.redirect_stdout(self.err):
+                batch = BatchParser(self.args.grammar, cache)
+        except ValueError as e:
+            print(f"Error: {e}", file=self.err)
+            return EXIT_ERROR
+        handler = RequestHandler(batch.grammar, batch.lexer, batch.dpda, batch.compiled_dpda)
+
+        records = []
+        for path, response in self._responses(handler, paths, request):
+            self._account(path, response)
+            if self.args.format == 'json':
+                records.append(dict(response, file=path))
+            elif self.args.format == 'ndjson':
+                if not (self.args.quiet and self._succeeded(response)):
+                    print(json.dumps(dict(response, file=path)), file=self.out)
+            else:
+                self._print_text(path, response)
+        if self.args.format == 'json':
+            if self.args.quiet:
+                records = [record for record in records if not self._succeeded(record)]
+            json.dump(records, self.out, indent=2)
+            print(file=self.out)
+        return self.exit_code
+
+    def _request(self, paths):
+        request = {'op': self.op}
+        if self.op == 'parse':
+            request['tree'] = True
+        elif self.op == 'rename':
+            request['renames'] = parse_renames(self.args.rename)
+            if self.args.output and len(paths) > 1:
+                raise ValueError("--output takes a single input; use --in-place for several")
+            if self.args.in_place and '-' in paths:
+                raise ValueError("--in-place cannot rewrite stdin")
+        return request
+
+    def _responses(self, handler, paths, request):
+        workers = self.args.workers
+        if workers <= 1 or len(paths) < 2:
+            for path in paths:
+                yield handle_file(handler, path, request)
+            return
+        # worker processes do not share this process's stdin, so it is read
+        # here and its text sent along with the job
+        jobs = [(path, request, read_source(path) if path == '-' else None) for path in paths]
+        chunksize = max(1, len(paths) // (workers * 8))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(handler,)) as pool:
+            yield from pool.map(_handle_worker_file, jobs, chunksize=chunksize)
+
+    def _succeeded(self, response):
+        return response['ok'] and response.get('accepted', True)
+
+    def _account(self, path, response):
+        if response.get('unreadable'):
+            self.exit_code = EXIT_ERROR
+        elif not self._succeeded(response) and self.exit_code == EXIT_OK:
+            self.exit_code = EXIT_REJECTED
+        elif self.op == 'rename' and response['ok']:
+            self._save_renamed(path, response['source'])
+
+    def _save_renamed(self, path, source):
+        target = path if self.args.in_place else self.args.output
+        if target is None:
+            return
+        try:
+            with open(target, 'w', encoding='utf-8') as file:
+                file.write(source)
+        except OSError as e:
+            print(f"{path}: cannot write {target}: {e}", file=self.err)
+            self.exit_code = EXIT_ERROR
+
+    def _print_text(self, path, response):
+        if not response['ok']:
+            print(f"{path}: {response['error']}", file=self.err)
+            return
+        if not response.get('accepted', True):
+            print(f"{path}: REJECTED - {response['error']}", file=self.err)
+            if self.op == 'validate' or self.args.quiet:
+                return
+        elif self.args.quiet:
+            return
+
+        write = self.out.write
+        if self.op == 'validate':
+            write(f"{path}: OK ({response['tokens']} tokens)\n")
+        elif self.op == 'tokens':
+            for token in response['tokens']:
+                write(f"{path}:{token['line']}:{token['column']}\t{token['type']}\t{token['lexeme']}\n")
+        elif self.op == 'parse':
+            self._print_tree(path, response['tree'])
+        elif self.op == 'symbols':
+            for symbol in response['symbols']:
+                references = ', '.join(f"{reference.get('line')}:{reference.get('column')}"
+                                       for reference in symbol['references'])
+                write(f"{path}:{symbol.get('line')}:{symbol.get('column')}\t{symbol['name']}\t"
+                      f"scope {symbol['scope']} ({symbol['scope_type']})\t[{symbol['id']}]\t"
+                      f"references: {references or '-'}\n")
+        elif self.op == 'rename' and not (self.args.in_place or self.args.output):
+            write(response['source'])
+            if not response['source'].endswith('\n'):
+                write('\n')
+
+    def _print_tree(self, path, nodes):
+        self.out.write(f"{path}:\n")
+        depths = {None: -1}
+        lines = []
+        for node in nodes:
+            depth = depths[node['parent']] + 1
+            depths[node['id']] = depth
+            label = node['symbol'] + (f" [{node['id']}]" if self.args.ids else '')
+            lines.append('  ' * (depth + 1) + label)
+        self.out.write('\n'.join(lines) + '\n' if lines else '')
+
+
+def run(argv=None):
+    args = build_parser().parse_args(argv)
+    command_line = CommandLine(args)
+    try:
+        exit_code = command_line.run()
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # the reader went away (e.g. '| head'); stdout is pointed at devnull
+        # so the flush at interpreter exit does not fail again
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return command_line.exit_code
+    return exit_code
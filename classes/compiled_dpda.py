@@ -0,0 +1,231 @@
+from array import array
+from itertools import repeat
+
+from classes.dpda import TraceRecorder
+
+
+class CompiledDPDA:
+    """Integer-coded copy of an LL(1)-derived DPDA.
+
+    Symbols and states are interned to small integers once, the parse table
+    becomes a dense row-major array (one row per non-terminal, one column per
+    input code) of production indices and every production is stored as a
+    pre-reversed tuple of codes, ready to be pushed. process_codes() then runs
+    the same expand/match loop as DPDA.process_input on plain integers.
+
+    Symbol codes: terminals, '$', a placeholder for unknown input,
+    non-terminals, other stack symbols (Z0). Input codes are the terminal
+    codes, '$' and the placeholder, so an input code can only ever equal a
+    terminal on the stack. The DPDA's own moves, rarely needed for an LL(1)
+    automaton, are kept as a dense per-(state, stack symbol) epsilon array
+    plus a sparse dict of input moves.
+    """
+    NO_ENTRY = -1
+    UNKNOWN = '<unknown>'
+    ARRAY_FIELDS = ('table', 'epsilon_moves')
+
+    def __init__(self, dpda):
+        if dpda.grammar is None:
+            raise ValueError("DPDA has no grammar attached; convert it with LL1ToDPDA first")
+        grammar = dpda.grammar
+
+        self.terminals = sorted(grammar.terminals)
+        self.non_terminals = sorted(grammar.non_terminals)
+        other_symbols = sorted(dpda.stack_alphabet - grammar.terminals - grammar.non_terminals - {'$'})
+        self.symbols = self.terminals + ['$', self.UNKNOWN] + self.non_terminals + other_symbols
+        self.codes = {symbol: code for code, symbol in enumerate(self.symbols)}
+        self.input_codes = {symbol: self.codes[symbol] for symbol in self.terminals + ['$']}
+
+        self.end_code = self.codes['$']
+        self.unknown_code = self.end_code + 1
+        self.non_terminal_base = self.unknown_code + 1
+        self.bottom_code = self.codes.get('Z0', -1)
+        self.width = self.unknown_code + 1  # input columns
+
+        self._compile_parse_table(dpda.parse_table)
+        self._compile_transitions(dpda)
+
+    def _compile_parse_table(self, parse_table):
+        self.productions = []  # index -> (non_terminal, production)
+        self.reversed_productions = []  # index -> codes in push order
+        production_indices = {}
+
+        self.table = array('i', [self.NO_ENTRY]) * (len(self.non_terminals) * self.width)
+        # row offset into table for every stack code, -1 for non non-terminals
+        self.row_offsets = [self.NO_ENTRY] * len(self.symbols)
+        for non_terminal in self.non_terminals:
+            code = self.codes[non_terminal]
+            self.row_offsets[code] = (code - self.non_terminal_base) * self.width
+
+        for (non_terminal, terminal), production in parse_table.items():
+            key = (non_terminal, tuple(production))
+            index = production_indices.get(key)
+            if index is None:
+                index = len(self.productions)
+                production_indices[key] = index
+                self.productions.append((non_terminal, production))
+                self.reversed_productions.append(tuple(self.codes[symbol] for symbol in reversed(production)))
+            self.table[self.row_offsets[self.codes[non_terminal]] + self.codes[terminal]] = index
+
+    def _compile_transitions(self, dpda):
+        self.states = sorted(dpda.states)
+        self.state_codes = {state: code for code, state in enumerate(self.states)}
+        self.start_state = self.state_codes[dpda.start_state]
+        self.accept_states = frozenset(self.state_codes[state] for state in dpda.accept_states)
+        self.final_state = self.state_codes.get('q2', -1)
+
+        self.transition_targets = []  # index -> (to state, codes in push order)
+        # epsilon_moves[state * len(symbols) + stack code] -> target index
+        self.epsilon_moves = array('i', [self.NO_ENTRY]) * (len(self.states) * len(self.symbols))
+        self.input_moves = {}  # (state, input code, stack code) -> target index
+
+        for (from_state, input_symbol, stack_symbol), (to_state, new_stack) in dpda.transitions.items():
+            state = self.state_codes[from_state]
+            target = len(self.transition_targets)
+            self.transition_targets.append(
+                (self.state_codes[to_state], tuple(self.codes[symbol] for symbol in reversed(new_stack))))
+            if input_symbol == '':
+                self.epsilon_moves[state * len(self.symbols) + self.codes[stack_symbol]] = target
+            else:
+                self.input_moves[(state, self.codes[input_symbol], self.codes[stack_symbol])] = target
+
+    def export_tables(self):
+        """Plain data (no arrays or custom objects) for serialization."""
+        tables = dict(self.__dict__)
+        for field in self.ARRAY_FIELDS:
+            tables[field] = tables[field].tobytes()
+        return tables
+
+    @classmethod
+    def from_tables(cls, tables):
+        compiled = cls.__new__(cls)
+        compiled.__dict__.update(tables)
+        for field in cls.ARRAY_FIELDS:
+            codes = array('i')
+            codes.frombytes(tables[field])
+            setattr(compiled, field, codes)
+        return compiled
+
+    def encode(self, input_string):
+        lookup = self.input_codes.get
+        unknown_code = self.unknown_code
+        return array('i', [lookup(symbol, unknown_code) for symbol in input_string])
+
+    def process_input(self, input_string, trace_level='off', trace_sink=None):
+        """Same contract as DPDA.process_input, except that 'full' tracing is
+        not available (use DPDA for step-by-step traces).
+
+        input_string may be any iterable of token types, e.g. a generator
+        over Lexer.iter_tokens(); below 'summary' it is read one token at a
+        time and never held whole, and reading stops at the first error.
+        A 'summary' trace shows the whole input, so it makes a list first.
+        """
+        tracer = TraceRecorder(trace_level, trace_sink)
+        if tracer.steps:
+            raise ValueError("CompiledDPDA does not record per-step traces; use trace_level 'summary' or lower")
+
+        if tracer.summary:
+            input_string = list(input_string)
+            tracer.emit(('initial', self.states[self.start_state], [self.symbols[self.bottom_code]], 1, input_string, 0))
+        last = None
+        if tracer.errors and not isinstance(input_string, list):
+            last = ['$']
+            input_string = _recording(input_string, last)
+
+        codes = map(self.input_codes.get, input_string, repeat(self.unknown_code))
+        accepted, position, state, stack, steps = self.process_codes(codes)
+
+        if tracer.errors and not accepted and stack:
+            if last is not None:
+                current_input = last[0]
+            else:
+                current_input = input_string[position] if position < len(input_string) else '$'
+            tracer.emit(self._error_event(steps, state, stack, current_input))
+        if tracer.summary:
+            tracer.emit(('final', self.states[state], [self.symbols[code] for code in stack], len(stack),
+                         input_string, position))
+            tracer.emit(('result', accepted))
+
+        return accepted, tracer.lines
+
+    def _error_event(self, step, state, stack, current_input):
+        top = stack[-1]
+        stack_top = self.symbols[top]
+        if self.row_offsets[top] >= 0:
+            return ('no_table_entry', step, stack_top, current_input)
+        if top < self.end_code:
+            return ('unexpected', step, stack_top, current_input)
+        return ('no_transition', step, self.states[state], current_input, stack_top)
+
+    def process_codes(self, codes):
+        """Run on encoded input, any iterable of codes, pulled one at a time
+        and no further than the first error; returns (accepted, position,
+        state, stack, steps)."""
+        table = self.table
+        row_offsets = self.row_offsets
+        productions = self.reversed_productions
+        end_code = self.end_code
+        bottom_code = self.bottom_code
+
+        # past the end of the input the automaton sees '$'
+        codes = iter(codes)
+        position = 0
+        current = next(codes, end_code)
+        state = self.start_state
+        stack = [bottom_code]
+        pop = stack.pop
+        extend = stack.extend
+        steps = 0
+
+        while stack:
+            steps += 1
+            top = stack[-1]
+
+            # only a terminal on the stack can equal an input code
+            if top == current:
+                pop()
+                position += 1
+                current = next(codes, end_code)
+                continue
+
+            row = row_offsets[top]
+            if row >= 0:
+                production = table[row + current]
+                if production < 0:
+                    break
+                pop()
+                extend(productions[production])
+            elif top < end_code:
+                break
+            elif top == bottom_code and current == end_code:
+                state = self.final_state
+                break
+            else:
+                # generic moves: epsilon first, then on the current input
+                slot = self.epsilon_moves[state * len(self.symbols) + top]
+                consumes = False
+                if slot < 0 and top != bottom_code:
+                    slot = self.input_moves.get((state, current, top), self.NO_ENTRY)
+                    consumes = True
+                if slot < 0:
+                    break
+                state, pushed = self.transition_targets[slot]
+                pop()
+                extend(pushed)
+                if consumes:
+                    position += 1
+                    current = next(codes, end_code)
+
+        # stack == [Z0] with '$' ahead has already moved to the final state,
+        # so only an emptied stack needs a look past the current '$'
+        accepted = (state == self.final_state or state in self.accept_states or
+                    not stack and current == end_code and next(codes, None) is None)
+        return accepted, position, state, stack, steps
+
+
+def _recording(symbols, last):
+    # yields symbols, keeping the one read last in last[0] ('$' after the end)
+    for symbol in symbols:
+        last[0] = symbol
+        yield symbol
+    last[0] = '$'
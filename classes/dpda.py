@@ -1,4 +1,97 @@
+from classes.tree_traversal import iter_leaves
+
+TRACE_LEVELS = {'off': 0, 'errors': 1, 'summary': 2, 'full': 3}
+# event kind -> index of its (stack, depth) pair
+STACK_FIELDS = {'initial': 2, 'final': 2, 'start': 2, 'expand': 4, 'match': 3, 'match_input': 4, 'epsilon': 4}
+
+
+def format_trace_event(event):
+    # events carry a stack with its depth and the input with a position;
+    # the input is never modified, so it is only sliced here
+    kind = event[0]
+    if kind == 'initial':
+        _, state, stack, depth, remaining, position = event
+        return f"Initial: State={state}, Stack={stack[:depth]}, Input={remaining[position:]}"
+    if kind == 'final':
+        _, state, stack, depth, remaining, position = event
+        return f"Final: State={state}, Stack={stack[:depth]}, Remaining={remaining[position:]}"
+    if kind == 'result':
+        return f"Result: {'ACCEPTED' if event[1] else 'REJECTED'}"
+
+    step = event[1]
+    if kind == 'start':
+        _, _, stack, depth = event
+        return f"Step {step}: Initialize with start symbol, Stack={stack[:depth]}"
+    if kind == 'expand':
+        _, _, non_terminal, production, stack, depth = event
+        return (f"Step {step}: Expand {non_terminal} -> {' '.join(production) if production else 'ε'}, "
+                f"Stack={stack[:depth]}")
+    if kind == 'match':
+        _, _, consumed, stack, depth, remaining, position = event
+        return f"Step {step}: Match '{consumed}', Stack={stack[:depth]}, Remaining={remaining[position:]}"
+    if kind == 'match_input':
+        _, _, consumed, stack_top, stack, depth = event
+        return f"Step {step}: Match '{consumed}' with {stack_top}, Stack={stack[:depth]}"
+    if kind == 'epsilon':
+        _, _, stack_top, stack_action, stack, depth = event
+        return f"Step {step}: ε-transition on {stack_top} -> {stack_action}, Stack={stack[:depth]}"
+    if kind == 'no_table_entry':
+        _, _, non_terminal, current_input = event
+        return f"Step {step}: ERROR - No parse table entry for ({non_terminal}, {current_input})"
+    if kind == 'unexpected':
+        _, _, expected, found = event
+        return f"Step {step}: ERROR - Expected '{expected}' but found '{found}'"
+    if kind == 'no_transition':
+        _, _, state, current_input, stack_top = event
+        return f"Step {step}: ERROR - No transition available for state={state}, input='{current_input}', stack_top='{stack_top}'"
+    raise ValueError(f"Unknown trace event '{kind}'")
+
+
+def render_trace(events):
+    return [format_trace_event(event) for event in events]
+
+
+class TraceRecorder:
+    """Collects DPDA trace events up to a verbosity level.
+
+    'off' records nothing, 'errors' only the failing step, 'summary' adds the
+    initial/final configuration and 'full' every step. Events are formatted
+    into text lines unless a trace_sink callable is given, in which case the
+    raw event tuples are passed to it and can be rendered with
+    format_trace_event() or render_trace(), during or after the run.
+
+    Events refer to the input with a position instead of copying what is
+    left of it. The automaton's live stack is only formatted in place when
+    lines are recorded here; events handed to a sink get their own copy
+    of the stack, as it changes with every step.
+    """
+
+    def __init__(self, level='full', sink=None):
+        if level not in TRACE_LEVELS:
+            raise ValueError(f"Unknown trace level '{level}', expected one of {list(TRACE_LEVELS)}")
+        rank = TRACE_LEVELS[level]
+        self.level = level
+        self.errors = rank >= TRACE_LEVELS['errors']
+        self.summary = rank >= TRACE_LEVELS['summary']
+        self.steps = rank >= TRACE_LEVELS['full']
+        self.sink = sink
+        self.lines = []
+
+    def emit(self, event):
+        if self.sink is not None:
+            index = STACK_FIELDS.get(event[0])
+            if index is not None:
+                stack, depth = event[index], event[index + 1]
+                event = event[:index] + (stack[:depth], depth) + event[index + 2:]
+            self.sink(event)
+        else:
+            self.lines.append(format_trace_event(event))
+
+
 class ParseTreeNode:
+    # trees grow to several nodes per token, so nodes carry no __dict__;
+    # leaves share an empty children tuple until a first child is added
+    __slots__ = ('id', 'symbol', 'is_terminal', 'children', 'parent', 'production_rule', 'token')
     node_counter = 0
     
     def __init__(self, symbol, is_terminal=False, production_rule=None):
@@ -6,21 +99,32 @@ class ParseTreeNode:
         self.id = ParseTreeNode.node_counter
         self.symbol = symbol
         self.is_terminal = is_terminal
-        self.children = []
+        self.children = ()
         self.parent = None
         self.production_rule = production_rule
+        self.token = None  # lexer Token of a matched terminal, when parsed from tokens
+    
+    def __getattr__(self, name):
+        # only called when a slot is unset: a leaf matched from a token has
+        # no symbol of its own and reads it from the token's lexeme
+        if name == 'symbol' and self.token is not None:
+            return self.token.lexeme
+        raise AttributeError(f"'ParseTreeNode' object has no attribute '{name}'")
+    
+    def set_token(self, token):
+        """Attach the matched token; symbol is then its lexeme."""
+        self.token = token
+        del self.symbol
         
     def add_child(self, child):
         child.parent = self
-        self.children.append(child)
+        if self.children:
+            self.children.append(child)
+        else:
+            self.children = [child]
         
     def get_leaves(self):
-        if not self.children:
-            return [self]
-        leaves = []
-        for child in self.children:
-            leaves.extend(child.get_leaves())
-        return leaves
+        return list(iter_leaves(self))
     
     def __str__(self):
         return f"Node({self.id}: {self.symbol})"
@@ -73,7 +177,7 @@ class GeneralDPDA:
         
         self.transitions[key] = (to_state, new_stack_symbols)
     
-    def process_input(self, input_string):
+    def process_input(self, input_string, trace_level='full', trace_sink=None):
         if self.start_state is None:
             raise ValueError("Start state is not defined")
         if self.start_stack_symbol is None:
@@ -81,9 +185,13 @@ class GeneralDPDA:
         
         current_state = self.start_state
         remaining_input = list(input_string)
+        position = 0  # index of the next unread symbol
         stack = [self.start_stack_symbol]
         
-        trace = [f"Initial: State={current_state}, Stack={stack}, Input={remaining_input}"]
+        tracer = TraceRecorder(trace_level, trace_sink)
+        trace_steps = tracer.steps
+        if tracer.summary:
+            tracer.emit(('initial', current_state, stack, len(stack), remaining_input, 0))
         
         step_count = 0
         
@@ -94,7 +202,7 @@ class GeneralDPDA:
                 break
                 
             stack_top = stack[-1]
-            current_input = remaining_input[0] if remaining_input else '$'
+            current_input = remaining_input[position] if position < len(remaining_input) else '$'
             
             # Handle Z0 and transitions
             if stack_top == 'Z0':
@@ -106,10 +214,13 @@ class GeneralDPDA:
                     stack.pop()
                     for symbol in reversed(stack_action):
                         stack.append(symbol)
-                    trace.append(f"Step {step_count}: Initialize with start symbol, Stack={stack}")
+                    if trace_steps:
+                        tracer.emit(('start', step_count, stack, len(stack)))
                     current_state = next_state
                     continue
                 else:
+                    if tracer.errors:
+                        tracer.emit(('no_transition', step_count, current_state, current_input, stack_top))
                     break
             
             # epsilon transitions
@@ -118,7 +229,8 @@ class GeneralDPDA:
                 stack.pop()
                 for symbol in reversed(stack_action):
                     stack.append(symbol)
-                trace.append(f"Step {step_count}: ε-transition on {stack_top} -> {stack_action}, Stack={stack}")
+                if trace_steps:
+                    tracer.emit(('epsilon', step_count, stack_top, stack_action, stack, len(stack)))
                 current_state = next_state
                 continue
             
@@ -126,26 +238,30 @@ class GeneralDPDA:
             elif current_input and (current_state, current_input, stack_top) in self.transitions:
                 next_state, stack_action = self.transitions[(current_state, current_input, stack_top)]
                 stack.pop()
-                consumed = remaining_input.pop(0)
+                consumed = remaining_input[position]
+                position += 1
                 for symbol in reversed(stack_action):
                     stack.append(symbol)
-                trace.append(f"Step {step_count}: Match '{consumed}' with {stack_top}, Stack={stack}")
+                if trace_steps:
+                    tracer.emit(('match_input', step_count, consumed, stack_top, stack, len(stack)))
                 current_state = next_state
                 continue
             
             else:
-                trace.append(f"Step {step_count}: ERROR - No transition available for state={current_state}, input='{current_input}', stack_top='{stack_top}'")
+                if tracer.errors:
+                    tracer.emit(('no_transition', step_count, current_state, current_input, stack_top))
                 break
         
         # Accept by final state or empty stack
         is_accepted = (current_state == 'q2' or current_state in self.accept_states or 
-                      (not remaining_input or remaining_input == ['$']) and 
+                      (position >= len(remaining_input) or remaining_input[position:] == ['$']) and 
                       (not stack or stack == ['Z0']))
         
-        trace.append(f"Final: State={current_state}, Stack={stack}, Remaining={remaining_input}")
-        trace.append(f"Result: {'ACCEPTED' if is_accepted else 'REJECTED'}")
+        if tracer.summary:
+            tracer.emit(('final', current_state, stack, len(stack), remaining_input, position))
+            tracer.emit(('result', is_accepted))
         
-        return is_accepted, trace
+        return is_accepted, tracer.lines
 
 
 class DPDA:
@@ -196,7 +312,7 @@ class DPDA:
         
         self.transitions[key] = (to_state, new_stack_symbols)
     
-    def process_input(self, input_string):
+    def process_input(self, input_string, trace_level='full', trace_sink=None):
         if self.start_state is None:
             raise ValueError("Start state is not defined")
         if self.start_stack_symbol is None:
@@ -204,9 +320,13 @@ class DPDA:
         
         current_state = self.start_state
         remaining_input = list(input_string)
+        position = 0  # index of the next unread symbol
         stack = [self.start_stack_symbol]
         
-        trace = [f"Initial: State={current_state}, Stack={stack}, Input={remaining_input}"]
+        tracer = TraceRecorder(trace_level, trace_sink)
+        trace_steps = tracer.steps
+        if tracer.summary:
+            tracer.emit(('initial', current_state, stack, len(stack), remaining_input, 0))
         
         step_count = 0
         
@@ -217,7 +337,7 @@ class DPDA:
                 break
                 
             stack_top = stack[-1]
-            current_input = remaining_input[0] if remaining_input else '$'
+            current_input = remaining_input[position] if position < len(remaining_input) else '$'
             
             # ll1 parse
             if self.parse_table and self.grammar and stack_top in self.grammar.non_terminals:
@@ -225,27 +345,29 @@ class DPDA:
                     production = self.parse_table[(stack_top, current_input)]
                     stack.pop()
                     
-                    if production:
-                        for symbol in reversed(production):
-                            stack.append(symbol)
-                        trace.append(f"Step {step_count}: Expand {stack_top} -> {' '.join(production)}, Stack={stack}")
-                    else:
-                        trace.append(f"Step {step_count}: Expand {stack_top} -> ε, Stack={stack}")
+                    for symbol in reversed(production):
+                        stack.append(symbol)
+                    if trace_steps:
+                        tracer.emit(('expand', step_count, stack_top, production, stack, len(stack)))
                     continue
                 else:
-                    trace.append(f"Step {step_count}: ERROR - No parse table entry for ({stack_top}, {current_input})")
+                    if tracer.errors:
+                        tracer.emit(('no_table_entry', step_count, stack_top, current_input))
                     break
             
             # terminal matching with input
             elif (self.grammar and stack_top in self.grammar.terminals) or stack_top in self.input_alphabet:
                 if current_input == stack_top:
                     stack.pop()
-                    if remaining_input:
-                        consumed = remaining_input.pop(0)
-                        trace.append(f"Step {step_count}: Match '{consumed}', Stack={stack}, Remaining={remaining_input}")
+                    if position < len(remaining_input):
+                        consumed = remaining_input[position]
+                        position += 1
+                        if trace_steps:
+                            tracer.emit(('match', step_count, consumed, stack, len(stack), remaining_input, position))
                     continue
                 else:
-                    trace.append(f"Step {step_count}: ERROR - Expected '{stack_top}' but found '{current_input}'")
+                    if tracer.errors:
+                        tracer.emit(('unexpected', step_count, stack_top, current_input))
                     break
             
             #(Z0 and transitions)
@@ -258,10 +380,13 @@ class DPDA:
                     stack.pop()
                     for symbol in reversed(stack_action):
                         stack.append(symbol)
-                    trace.append(f"Step {step_count}: Initialize with start symbol, Stack={stack}")
+                    if trace_steps:
+                        tracer.emit(('start', step_count, stack, len(stack)))
                     current_state = next_state
                     continue
                 else:
+                    if tracer.errors:
+                        tracer.emit(('no_transition', step_count, current_state, current_input, stack_top))
                     break
             
             # epsilon transitions
@@ -270,7 +395,8 @@ class DPDA:
                 stack.pop()
                 for symbol in reversed(stack_action):
                     stack.append(symbol)
-                trace.append(f"Step {step_count}: ε-transition on {stack_top} -> {stack_action}, Stack={stack}")
+                if trace_steps:
+                    tracer.emit(('epsilon', step_count, stack_top, stack_action, stack, len(stack)))
                 current_state = next_state
                 continue
             
@@ -278,27 +404,39 @@ class DPDA:
             elif current_input and (current_state, current_input, stack_top) in self.transitions:
                 next_state, stack_action = self.transitions[(current_state, current_input, stack_top)]
                 stack.pop()
-                consumed = remaining_input.pop(0)
+                consumed = remaining_input[position]
+                position += 1
                 for symbol in reversed(stack_action):
                     stack.append(symbol)
-                trace.append(f"Step {step_count}: Match '{consumed}' with {stack_top}, Stack={stack}")
+                if trace_steps:
+                    tracer.emit(('match_input', step_count, consumed, stack_top, stack, len(stack)))
                 current_state = next_state
                 continue
             
             else:
-                trace.append(f"Step {step_count}: ERROR - No transition available for state={current_state}, input='{current_input}', stack_top='{stack_top}'")
+                if tracer.errors:
+                    tracer.emit(('no_transition', step_count, current_state, current_input, stack_top))
                 break
         
         is_accepted = (current_state == 'q2' or current_state in self.accept_states or 
-                      (not remaining_input or remaining_input == ['$']) and 
+                      (position >= len(remaining_input) or remaining_input[position:] == ['$']) and 
                       (not stack or stack == ['Z0']))
         
-        trace.append(f"Final: State={current_state}, Stack={stack}, Remaining={remaining_input}")
-        trace.append(f"Result: {'ACCEPTED' if is_accepted else 'REJECTED'}")
+        if tracer.summary:
+            tracer.emit(('final', current_state, stack, len(stack), remaining_input, position))
+            tracer.emit(('result', is_accepted))
         
-        return is_accepted, trace
+        return is_accepted, tracer.lines
 
-    def process_input_with_tree(self, input_string):
+    def process_input_with_tree(self, input_string, lexemes=None, trace_level='full', trace_sink=None, tokens=None):
+        """Run the LL(1) parse and build its parse tree.
+
+        lexemes, when given, is aligned with input_string and supplies the text
+        stored in each matched terminal node; otherwise the per-type lists in
+        current_lexeme_values are used in order. tokens (lexer Token objects,
+        aligned the same way) take precedence over lexemes and are also kept
+        on the matched nodes, so their source positions stay available.
+        """
         if self.start_state is None:
             raise ValueError("Start state is not defined")
         if self.start_stack_symbol is None:
@@ -306,13 +444,22 @@ class DPDA:
         
         ParseTreeNode.node_counter = 0
         self.parse_tree = None
-        self.node_stack = []
         
         current_state = self.start_state
         remaining_input = list(input_string)
+        position = 0  # index of the next unread symbol
         stack = [self.start_stack_symbol]
+        # node_stack[i] is the tree node for stack[i] (None for Z0)
+        self.node_stack = node_stack = [None]
+        
+        lexeme_values = getattr(self, 'current_lexeme_values', None) if lexemes is None and tokens is None else None
+        lexeme_cursors = {}
+        production_rules = {}
         
-        trace = [f"Initial: State={current_state}, Stack={stack}, Input={remaining_input}"]
+        tracer = TraceRecorder(trace_level, trace_sink)
+        trace_steps = tracer.steps
+        if tracer.summary:
+            tracer.emit(('initial', current_state, stack, len(stack), remaining_input, 0))
         
         step_count = 0
         
@@ -323,24 +470,28 @@ class DPDA:
                 break
                 
             stack_top = stack[-1]
-            current_input = remaining_input[0] if remaining_input else '$'
+            current_input = remaining_input[position] if position < len(remaining_input) else '$'
             
             if self.parse_tree is None and stack_top == 'Z0':
                 if (current_state, '', stack_top) in self.transitions:
                     next_state, stack_action = self.transitions[(current_state, '', stack_top)]
                     stack.pop()
+                    node_stack.pop()
                     
                     start_symbol = stack_action[0] if stack_action else None
                     if start_symbol and start_symbol in self.grammar.non_terminals:
                         self.parse_tree = ParseTreeNode(start_symbol)
-                        self.node_stack = [self.parse_tree]
                     
-                    for symbol in reversed(stack_action):
-                        stack.append(symbol)
-                    trace.append(f"Step {step_count}: Initialize with start symbol, Stack={stack}")
+                    for index in range(len(stack_action) - 1, -1, -1):
+                        stack.append(stack_action[index])
+                        node_stack.append(self.parse_tree if index == 0 else None)
+                    if trace_steps:
+                        tracer.emit(('start', step_count, stack, len(stack)))
                     current_state = next_state
                     continue
                 else:
+                    if tracer.errors:
+                        tracer.emit(('no_transition', step_count, current_state, current_input, stack_top))
                     break
             
             # parse table entries for non-terminals
@@ -348,58 +499,68 @@ class DPDA:
                 if (stack_top, current_input) in self.parse_table:
                     production = self.parse_table[(stack_top, current_input)]
                     stack.pop()
+                    current_node = node_stack.pop()
                     
-                    # find the corresponding node in node_stack
-                    current_node = None
-                    for i in range(len(self.node_stack) - 1, -1, -1):
-                        if self.node_stack[i].symbol == stack_top:
-                            current_node = self.node_stack.pop(i)
-                            break
+                    # one shared rule string per table cell instead of one per node
+                    production_rule = production_rules.get((stack_top, current_input))
+                    if production_rule is None:
+                        production_rule = f"{stack_top} -> {' '.join(production) if production else 'ε'}"
+                        production_rules[(stack_top, current_input)] = production_rule
+                    current_node.production_rule = production_rule
                     
-                    if current_node:
-                        current_node.production_rule = f"{stack_top} -> {' '.join(production) if production else 'ε'}"
-                        
-                        # children for the current node     
-                        if production:
-                            for symbol in production:
-                                child_node = ParseTreeNode(
-                                    symbol, 
-                                    is_terminal=(symbol in self.grammar.terminals),
-                                    production_rule=None
-                                )
-                                current_node.add_child(child_node)
-                                
-                                if symbol in self.grammar.non_terminals:
-                                    self.node_stack.append(child_node)
-                            
-                            for symbol in reversed(production):
-                                stack.append(symbol)
-                        else:
-                            # epsilon production
-                            epsilon_child = ParseTreeNode('ε', is_terminal=True)
-                            current_node.add_child(epsilon_child)
+                    # children for the current node
+                    if production:
+                        children = [ParseTreeNode(symbol, is_terminal=(symbol in self.grammar.terminals))
+                                    for symbol in production]
+                        for child_node in children:
+                            child_node.parent = current_node
+                        current_node.children = children
                         
-                        trace.append(f"Step {step_count}: Expand {stack_top} -> {' '.join(production) if production else 'ε'}, Stack={stack}")
+                        for index in range(len(production) - 1, -1, -1):
+                            stack.append(production[index])
+                            node_stack.append(children[index])
+                    else:
+                        # epsilon production
+                        epsilon_child = ParseTreeNode('ε', is_terminal=True)
+                        current_node.add_child(epsilon_child)
+                    
+                    if trace_steps:
+                        tracer.emit(('expand', step_count, stack_top, production, stack, len(stack)))
                     continue
                 else:
-                    trace.append(f"Step {step_count}: ERROR - No parse table entry for ({stack_top}, {current_input})")
+                    if tracer.errors:
+                        tracer.emit(('no_table_entry', step_count, stack_top, current_input))
                     break
             
             # terminal matching
             elif (self.grammar and stack_top in self.grammar.terminals) or stack_top in self.input_alphabet:
                 if current_input == stack_top:
                     stack.pop()
-                    if remaining_input:
-                        consumed = remaining_input.pop(0)
+                    terminal_node = node_stack.pop()
+                    if position < len(remaining_input):
+                        consumed = remaining_input[position]
                         
-                        if hasattr(self, 'current_lexeme_values') and stack_top in self.current_lexeme_values:
-                            actual_value = self.current_lexeme_values[stack_top].pop(0) if self.current_lexeme_values[stack_top] else consumed
-                            self._update_terminal_node_with_lexeme(stack_top, actual_value)
+                        # the matched node is at hand, so its lexeme is attached directly
+                        if terminal_node is not None:
+                            if tokens is not None:
+                                if position < len(tokens):
+                                    terminal_node.set_token(tokens[position])
+                            elif lexemes is not None:
+                                if position < len(lexemes):
+                                    terminal_node.symbol = lexemes[position]
+                            elif lexeme_values and stack_top in lexeme_values:
+                                values = lexeme_values[stack_top]
+                                cursor = lexeme_cursors.get(stack_top, 0)
+                                terminal_node.symbol = values[cursor] if cursor < len(values) else consumed
+                                lexeme_cursors[stack_top] = cursor + 1
                         
-                        trace.append(f"Step {step_count}: Match '{consumed}', Stack={stack}, Remaining={remaining_input}")
+                        position += 1
+                        if trace_steps:
+                            tracer.emit(('match', step_count, consumed, stack, len(stack), remaining_input, position))
                     continue
                 else:
-                    trace.append(f"Step {step_count}: ERROR - Expected '{stack_top}' but found '{current_input}'")
+                    if tracer.errors:
+                        tracer.emit(('unexpected', step_count, stack_top, current_input))
                     break
             
             elif stack_top == 'Z0':
@@ -407,30 +568,20 @@ class DPDA:
                     current_state = 'q2'
                     break
                 else:
+                    if tracer.errors:
+                        tracer.emit(('no_transition', step_count, current_state, current_input, stack_top))
                     break
             else:
-                trace.append(f"Step {step_count}: ERROR - No transition available")
+                if tracer.errors:
+                    tracer.emit(('no_transition', step_count, current_state, current_input, stack_top))
                 break
         
         is_accepted = (current_state == 'q2' or current_state in self.accept_states or 
-                      (not remaining_input or remaining_input == ['$']) and 
+                      (position >= len(remaining_input) or remaining_input[position:] == ['$']) and 
                       (not stack or stack == ['Z0']))
         
-        trace.append(f"Final: State={current_state}, Stack={stack}, Remaining={remaining_input}")
-        trace.append(f"Result: {'ACCEPTED' if is_accepted else 'REJECTED'}")
-        
-        return is_accepted, trace, self.parse_tree
-    
-    def _update_terminal_node_with_lexeme(self, terminal_type, actual_value):
-        """Find and update terminal nodes with actual lexeme values"""
-        def update_node(node):
-            if node.is_terminal and node.symbol == terminal_type:
-                node.symbol = actual_value
-                return True
-            for child in node.children:
-                if update_node(child):
-                    return True
-            return False
+        if tracer.summary:
+            tracer.emit(('final', current_state, stack, len(stack), remaining_input, position))
+            tracer.emit(('result', is_accepted))
         
-        if self.parse_tree:
-            update_node(self.parse_tree)
+        return is_accepted, tracer.lines, self.parse_tree
@@ -73,6 +73,47 @@ class Grammar:
                 production_list.append(prod.split())
         self.productions[left_side] = production_list
     
+    def add_production(self, non_terminal, production):
+        production = self._normalize_production(non_terminal, production)
+        productions = self.productions.setdefault(non_terminal, [])
+        if production in productions:
+            raise ValueError(f"{non_terminal} already has production {self._format_production(production)}")
+        productions.append(production)
+    
+    def remove_production(self, non_terminal, production):
+        production = self._normalize_production(non_terminal, production)
+        productions = self.productions.get(non_terminal, [])
+        if production not in productions:
+            raise ValueError(f"{non_terminal} has no production {self._format_production(production)}")
+        productions.remove(production)
+    
+    def replace_production(self, non_terminal, old_production, new_production):
+        old_production = self._normalize_production(non_terminal, old_production)
+        new_production = self._normalize_production(non_terminal, new_production)
+        productions = self.productions.get(non_terminal, [])
+        if old_production not in productions:
+            raise ValueError(f"{non_terminal} has no production {self._format_production(old_production)}")
+        if new_production != old_production and new_production in productions:
+            raise ValueError(f"{non_terminal} already has production {self._format_production(new_production)}")
+        productions[productions.index(old_production)] = new_production
+    
+    def _normalize_production(self, non_terminal, production):
+        # accepts 'A b C', ['A', 'b', 'C'], 'eps' or '' like the grammar file does
+        if non_terminal not in self.non_terminals:
+            raise ValueError(f"Unknown non-terminal '{non_terminal}'")
+        if isinstance(production, str):
+            production = production.split()
+        production = list(production)
+        if not production or production == ['eps']:
+            return ''
+        for symbol in production:
+            if symbol not in self.non_terminals and symbol not in self.terminals:
+                raise ValueError(f"Unknown symbol '{symbol}' in production of {non_terminal}")
+        return production
+    
+    def _format_production(self, production):
+        return ' '.join(production) if production else 'eps'
+    
     def get_productions(self, non_terminal):
         return self.productions.get(non_terminal, [])
     
@@ -0,0 +1,115 @@
+import glob
+import hashlib
+import marshal
+import mmap
+import os
+import sys
+
+from classes.grammar import Grammar
+from classes.ll1_parser import LL1Parser
+from classes.ll1_to_dpda import LL1ToDPDA
+from classes.compiled_dpda import CompiledDPDA
+
+
+class GrammarCache:
+    """On-disk cache of everything derived from a grammar file.
+
+    Entries are keyed by a SHA-256 of the grammar file's bytes, so editing the
+    grammar simply misses the cache; the stale entry for the same grammar is
+    removed when the new one is written. Entries hold the parsed grammar,
+    FIRST/FOLLOW sets, the parse table and the CompiledDPDA tables as marshal
+    data (plain containers only), which is read straight from an mmap.
+    """
+    FORMAT_VERSION = 1
+    MAGIC = b'LL1C'
+    SUFFIX = '.ll1c'
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self.last_hit = False
+
+    def load(self, grammar_file):
+        """Returns (grammar, ll1_parser, compiled_dpda), building them on a miss."""
+        with open(grammar_file, 'rb') as file:
+            digest = hashlib.sha256(file.read()).hexdigest()
+        path = self.cache_path(grammar_file, digest)
+
+        payload = self._read(path)
+        self.last_hit = payload is not None
+        if payload is not None:
+            return self._restore(payload)
+
+        grammar = Grammar()
+        if not grammar.read_from_file(grammar_file):
+            raise ValueError(f"Failed to read grammar from {grammar_file}")
+        ll1_parser = LL1Parser(grammar)
+        compiled_dpda = CompiledDPDA(LL1ToDPDA(ll1_parser).convert_to_dpda())
+        self._write(path, grammar_file, self._snapshot(grammar, ll1_parser, compiled_dpda))
+        return grammar, ll1_parser, compiled_dpda
+
+    def cache_path(self, grammar_file, digest):
+        directory = self.cache_dir or os.path.join(os.path.dirname(os.path.abspath(grammar_file)), '.ll1_cache')
+        return os.path.join(directory, f'{self._stem(grammar_file)}.{digest[:32]}{self.SUFFIX}')
+
+    def _stem(self, grammar_file):
+        return os.path.splitext(os.path.basename(grammar_file))[0]
+
+    def _header(self):
+        # marshal data is only portable between identical interpreter versions
+        version = f'{self.FORMAT_VERSION}:{sys.implementation.cache_tag}'.encode()
+        return self.MAGIC + len(version).to_bytes(1, 'little') + version
+
+    def _read(self, path):
+        try:
+            with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                header = self._header()
+                if data[:len(header)] != header:
+                    return None
+                body = memoryview(data)[len(header):]
+                try:
+                    return marshal.loads(body)
+                finally:
+                    body.release()
+        except (OSError, ValueError, EOFError, TypeError):
+            return None
+
+    def _write(self, path, grammar_file, payload):
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            for stale in glob.glob(os.path.join(glob.escape(directory), f'{glob.escape(self._stem(grammar_file))}.*{self.SUFFIX}')):
+                if stale != path:
+                    os.remove(stale)
+            # write then rename so a concurrent reader never sees a partial entry
+            temporary = f'{path}.{os.getpid()}.tmp'
+            with open(temporary, 'wb') as file:
+                file.write(self._header())
+                marshal.dump(payload, file)
+            os.replace(temporary, path)
+        except OSError as e:
+            print(f"Could not write grammar cache {path}: {e}")
+
+    def _snapshot(self, grammar, ll1_parser, compiled_dpda):
+        return {
+            'start_symbol': grammar.start_symbol,
+            'non_terminals': grammar.non_terminals,
+            'terminals': grammar.terminals,
+            'productions': grammar.productions,
+            'terminal_patterns': grammar.terminal_patterns,
+            'first_sets': ll1_parser.first_sets,
+            'follow_sets': ll1_parser.follow_sets,
+            'parse_table': ll1_parser.parse_table,
+            'compiled_dpda': compiled_dpda.export_tables(),
+        }
+
+    def _restore(self, payload):
+        grammar = Grammar()
+        grammar.start_symbol = payload['start_symbol']
+        grammar.non_terminals = set(payload['non_terminals'])
+        grammar.terminals = set(payload['terminals'])
+        grammar.productions = payload['productions']
+        grammar.terminal_patterns = payload['terminal_patterns']
+        ll1_parser = LL1Parser.from_tables(grammar, payload['first_sets'], payload['follow_sets'],
+                                           payload['parse_table'])
+        compiled_dpda = CompiledDPDA.from_tables(payload['compiled_dpda'])
+        return grammar, ll1_parser, compiled_dpda
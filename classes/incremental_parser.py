@@ -0,0 +1,459 @@
+from classes.dpda import ParseTreeNode
+from classes.lexer import Lexer
+
+
+class IncrementalParser:
+    """Keeps a parse tree in step with a source text that is edited in place.
+
+    After a full parse every node knows how many tokens it covers and its
+    width in characters (its tokens plus the whitespace in front of each).
+    An edit is relexed from the start of its line until the new tokens fall
+    back in step with the old ones. Tokens whose type did not change only get
+    their lexeme and width patched. Otherwise the smallest non-terminal that
+    starts before the changed tokens and ends after them is parsed again, and
+    every old subtree whose input, lookahead included, lies wholly before or
+    wholly after the changed tokens is grafted instead of rebuilt: an LL(1)
+    derivation depends on nothing but the token types it reads.
+
+    An edit costs time in proportion to its size plus the depth of the tree
+    where it lands; note that right-recursive lists (Statements ->
+    Statement Statements) make that depth grow with the list.
+
+    The tree is the one DPDA.process_input_with_tree builds; rebuilt nodes
+    get new ids, node_counter is never reset. A syntax error falls back to a
+    full parse, and so does the next edit after it.
+    """
+
+    def __init__(self, dpda, lexer=None):
+        if dpda.grammar is None:
+            raise ValueError("DPDA has no grammar attached; convert it with LL1ToDPDA first")
+        self.dpda = dpda
+        self.grammar = dpda.grammar
+        self.parse_table = dpda.parse_table
+        self.lexer = lexer or Lexer(self.grammar)
+        self.text = ''
+        self.tree = None
+        self.accepted = False
+        self.lexical_errors = 0
+        self.token_counts = {}  # node -> tokens covered
+        self.widths = {}  # node -> characters covered, leading whitespace included
+        self.last_reparsed = None  # root of the subtree rebuilt by the last update
+        self._rule_symbols = {}
+        self._production_rules = {}
+
+    def parse(self, text):
+        """Full parse of text; returns (accepted, tree)."""
+        spans = list(self.lexer.iter_spans(text))
+        tokens = [span for span in spans if span[0] != 'ERROR']
+        accepted, _, tree = self.dpda.process_input_with_tree(
+            [terminal for terminal, _, _ in tokens] + ['$'],
+            lexemes=[text[start:end] for _, start, end in tokens], trace_level='off')
+
+        self.text = text
+        self.tree = tree
+        self.accepted = accepted and tree is not None
+        self.lexical_errors = len(spans) - len(tokens)
+        self.token_counts = {}
+        self.widths = {}
+        if self.accepted:
+            self._measure(tree, tokens)
+        self.last_reparsed = tree
+        return self.accepted, self.tree
+
+    def edit(self, start, end, new_text):
+        """Replace text[start:end] with new_text; returns (accepted, tree)."""
+        if not 0 <= start <= end <= len(self.text):
+            raise ValueError(f"Edit range {start}:{end} is outside the text (length {len(self.text)})")
+        old_text = self.text
+        text = old_text[:start] + new_text + old_text[end:]
+        if not self.accepted or not self.token_counts[self.tree]:
+            return self.parse(text)
+        char_delta = len(new_text) - (end - start)
+
+        # relex from the start of the edited line; a token starting at the same
+        # place after the edit as before it is followed by the same tokens
+        line_start = old_text.rfind('\n', 0, start) + 1
+        first_index, previous_end, pending = self._locate(line_start)
+        old_leaves = self._iter_leaves(pending, previous_end)
+        old_next = next(old_leaves, None)
+        old_window = []  # (leaf, type, start, end) in old coordinates
+        new_window = []  # (type, start, end)
+        new_errors = 0
+        resync = None
+        for terminal, token_start, token_end in self.lexer.iter_spans(text, line_start):
+            while old_next is not None and (old_next[2] < end or old_next[2] + char_delta < token_start):
+                old_window.append(old_next)
+                old_next = next(old_leaves, None)
+            if (old_next is not None and terminal != 'ERROR' and old_next[2] >= end and
+                    old_next[2] + char_delta == token_start):
+                resync = old_next
+                break
+            if terminal == 'ERROR':
+                new_errors += 1
+            else:
+                new_window.append((terminal, token_start, token_end))
+        else:
+            if old_next is not None:
+                old_window.append(old_next)
+                old_window.extend(old_leaves)
+
+        old_stop = resync[2] if resync is not None else len(old_text)
+        old_errors = sum(1 for terminal, _, _ in self.lexer.iter_spans(old_text[line_start:old_stop])
+                         if terminal == 'ERROR')
+        self.text = text
+        self.lexical_errors += new_errors - old_errors
+
+        # widths follow the new token chain
+        new_widths = []
+        for _, token_start, token_end in new_window:
+            new_widths.append(token_end - previous_end)
+            previous_end = token_end
+
+        old_types = [leaf_type for _, leaf_type, _, _ in old_window]
+        new_types = [terminal for terminal, _, _ in new_window]
+        limit = min(len(old_types), len(new_types))
+        prefix = 0
+        while prefix < limit and old_types[prefix] == new_types[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and old_types[-1 - suffix] == new_types[-1 - suffix]:
+            suffix += 1
+
+        # tokens that kept their type stay in the tree with the new lexeme
+        retained = list(zip(range(prefix), range(prefix)))
+        retained += zip(range(len(old_window) - suffix, len(old_window)),
+                        range(len(new_window) - suffix, len(new_window)))
+        for old_index, new_index in retained:
+            leaf = old_window[old_index][0]
+            _, token_start, token_end = new_window[new_index]
+            leaf.symbol = text[token_start:token_end]
+            self._resize(leaf, new_widths[new_index])
+        if resync is not None:
+            self._resize(resync[0], resync[3] + char_delta - previous_end)
+
+        changed_start = first_index + prefix
+        changed_end = first_index + len(old_window) - suffix
+        replaced = slice(prefix, len(new_window) - suffix)
+        replacement = [(terminal, text[token_start:token_end], width)
+                       for (terminal, token_start, token_end), width in zip(new_window[replaced], new_widths[replaced])]
+        if changed_start == changed_end and not replacement:
+            self.last_reparsed = None
+            return self.accepted, self.tree
+
+        # the first changed token, or the one in front of the edit at the very end
+        if prefix < len(old_window):
+            anchor, anchor_index = old_window[prefix][0], changed_start
+        elif resync is not None:
+            anchor, anchor_index = resync[0], changed_start
+        else:
+            anchor, anchor_index = self._last_leaf(), self.token_counts[self.tree] - 1
+        if not self._reparse(anchor, anchor_index, changed_start, changed_end, replacement):
+            return self.parse(text)
+        return self.accepted, self.tree
+
+    def _measure(self, tree, tokens):
+        order = []
+        pending = [tree]
+        while pending:
+            node = pending.pop()
+            order.append(node)
+            pending.extend(reversed(node.children))
+
+        previous_end = 0
+        token_index = 0
+        for node in order:
+            if node.is_terminal:
+                if self._is_epsilon(node):
+                    self.token_counts[node] = 0
+                    self.widths[node] = 0
+                else:
+                    token_end = tokens[token_index][2]
+                    self.token_counts[node] = 1
+                    self.widths[node] = token_end - previous_end
+                    previous_end = token_end
+                    token_index += 1
+        for node in reversed(order):
+            if not node.is_terminal:
+                self._measure_node(node)
+
+    def _measure_node(self, node):
+        self.token_counts[node] = sum(self.token_counts[child] for child in node.children)
+        self.widths[node] = sum(self.widths[child] for child in node.children)
+
+    def _production_of(self, node):
+        rule = node.production_rule
+        symbols = self._rule_symbols.get(rule)
+        if symbols is None:
+            right_side = rule.split(' -> ', 1)[1]
+            symbols = [] if right_side == 'ε' else right_side.split()
+            self._rule_symbols[rule] = symbols
+        return symbols
+
+    def _is_epsilon(self, leaf):
+        return leaf.parent is not None and not self._production_of(leaf.parent)
+
+    def _resize(self, leaf, width):
+        delta = width - self.widths[leaf]
+        if delta:
+            node = leaf
+            while node is not None:
+                self.widths[node] += delta
+                node = node.parent
+
+    def _locate(self, offset):
+        # Index of the first token ending after offset, the end of the token
+        # before it and the walk state _iter_leaves resumes from there.
+        token_counts = self.token_counts
+        widths = self.widths
+        node = self.tree
+        token_start = 0
+        char_start = 0
+        pending = []
+        while not node.is_terminal:
+            position = 0
+            for child in node.children:
+                width = widths[child]
+                if char_start + width > offset and token_counts[child]:
+                    pending.append((node, position + 1))
+                    node = child
+                    break
+                token_start += token_counts[child]
+                char_start += width
+                position += 1
+            else:
+                return token_start, char_start, []
+        parent, position = pending[-1]
+        pending[-1] = (parent, position - 1)
+        return token_start, char_start, pending
+
+    def _iter_leaves(self, pending, char_end):
+        # (leaf, type, start, end) of every token from the walk state on, in old coordinates
+        while pending:
+            parent, position = pending.pop()
+            if position >= len(parent.children):
+                continue
+            pending.append((parent, position + 1))
+            child = parent.children[position]
+            if not self.token_counts[child]:
+                continue
+            if child.is_terminal:
+                char_end += self.widths[child]
+                yield child, self._production_of(parent)[position], char_end - len(child.symbol), char_end
+            else:
+                pending.append((child, 0))
+
+    def _last_leaf(self):
+        node = self.tree
+        while not node.is_terminal:
+            node = next(child for child in reversed(node.children) if self.token_counts[child])
+        return node
+
+    def _next_token_type(self, node):
+        # type of the token right after node's subtree, '$' at the end of the input
+        while node.parent is not None:
+            parent = node.parent
+            position = parent.children.index(node) + 1
+            while position < len(parent.children):
+                sibling = parent.children[position]
+                if self.token_counts[sibling]:
+                    while not sibling.is_terminal:
+                        parent = sibling
+                        position = next(index for index, child in enumerate(sibling.children)
+                                        if self.token_counts[child])
+                        sibling = sibling.children[position]
+                    return self._production_of(parent)[position]
+                position += 1
+            node = parent
+        return '$'
+
+    def _path(self, index, node, token_start):
+        # [(node, position in parent, first token)] from node down to the leaf of token index
+        path = [(node, -1, token_start)]
+        while not node.is_terminal:
+            for position, child in enumerate(node.children):
+                count = self.token_counts[child]
+                if index < token_start + count:
+                    node = child
+                    path.append((node, position, token_start))
+                    break
+                token_start += count
+        return path
+
+    def _reparse(self, anchor, anchor_index, changed_start, changed_end, replacement):
+        # try the non-terminals above anchor from the innermost out
+        node = anchor
+        node_start = anchor_index
+        while node.parent is not None:
+            parent = node.parent
+            for sibling in parent.children:
+                if sibling is node:
+                    break
+                node_start -= self.token_counts[sibling]
+            node = parent
+            if node_start + self.token_counts[node] < changed_end:
+                continue
+            if node_start >= changed_start and node.parent is not None:
+                continue
+            result = self._parse_node(node, node_start, changed_start, changed_end, replacement)
+            if result is not None:
+                self._commit(node, *result)
+                return True
+        return False
+
+    def _parse_node(self, old_node, node_start, changed_start, changed_end, replacement):
+        # Parses old_node's symbol over the edited tokens. Returns (new node,
+        # created nodes, grafted (old node, new parent) pairs, new leaf widths)
+        # or None unless the parse ends exactly where old_node did, shifted by
+        # the edit. Nothing in the old tree is touched until _commit.
+        token_delta = len(replacement) - (changed_end - changed_start)
+        replacement_end = changed_start + len(replacement)
+        old_end = node_start + self.token_counts[old_node]
+        node_end = old_end + token_delta
+        cached_path = [None, None, None]  # index, its path, type after old_node
+
+        def old_path(old_index):
+            if cached_path[0] != old_index:
+                cached_path[1] = self._path(old_index, old_node, node_start)
+                cached_path[0] = old_index
+            return cached_path[1]
+
+        def old_index_at(index):
+            return index if index < changed_start else index - token_delta
+
+        def token_type(index):
+            if changed_start <= index < replacement_end:
+                return replacement[index - changed_start][0]
+            old_index = old_index_at(index)
+            if old_index >= old_end:
+                if cached_path[2] is None:
+                    cached_path[2] = self._next_token_type(old_node)
+                return cached_path[2]
+            leaf, position, _ = old_path(old_index)[-1]
+            return self._production_of(leaf.parent)[position]
+
+        def reusable(symbol, index):
+            if changed_start <= index < replacement_end or index >= node_end:
+                return None
+            old_index = old_index_at(index)
+            for node, _, start in old_path(old_index)[1:]:
+                if start != old_index or node.is_terminal or node.symbol != symbol:
+                    continue
+                if index >= replacement_end:
+                    return node
+                end = start + self.token_counts[node]
+                if end < changed_start or (end == changed_start and self._ends_with_token(node)):
+                    return node
+                return None
+            return None
+
+        created = []
+        grafted = []
+        leaf_widths = {}
+        new_node = None
+        stack = [(old_node.symbol, None, 0)]
+        index = node_start
+
+        while stack:
+            symbol, parent, slot = stack.pop()
+            if symbol in self.grammar.non_terminals:
+                if parent is not None:
+                    old = reusable(symbol, index)
+                    if old is not None:
+                        index += self.token_counts[old]
+                        if index > node_end:
+                            return None
+                        parent.children[slot] = old
+                        grafted.append((old, parent))
+                        continue
+
+                lookahead = token_type(index)
+                production = self.parse_table.get((symbol, lookahead))
+                if production is None:
+                    return None
+                node = ParseTreeNode(symbol)
+                node.production_rule = self._rule(symbol, lookahead, production)
+                created.append(node)
+                if parent is None:
+                    new_node = node
+                else:
+                    node.parent = parent
+                    parent.children[slot] = node
+                if production:
+                    node.children = [None] * len(production)
+                    for position in range(len(production) - 1, -1, -1):
+                        stack.append((production[position], node, position))
+                else:
+                    epsilon_child = ParseTreeNode('ε', is_terminal=True)
+                    node.add_child(epsilon_child)
+                    created.append(epsilon_child)
+            else:
+                if index >= node_end or token_type(index) != symbol:
+                    return None
+                if changed_start <= index < replacement_end:
+                    _, lexeme, width = replacement[index - changed_start]
+                    leaf = ParseTreeNode(lexeme, is_terminal=True)
+                    leaf.parent = parent
+                    created.append(leaf)
+                    leaf_widths[leaf] = width
+                else:
+                    leaf = old_path(old_index_at(index))[-1][0]
+                    grafted.append((leaf, parent))
+                parent.children[slot] = leaf
+                index += 1
+
+        if index != node_end:
+            return None
+        return new_node, created, grafted, leaf_widths
+
+    def _ends_with_token(self, node):
+        # a subtree whose last leaf is a real token made no decision on the token after it
+        while not node.is_terminal:
+            node = node.children[-1]
+        return self.token_counts[node] == 1
+
+    def _rule(self, non_terminal, lookahead, production):
+        rule = self._production_rules.get((non_terminal, lookahead))
+        if rule is None:
+            rule = f"{non_terminal} -> {' '.join(production) if production else 'ε'}"
+            self._production_rules[(non_terminal, lookahead)] = rule
+        return rule
+
+    def _commit(self, old_node, new_node, created, grafted, leaf_widths):
+        count_delta = -self.token_counts[old_node]
+        width_delta = -self.widths[old_node]
+        grafted_nodes = set()
+        for node, parent in grafted:
+            node.parent = parent
+            grafted_nodes.add(node)
+
+        # forget the replaced nodes, keep the grafted subtrees
+        pending = [old_node]
+        while pending:
+            node = pending.pop()
+            if node in grafted_nodes:
+                continue
+            del self.token_counts[node]
+            del self.widths[node]
+            pending.extend(node.children)
+
+        for node in reversed(created):
+            if node.is_terminal:
+                self.token_counts[node] = 1 if node in leaf_widths else 0
+                self.widths[node] = leaf_widths.get(node, 0)
+            else:
+                self._measure_node(node)
+        count_delta += self.token_counts[new_node]
+        width_delta += self.widths[new_node]
+
+        parent = old_node.parent
+        new_node.parent = parent
+        if parent is None:
+            self.tree = new_node
+            self.dpda.parse_tree = new_node
+        else:
+            parent.children[parent.children.index(old_node)] = new_node
+            while parent is not None:
+                self.token_counts[parent] += count_delta
+                self.widths[parent] += width_delta
+                parent = parent.parent
+        self.last_reparsed = new_node
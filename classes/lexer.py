@@ -1,11 +1,132 @@
+import codecs
 import re
+from array import array
+from bisect import bisect_right
+
+
+class SourceText:
+    """The text a token list was lexed from, shared by all of its tokens.
+
+    The index of line starts is only built the first time a line or column
+    is asked for.
+    """
+    __slots__ = ('text', '_line_starts')
+
+    def __init__(self, text):
+        self.text = text
+        self._line_starts = None
+
+    def line_starts(self):
+        if self._line_starts is None:
+            self._line_starts = [0] + [match.end() for match in re.finditer('\n', self.text)]
+        return self._line_starts
+
+    def location(self, offset):
+        """1-based (line, column) of a character offset."""
+        line_starts = self.line_starts()
+        line = bisect_right(line_starts, offset)
+        return line, offset - line_starts[line - 1] + 1
+
+    def splice(self, edits):
+        """Copy of the text with (start, end, replacement) edits applied;
+        edits must not overlap."""
+        parts = []
+        position = 0
+        for start, end, replacement in sorted(edits, key=lambda edit: edit[0]):
+            if start < position:
+                raise ValueError(f"Overlapping edit at offset {start}")
+            parts.append(self.text[position:start])
+            parts.append(replacement)
+            position = end
+        parts.append(self.text[position:])
+        return ''.join(parts)
+
+
+class TokenList:
+    """Compact, read-only sequence of the tokens lexed from one SourceText.
+
+    Types are kept in a list (the strings are the grammar's own terminal
+    names) and offsets in two arrays, so no per-token object or lexeme
+    string exists until a Token is asked for.
+    """
+
+    def __init__(self, source, types=None, starts=None, ends=None):
+        self.source = source
+        self.types = types if types is not None else []
+        self.starts = starts if starts is not None else array('q')
+        self.ends = ends if ends is not None else array('q')
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, index):
+        return Token(self.types[index], self.starts[index], self.ends[index], self.source)
+
+    def __iter__(self):
+        source = self.source
+        for token_type, start, end in zip(self.types, self.starts, self.ends):
+            yield Token(token_type, start, end, source)
+
+    def lexeme(self, index):
+        return self.source.text[self.starts[index]:self.ends[index]]
+
+    def without(self, token_type):
+        """A new TokenList without the tokens of token_type (e.g. 'ERROR')."""
+        kept = [index for index, current in enumerate(self.types) if current != token_type]
+        return TokenList(self.source, [self.types[index] for index in kept],
+                         array('q', [self.starts[index] for index in kept]),
+                         array('q', [self.ends[index] for index in kept]))
+
+
+class Token:
+    # a token only holds offsets into its SourceText; the lexeme string is
+    # sliced out when asked for
+    __slots__ = ('type', 'start', 'end', 'source')
+
+    def __init__(self, token_type, start, end, source):
+        self.type = token_type
+        self.start = start
+        self.end = end
+        self.source = source
+
+    @property
+    def lexeme(self):
+        return self.source.text[self.start:self.end]
+
+    @property
+    def line(self):
+        return self.source.location(self.start)[0]
+
+    @property
+    def column(self):
+        return self.source.location(self.start)[1]
+
+    def __str__(self):
+        line, column = self.source.location(self.start)
+        return f"{self.type} '{self.lexeme}' at line {line}, column {column}"
+
+    def __repr__(self):
+        return f"Token({self.type}, {self.lexeme!r}, {self.start}:{self.end})"
+
 
 class Lexer:
-    def __init__(self, grammar):
+    # 'combined' scans every terminal in one regex call per token,
+    # 'sequential' tries each terminal pattern on its own (original engine)
+    ENGINES = ('combined', 'sequential')
+    DEFAULT_CHUNK_SIZE = 1 << 16
+
+    def __init__(self, grammar, engine='combined'):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown lexer engine '{engine}', expected one of {self.ENGINES}")
         self.grammar = grammar
+        self.engine = engine
         self.compiled_patterns = {}
+        self.master_pattern = None
+        self.master_groups = []  # (terminal, group index) in priority order
         self._compile_patterns()
-    
+        if self.engine == 'combined':
+            self._compile_master_pattern()
+
     def _compile_patterns(self):
         for terminal, pattern in self.grammar.terminal_patterns.items():
             try:
@@ -13,21 +134,142 @@ class Lexer:
                 self.compiled_patterns[terminal] = re.compile(clean_pattern)
             except re.error as e:
                 print(f"Invalid regex pattern for {terminal}: {pattern} - {e}")
-    
+
+    def _compile_master_pattern(self):
+        # Every terminal becomes an optional lookahead with its own named group,
+        # so a single match() reports where each pattern would end at this
+        # position. Leading whitespace is consumed by the same call.
+        parts = [r'\s*']
+        group_names = []
+        for index, (terminal, compiled_pattern) in enumerate(self.compiled_patterns.items()):
+            group_name = f'T{index}'
+            parts.append(f'(?:(?=(?P<{group_name}>{compiled_pattern.pattern}))|)')
+            group_names.append((terminal, group_name))
+
+        try:
+            self.master_pattern = re.compile(''.join(parts))
+        except re.error as e:
+            print(f"Cannot combine terminal patterns ({e}), falling back to sequential engine")
+            self.engine = 'sequential'
+            return
+
+        self.master_groups = [(terminal, self.master_pattern.groupindex[group_name])
+                              for terminal, group_name in group_names]
+
     def tokenize(self, input_string):
-        tokens = []
-        position = 0
-        
-        while position < len(input_string):
+        return [(terminal, input_string[start:end]) for terminal, start, end in self._scan(input_string)]
+
+    def lex(self, input_string):
+        """Tokens of input_string, with their offsets, as a TokenList."""
+        tokens = TokenList(SourceText(input_string))
+        add_type = tokens.types.append
+        add_start = tokens.starts.append
+        add_end = tokens.ends.append
+        for terminal, start, end in self._scan(input_string):
+            add_type(terminal)
+            add_start(start)
+            add_end(end)
+        return tokens
+
+    def iter_spans(self, input_string, position=0):
+        """Lazily yield (type, start, end) for the tokens of input_string from position on."""
+        return self._scan(input_string, position)
+
+    def iter_tokens(self, source, chunk_size=DEFAULT_CHUNK_SIZE, encoding='utf-8'):
+        """Lazily yield (type, lexeme) tokens from a string, a file object or an mmap.
+
+        Streams are read chunk_size at a time; only the unfinished tail of the
+        previous chunk is carried over. Tokens are assumed not to span a line
+        break (or any whitespace, while a chunk holds no line break at all).
+        """
+        if isinstance(source, str):
+            for terminal, start, end in self._scan(source):
+                yield (terminal, source[start:end])
+            return
+
+        buffer = ''
+        for chunk in self._read_chunks(source, chunk_size, encoding):
+            buffer += chunk
+            limit = buffer.rfind('\n')
+            if limit <= 0:
+                limit = max(buffer.rfind(' '), buffer.rfind('\t'))
+            if limit <= 0:
+                continue
+            # tokens touching the limit may continue in the next chunk
+            position = 0
+            for terminal, start, position in self._scan(buffer, limit=limit):
+                yield (terminal, buffer[start:position])
+            buffer = buffer[position:] if position else buffer.lstrip()
+
+        for terminal, start, end in self._scan(buffer):
+            yield (terminal, buffer[start:end])
+
+    def _read_chunks(self, stream, chunk_size, encoding):
+        decoder = None
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            if isinstance(chunk, (bytes, bytearray)):
+                if decoder is None:
+                    decoder = codecs.getincrementaldecoder(encoding)()
+                chunk = decoder.decode(chunk)
+            yield chunk
+        if decoder is not None:
+            tail = decoder.decode(b'', final=True)
+            if tail:
+                yield tail
+
+    def _scan(self, input_string, position=0, limit=None):
+        # Yields (type, start, end) until the input (or limit) is exhausted;
+        # a token ending past limit is left unread.
+        if self.engine == 'combined':
+            return self._scan_combined(input_string, position, limit)
+        return self._scan_sequential(input_string, position, limit)
+
+    def _scan_combined(self, input_string, position, limit):
+        stop = len(input_string) if limit is None else limit
+        match = self.master_pattern.match
+        groups = self.master_groups
+
+        while True:
+            result = match(input_string, position)
+            position = result.end()
+            if position >= stop:
+                return
+
+            # longest match wins, ties go to the terminal declared first
+            spans = result.regs
+            matched_terminal = None
+            longest_end = position
+            for terminal, group_index in groups:
+                end = spans[group_index][1]
+                if end > longest_end:
+                    longest_end = end
+                    matched_terminal = terminal
+
+            if matched_terminal is None:
+                yield ('ERROR', position, position + 1)
+                position += 1
+            elif longest_end > stop:
+                return
+            else:
+                yield (matched_terminal, position, longest_end)
+                position = longest_end
+
+    def _scan_sequential(self, input_string, position, limit):
+        stop = len(input_string) if limit is None else limit
+
+        while position < stop:
 
             if input_string[position].isspace():
                 position += 1
                 continue
-            
+
             match_found = False
             longest_match = ""
             matched_terminal = None
-            
+
             for terminal, compiled_pattern in self.compiled_patterns.items():
                 match = compiled_pattern.match(input_string, position)
                 if match:
@@ -37,16 +279,15 @@ class Lexer:
                         longest_match = matched_text
                         matched_terminal = terminal
                         match_found = True
-            
+
             if match_found:
-                tokens.append((matched_terminal, longest_match))
+                if position + len(longest_match) > stop:
+                    return
+                yield (matched_terminal, position, position + len(longest_match))
                 position += len(longest_match)
             else:
-                tokens.append(('ERROR', input_string[position]))
+                yield ('ERROR', position, position + 1)
                 position += 1
-        
-        return tokens
-    
+
     def get_terminal_types(self):
         return list(self.grammar.terminals)
-
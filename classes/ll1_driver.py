@@ -0,0 +1,103 @@
+from itertools import chain
+
+from classes.dpda import TraceRecorder
+
+
+class LL1Driver:
+    """Predictive LL(1) recognizer run straight off the parse table.
+
+    An LL(1)-derived DPDA only ever expands a non-terminal through the
+    table or matches a terminal against the input, so this keeps just
+    those two moves: every non-terminal gets a row (terminal -> production,
+    pre-reversed for pushing) and anything without a row is matched. '$'
+    stands in for Z0 at the bottom of the stack, so accepting is simply
+    matching the end marker. Accepts exactly the language of the DPDA it
+    is built from, with the same error reports.
+    """
+    END = '$'
+    END_INPUT = (END,)
+
+    def __init__(self, source):
+        """source is an LL1Parser or the DPDA LL1ToDPDA made from one."""
+        if getattr(source, 'grammar', None) is None:
+            raise ValueError("No grammar attached; build the driver from an LL1Parser or an LL1ToDPDA DPDA")
+        grammar = source.grammar
+        self.start_symbol = grammar.start_symbol
+        self.non_terminals = set(grammar.non_terminals)
+        self.rows = {non_terminal: {} for non_terminal in grammar.non_terminals}
+        for (non_terminal, terminal), production in source.parse_table.items():
+            self.rows[non_terminal][terminal] = tuple(reversed(production))
+
+    def recognize(self, input_string):
+        return self.run(input_string)[0]
+
+    def run(self, input_string):
+        """Returns (accepted, position, stack, expansions); input ends at its
+        first '$' or, without one, where it runs out."""
+        rows = self.rows
+        end = self.END
+        if not isinstance(input_string, (list, tuple)):
+            input_string = list(input_string)
+        if not input_string or input_string[0] == end:
+            # the DPDA checks for the end of input before its start move,
+            # so it accepts empty input whatever the grammar
+            return True, 0, [end], 0
+        stack = [end, self.start_symbol]
+        pop = stack.pop
+        extend = stack.extend
+        position = 0
+        expansions = 0
+
+        for current in chain(input_string, self.END_INPUT):
+            top = pop()
+            row = rows.get(top)
+            while row is not None:
+                production = row.get(current)
+                if production is None:
+                    stack.append(top)
+                    return False, position, stack, expansions
+                extend(production)
+                expansions += 1
+                top = pop()
+                row = rows.get(top)
+            if top != current:
+                stack.append(top)
+                return False, position, stack, expansions
+            if current == end:
+                stack.append(top)
+                return True, position, stack, expansions
+            position += 1
+
+    def process_input(self, input_string, trace_level='off', trace_sink=None):
+        """Same contract as DPDA.process_input, except that 'full' tracing is
+        not available (use DPDA for step-by-step traces)."""
+        tracer = TraceRecorder(trace_level, trace_sink)
+        if tracer.steps:
+            raise ValueError("LL1Driver does not record per-step traces; use trace_level 'summary' or lower")
+
+        if not tracer.errors:
+            return self.run(input_string)[0], tracer.lines
+
+        input_string = list(input_string)
+        if tracer.summary:
+            tracer.emit(('initial', 'q0', ['Z0'], 1, input_string, 0))
+
+        accepted, position, stack, expansions = self.run(input_string)
+        stack = ['Z0'] + stack[1:]
+        if not accepted:
+            # the DPDA's step count: its start move, every expansion and
+            # match, then the step that failed
+            step = expansions + position + 2
+            current_input = input_string[position] if position < len(input_string) else self.END
+            top = stack[-1]
+            if top in self.non_terminals:
+                tracer.emit(('no_table_entry', step, top, current_input))
+            elif top == 'Z0':
+                tracer.emit(('no_transition', step, 'q1', current_input, top))
+            else:
+                tracer.emit(('unexpected', step, top, current_input))
+        if tracer.summary:
+            tracer.emit(('final', 'q2' if accepted else 'q1', stack, len(stack), input_string, position))
+            tracer.emit(('result', accepted))
+
+        return accepted, tracer.lines
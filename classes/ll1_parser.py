@@ -1,6 +1,14 @@
+from collections import deque
+from itertools import compress
+
+
 class LL1Parser:
-    def __init__(self, grammar):
+    def __init__(self, grammar, strict=True):
+        # strict raises on the first LL(1) conflict; otherwise every conflict
+        # is collected in self.conflicts and the first production wins the cell
         self.grammar = grammar
+        self.strict = strict
+        self.conflicts = []
         self.first_sets = {}
         self.follow_sets = {}
         self.parse_table = {}
@@ -8,115 +16,376 @@ class LL1Parser:
         self._compute_follow_sets()
         self._build_parse_table()
     
+    @classmethod
+    def from_tables(cls, grammar, first_sets, follow_sets, parse_table):
+        """Rebuild a parser from previously computed tables (see GrammarCache)."""
+        parser = cls.__new__(cls)
+        parser.grammar = grammar
+        parser.strict = True
+        parser.conflicts = []
+        parser.first_sets = first_sets
+        parser.follow_sets = follow_sets
+        parser.parse_table = parse_table
+        parser._assign_symbol_bits()
+        parser.first_bits = {non_terminal: parser._encode(first_sets[non_terminal])
+                             for non_terminal in grammar.non_terminals}
+        parser.follow_bits = {non_terminal: parser._encode(follow_sets[non_terminal])
+                              for non_terminal in grammar.non_terminals}
+        parser.first_users = {non_terminal: set() for non_terminal in grammar.non_terminals}
+        parser.follow_seeds = {}
+        parser.follow_targets = {}
+        for non_terminal in grammar.non_terminals:
+            parser._link_first_users(non_terminal, grammar.get_productions(non_terminal))
+            parser._collect_follow_constraints(non_terminal)
+        return parser
+    
+    def _assign_symbol_bits(self):
+        # FIRST/FOLLOW sets are solved as int bitsets over terminals, 'eps' and '$'
+        self.bit_symbols = sorted(self.grammar.terminals) + ['eps', '$']
+        self.symbol_bits = {symbol: 1 << index for index, symbol in enumerate(self.bit_symbols)}
+        self.eps_bit = self.symbol_bits['eps']
+    
+    def _encode(self, symbols):
+        bits = 0
+        for symbol in symbols:
+            bits |= self.symbol_bits[symbol]
+        return bits
+    
+    def _decode(self, bits):
+        # bit i of the binary string read backwards selects bit_symbols[i]
+        selectors = format(bits, 'b')[::-1].encode().replace(b'0', b'\x00')
+        return set(compress(self.bit_symbols, selectors))
+    
     def _compute_first_sets(self):
-        for terminal in self.grammar.terminals:
-            self.first_sets[terminal] = {terminal}
+        self._assign_symbol_bits()
         
+        # FIRST(A) can only change when FIRST of a non-terminal used in one of
+        # A's productions does, so only those users go back on the worklist
+        self.first_users = {non_terminal: set() for non_terminal in self.grammar.non_terminals}
         for non_terminal in self.grammar.non_terminals:
-            self.first_sets[non_terminal] = set()
+            self._link_first_users(non_terminal, self.grammar.get_productions(non_terminal))
         
-        self.first_sets['eps'] = {'eps'}
+        self.first_bits = {non_terminal: 0 for non_terminal in self.grammar.non_terminals}
+        self._solve_first(self.grammar.non_terminals)
         
-        changed = True
-        while changed:
-            changed = False
-            for non_terminal in self.grammar.non_terminals:
-                for production in self.grammar.get_productions(non_terminal):
-                    if not production:  # epsilon production
-                        if 'eps' not in self.first_sets[non_terminal]:
-                            self.first_sets[non_terminal].add('eps')
-                            changed = True
+        for terminal in self.grammar.terminals:
+            self.first_sets[terminal] = {terminal}
+        for non_terminal in self.grammar.non_terminals:
+            self.first_sets[non_terminal] = self._decode(self.first_bits[non_terminal])
+        self.first_sets['eps'] = {'eps'}
+    
+    def _link_first_users(self, non_terminal, productions, link=True):
+        for production in productions:
+            for symbol in production:
+                if symbol in self.grammar.non_terminals:
+                    if link:
+                        self.first_users[symbol].add(non_terminal)
                     else:
-                        first_symbol = production[0]
-                        old_size = len(self.first_sets[non_terminal])
-                        
-                        if first_symbol in self.grammar.terminals:
-                            self.first_sets[non_terminal].add(first_symbol)
-                        else:
-                            self.first_sets[non_terminal] |= (self.first_sets[first_symbol] - {'eps'})
-                            
-                            if all(symbol in self.grammar.non_terminals and 'eps' in self.first_sets[symbol] 
-                                   for symbol in production):
-                                self.first_sets[non_terminal].add('eps')
-                        
-                        if len(self.first_sets[non_terminal]) > old_size:
-                            changed = True
+                        self.first_users[symbol].discard(non_terminal)
+                elif symbol not in self.grammar.terminals:
+                    raise ValueError(f"Unknown symbol '{symbol}' in production of {non_terminal}")
+    
+    def _solve_first(self, non_terminals):
+        first_bits = self.first_bits
+        worklist = deque(non_terminals)
+        queued = set(worklist)
+        while worklist:
+            non_terminal = worklist.popleft()
+            queued.discard(non_terminal)
+            
+            bits = 0
+            for production in self.grammar.get_productions(non_terminal):
+                bits |= self._first_bits_of(production)
+            
+            if bits != first_bits[non_terminal]:
+                first_bits[non_terminal] = bits
+                for user in self.first_users[non_terminal]:
+                    if user not in queued:
+                        queued.add(user)
+                        worklist.append(user)
+    
+    def _first_bits_of(self, symbols):
+        eps_bit = self.eps_bit
+        bits = 0
+        for symbol in symbols:
+            symbol_bits = self.first_bits.get(symbol)
+            if symbol_bits is None:  # terminal
+                return bits | self.symbol_bits[symbol]
+            bits |= symbol_bits & ~eps_bit
+            if not symbol_bits & eps_bit:
+                return bits
+        return bits | eps_bit
     
     def _compute_follow_sets(self):
+        # one pass over the productions collects FIRST of what follows every
+        # occurrence and the edges FOLLOW(A) -> FOLLOW(B) for A -> ... B <nullable>
+        self.follow_seeds = {}
+        self.follow_targets = {}
         for non_terminal in self.grammar.non_terminals:
-            self.follow_sets[non_terminal] = set()
-        
-        self.follow_sets[self.grammar.start_symbol].add('$')
-        
-        changed = True
-        while changed:
-            changed = False
-            for non_terminal in self.grammar.non_terminals:
-                for production in self.grammar.get_productions(non_terminal):
-                    for i, symbol in enumerate(production):
-                        if symbol in self.grammar.non_terminals:
-                            old_size = len(self.follow_sets[symbol])
-                            
-                            # FIRST of what follows
-                            if i + 1 < len(production):
-                                next_symbol = production[i + 1]
-                                if next_symbol in self.grammar.terminals:
-                                    self.follow_sets[symbol].add(next_symbol)
-                                else:
-                                    self.follow_sets[symbol] |= (self.first_sets[next_symbol] - {'eps'})
-                                    
-                                    # If next symbol can derive epsilon, add FOLLOW of LHS
-                                    if 'eps' in self.first_sets[next_symbol]:
-                                        self.follow_sets[symbol] |= self.follow_sets[non_terminal]
-                            else:
-                                # Add FOLLOW of LHS
-                                self.follow_sets[symbol] |= self.follow_sets[non_terminal]
-                            
-                            if len(self.follow_sets[symbol]) > old_size:
-                                changed = True
+            self._collect_follow_constraints(non_terminal)
+        
+        self.follow_bits = {non_terminal: self._follow_base(non_terminal)
+                            for non_terminal in self.grammar.non_terminals}
+        self._solve_follow(self.grammar.non_terminals)
+        
+        for non_terminal in self.grammar.non_terminals:
+            self.follow_sets[non_terminal] = self._decode(self.follow_bits[non_terminal])
+    
+    def _collect_follow_constraints(self, non_terminal):
+        # seeds hold an entry for every non-terminal used by non_terminal's productions
+        eps_bit = self.eps_bit
+        seeds = {}
+        targets = set()
+        for production in self.grammar.get_productions(non_terminal):
+            rest_bits = eps_bit
+            for symbol in reversed(production):
+                symbol_bits = self.first_bits.get(symbol)
+                if symbol_bits is None:  # terminal
+                    rest_bits = self.symbol_bits[symbol]
+                    continue
+                seeds[symbol] = seeds.get(symbol, 0) | (rest_bits & ~eps_bit)
+                if rest_bits & eps_bit and symbol != non_terminal:
+                    targets.add(symbol)
+                if symbol_bits & eps_bit:
+                    rest_bits |= symbol_bits & ~eps_bit
+                else:
+                    rest_bits = symbol_bits
+        self.follow_seeds[non_terminal] = seeds
+        self.follow_targets[non_terminal] = targets
+    
+    def _follow_base(self, non_terminal):
+        bits = self.symbol_bits['$'] if non_terminal == self.grammar.start_symbol else 0
+        for user in self.first_users[non_terminal]:
+            bits |= self.follow_seeds[user].get(non_terminal, 0)
+        return bits
+    
+    def _solve_follow(self, non_terminals):
+        # Every FOLLOW set in a strongly connected component of the edge graph
+        # ends up identical, so components are merged once each, in
+        # topological order, and the result pushed along the outgoing edges.
+        follow_bits = self.follow_bits
+        for component in self._follow_components(non_terminals):
+            bits = 0
+            for non_terminal in component:
+                bits |= follow_bits[non_terminal]
+            for non_terminal in component:
+                follow_bits[non_terminal] = bits
+            for non_terminal in component:
+                for target in self.follow_targets[non_terminal]:
+                    follow_bits[target] |= bits
+    
+    def _follow_components(self, non_terminals):
+        # iterative Tarjan over the FOLLOW edges reachable from non_terminals;
+        # components come out sinks first, so the list is reversed
+        targets = self.follow_targets
+        index = {}
+        low_link = {}
+        stack = []
+        on_stack = set()
+        components = []
+        
+        for root in non_terminals:
+            if root in index:
+                continue
+            index[root] = low_link[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(targets[root]))]
+            while work:
+                node, edges = work[-1]
+                for target in edges:
+                    if target not in index:
+                        index[target] = low_link[target] = len(index)
+                        stack.append(target)
+                        on_stack.add(target)
+                        work.append((target, iter(targets[target])))
+                        break
+                    if target in on_stack:
+                        low_link[node] = min(low_link[node], index[target])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low_link[parent] = min(low_link[parent], low_link[node])
+                    if low_link[node] == index[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == node:
+                                break
+                        components.append(component)
+        
+        components.reverse()
+        return components
     
     def _build_parse_table(self):
         self.parse_table = {}
+        self.conflicts = []
         
         for non_terminal in self.grammar.non_terminals:
-            for production in self.grammar.get_productions(non_terminal):
-                if not production:  # epsilon production
-                    for terminal in self.follow_sets[non_terminal]:
-                        if (non_terminal, terminal) in self.parse_table:
-                            raise ValueError(f"Grammar is not LL(1): conflict at ({non_terminal}, {terminal})")
-                        self.parse_table[(non_terminal, terminal)] = production
-                else:
-                    first_of_production = self._first_of_string(production)
-                    for terminal in first_of_production:
-                        if terminal != 'eps':
-                            if (non_terminal, terminal) in self.parse_table:
-                                raise ValueError(f"Grammar is not LL(1): conflict at ({non_terminal}, {terminal})")
-                            self.parse_table[(non_terminal, terminal)] = production
-                    
-                    if 'eps' in first_of_production:
-                        for terminal in self.follow_sets[non_terminal]:
-                            if (non_terminal, terminal) in self.parse_table:
-                                raise ValueError(f"Grammar is not LL(1): conflict at ({non_terminal}, {terminal})")
-                            self.parse_table[(non_terminal, terminal)] = production
+            for terminal, production in self._table_row(non_terminal).items():
+                self.parse_table[(non_terminal, terminal)] = production
     
-    def _first_of_string(self, symbols):
-
-        if not symbols:
-            return {'eps'}
+    def _table_row(self, non_terminal, conflicts=None):
+        # conflicts collects this row's conflicts when the parser is not
+        # strict (self.conflicts unless given)
+        if conflicts is None:
+            conflicts = None if self.strict else self.conflicts
+        productions = self.grammar.get_productions(non_terminal)
+        row = {}  # terminal -> index of the production in productions
+        entries = None if conflicts is None else {}  # terminal -> [(index, source)]
         
-        result = set()
-        for symbol in symbols:
-            if symbol in self.grammar.terminals:
-                result.add(symbol)
-                break
-            else:
-                result |= (self.first_sets[symbol] - {'eps'})
-                if 'eps' not in self.first_sets[symbol]:
-                    break
-        else:
-            result.add('eps')
-        
-        return result
+        for index, production in enumerate(productions):
+            first_of_production = self._first_of_string(production)
+            for terminal in first_of_production:
+                if terminal != 'eps':
+                    self._add_table_entry(row, entries, non_terminal, terminal, index, 'FIRST')
+            
+            if 'eps' in first_of_production:
+                for terminal in self.follow_sets[non_terminal]:
+                    self._add_table_entry(row, entries, non_terminal, terminal, index, 'FOLLOW')
+        
+        if entries:
+            for terminal, competing in entries.items():
+                if len(competing) > 1:
+                    conflicts.append(self._conflict(non_terminal, terminal, productions, competing))
+        return {terminal: productions[index] for terminal, index in row.items()}
+    
+    def _add_table_entry(self, row, entries, non_terminal, terminal, index, source):
+        # a nullable production can reach the same cell through FIRST and
+        # FOLLOW; that is one production, not a conflict. Alternatives are
+        # told apart by position, so two equal ones (A -> eps | eps) still are
+        if terminal not in row:
+            row[terminal] = index
+        elif entries is None:
+            if row[terminal] != index:
+                raise ValueError(f"Grammar is not LL(1): conflict at ({non_terminal}, {terminal})")
+        if entries is not None:
+            competing = entries.setdefault(terminal, [])
+            if not any(entry == index for entry, _ in competing):
+                competing.append((index, source))
+    
+    def _conflict(self, non_terminal, terminal, productions, competing):
+        # FOLLOW entries come from nullable productions; two of them compete on
+        # FIRST (both derive eps), one against a FIRST entry is FIRST/FOLLOW
+        sources = {source for _, source in competing}
+        return {
+            'non_terminal': non_terminal,
+            'terminal': terminal,
+            'kind': 'FIRST/FOLLOW' if len(sources) == 2 else 'FIRST/FIRST',
+            'productions': [productions[index] for index, _ in competing],
+            'sources': [source for _, source in competing],
+        }
+    
+    def print_conflicts(self):
+        print(f"LL(1) conflicts: {len(self.conflicts)}")
+        for conflict in self.conflicts:
+            productions = ' | '.join(' '.join(production) if production else 'eps'
+                                     for production in conflict['productions'])
+            print(f"  {conflict['kind']} at ({conflict['non_terminal']}, {conflict['terminal']}): "
+                  f"{conflict['non_terminal']} -> {productions}")
+    
+    def add_production(self, non_terminal, production):
+        """Adds a production and updates the tables; returns the changed cells."""
+        return self._edit(non_terminal, self.grammar.add_production, production)
+    
+    def remove_production(self, non_terminal, production):
+        return self._edit(non_terminal, self.grammar.remove_production, production)
+    
+    def replace_production(self, non_terminal, old_production, new_production):
+        return self._edit(non_terminal, self.grammar.replace_production, old_production, new_production)
+    
+    def _edit(self, non_terminal, grammar_edit, *args):
+        # The diff maps every changed (non_terminal, terminal) cell to its
+        # (old, new) production, None meaning no entry. The parse table is
+        # updated in place, so DPDAs built from this parser see the change
+        # (a CompiledDPDA has to be compiled again). On a strict parser an
+        # edit that makes the grammar non-LL(1) is undone before the
+        # ValueError propagates; otherwise self.conflicts is brought up to date.
+        old_productions = list(self.grammar.get_productions(non_terminal))
+        grammar_edit(non_terminal, *args)
+        try:
+            return self._update(non_terminal, old_productions)
+        except ValueError:
+            new_productions = self.grammar.productions[non_terminal]
+            self.grammar.productions[non_terminal] = old_productions
+            self._update(non_terminal, new_productions)
+            raise
+    
+    def _update(self, non_terminal, old_productions):
+        self._link_first_users(non_terminal, old_productions, link=False)
+        self._link_first_users(non_terminal, self.grammar.get_productions(non_terminal))
+        
+        # FIRST can shrink, so the edited non-terminal and everything whose
+        # FIRST depends on it start over from the empty set
+        affected_first = self._reachable([non_terminal], self.first_users)
+        old_first = {symbol: self.first_bits[symbol] for symbol in affected_first}
+        for symbol in affected_first:
+            self.first_bits[symbol] = 0
+        self._solve_first(affected_first)
+        changed_first = {symbol for symbol in affected_first if self.first_bits[symbol] != old_first[symbol]}
+        
+        # FOLLOW constraints come from the edited productions and from every
+        # production using a non-terminal whose FIRST changed
+        affected_users = {non_terminal}
+        for symbol in changed_first:
+            affected_users |= self.first_users[symbol]
+        roots = set()
+        for user in affected_users:
+            roots.update(self.follow_seeds[user])
+            self._collect_follow_constraints(user)
+            roots.update(self.follow_seeds[user])
+        
+        affected_follow = self._reachable(roots, self.follow_targets)
+        old_follow = {symbol: self.follow_bits[symbol] for symbol in affected_follow}
+        for symbol in affected_follow:
+            bits = self._follow_base(symbol)
+            for user in self.first_users[symbol]:
+                if user not in affected_follow and symbol in self.follow_targets[user]:
+                    bits |= self.follow_bits[user]
+            self.follow_bits[symbol] = bits
+        self._solve_follow(affected_follow)
+        changed_follow = {symbol for symbol in affected_follow if self.follow_bits[symbol] != old_follow[symbol]}
+        
+        for symbol in changed_first:
+            self.first_sets[symbol] = self._decode(self.first_bits[symbol])
+        for symbol in changed_follow:
+            self.follow_sets[symbol] = self._decode(self.follow_bits[symbol])
+        
+        # a row depends on FIRST of its productions' symbols and on its own FOLLOW;
+        # rows are all built before the table is touched so a conflict leaves it intact
+        conflicts = None if self.strict else []
+        rows = {row: self._table_row(row, conflicts) for row in affected_users | changed_follow}
+        if conflicts is not None:
+            self.conflicts = [conflict for conflict in self.conflicts
+                              if conflict['non_terminal'] not in rows] + conflicts
+        
+        diff = {}
+        columns = sorted(self.grammar.terminals) + ['$']
+        for row, new_row in rows.items():
+            for terminal in columns:
+                old = self.parse_table.pop((row, terminal), None)
+                new = new_row.get(terminal)
+                if new is not None:
+                    self.parse_table[(row, terminal)] = new
+                if old != new:
+                    diff[(row, terminal)] = (old, new)
+        return diff
+    
+    def _reachable(self, roots, edges):
+        reached = set(roots)
+        pending = list(reached)
+        while pending:
+            for target in edges[pending.pop()]:
+                if target not in reached:
+                    reached.add(target)
+                    pending.append(target)
+        return reached
+    
+    def _first_of_string(self, symbols):
+        return self._decode(self._first_bits_of(symbols))
     
     def get_parse_table(self):
         return self.parse_table
@@ -0,0 +1,152 @@
+try:
+    import numpy as np
+except ImportError:  # optional: only needed for batched recognition
+    np = None
+
+from classes.compiled_dpda import CompiledDPDA
+
+
+class LockstepDPDA:
+    """Recognizes many token sequences at once on a CompiledDPDA's tables.
+
+    Every input gets a row in shared NumPy arrays (codes, stack, stack
+    pointer, cursor) and each round applies one move to all inputs still
+    running: match a terminal, expand a non-terminal through the table,
+    accept on Z0 with '$' ahead or stop at the first error. The per-input
+    Python work of DPDA.process_input is replaced by a few array
+    operations per round, so this pays off for many short inputs.
+    """
+    RUNNING = -2
+    DEFAULT_CHUNK_SIZE = 1 << 14
+    INITIAL_DEPTH = 32
+
+    def __init__(self, source):
+        """source is a CompiledDPDA or a DPDA LL1ToDPDA made."""
+        if np is None:
+            raise ValueError("LockstepDPDA needs NumPy; install it with 'pip install numpy'")
+        compiled = source if isinstance(source, CompiledDPDA) else CompiledDPDA(source)
+        self.compiled = compiled
+        self.end_code = compiled.end_code
+        self.bottom_code = compiled.bottom_code
+        self.start_push = self._start_push(compiled)
+
+        self.table = np.frombuffer(compiled.table, dtype=np.int32)
+        self.row_offsets = np.array(compiled.row_offsets, dtype=np.int64)
+        longest = max((len(codes) for codes in compiled.reversed_productions), default=0)
+        # productions padded to one row each, in push order
+        self.productions = np.zeros((max(len(compiled.reversed_productions), 1), max(longest, 1)), dtype=np.int32)
+        self.production_lengths = np.zeros(len(self.productions), dtype=np.int64)
+        for index, codes in enumerate(compiled.reversed_productions):
+            self.productions[index, :len(codes)] = codes
+            self.production_lengths[index] = len(codes)
+        self.longest_production = longest
+
+    def _start_push(self, compiled):
+        # an LL1ToDPDA automaton has a single epsilon move, Z0 -> S Z0 out of
+        # the start state; everything else is matching, done by the table loop
+        symbols = len(compiled.symbols)
+        moves = [slot for slot, target in enumerate(compiled.epsilon_moves) if target >= 0]
+        start_slot = compiled.start_state * symbols + compiled.bottom_code
+        if moves != [start_slot]:
+            raise ValueError("LockstepDPDA only runs LL(1)-derived DPDAs (a single start move on Z0)")
+        for (state, input_code, stack_code), target in compiled.input_moves.items():
+            to_state, pushed = compiled.transition_targets[target]
+            if pushed or (stack_code != input_code and
+                          (stack_code, input_code) != (compiled.bottom_code, compiled.end_code)):
+                raise ValueError("LockstepDPDA only runs LL(1)-derived DPDAs (matching moves only)")
+        return compiled.transition_targets[compiled.epsilon_moves[start_slot]][1]
+
+    def encode_batch(self, inputs):
+        """Token sequences as a (codes, lengths) pair; each row of codes is
+        padded with '$' and has at least one '$' after its input."""
+        lookup = self.compiled.input_codes.get
+        unknown_code = self.compiled.unknown_code
+        lengths = np.fromiter((len(input_string) for input_string in inputs), dtype=np.int64, count=len(inputs))
+        flat = np.fromiter((lookup(symbol, unknown_code) for input_string in inputs for symbol in input_string),
+                           dtype=np.int32, count=int(lengths.sum()))
+        width = int(lengths.max(initial=0)) + 1
+        codes = np.full((len(inputs), width), self.end_code, dtype=np.int32)
+        rows = np.repeat(np.arange(len(inputs)), lengths)
+        columns = np.arange(len(flat)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        codes[rows, columns] = flat
+        return codes, lengths
+
+    def recognize_batch(self, inputs, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Returns (accepted, error_positions) as NumPy arrays, one entry per
+        input; the error position is the index of the offending token (the
+        input length for a premature end) and -1 for accepted inputs.
+        Same verdicts as DPDA.process_input."""
+        inputs = inputs if isinstance(inputs, list) else list(inputs)
+        accepted = np.zeros(len(inputs), dtype=bool)
+        error_positions = np.full(len(inputs), -1, dtype=np.int64)
+        for start in range(0, len(inputs), chunk_size):
+            codes, _ = self.encode_batch(inputs[start:start + chunk_size])
+            chunk_accepted, chunk_errors = self.recognize_codes(codes)
+            accepted[start:start + len(codes)] = chunk_accepted
+            error_positions[start:start + len(codes)] = chunk_errors
+        return accepted, error_positions
+
+    def recognize_codes(self, codes):
+        """Runs a '$'-padded code matrix from encode_batch in lockstep."""
+        count = len(codes)
+        outcome = np.full(count, self.RUNNING, dtype=np.int64)
+        if count == 0:
+            return outcome == -1, outcome
+
+        start_push = np.array(self.start_push, dtype=np.int32)
+        depth = max(self.INITIAL_DEPTH, len(start_push) + self.longest_production)
+        stack = np.empty((count, depth), dtype=np.int32)
+        stack[:, :len(start_push)] = start_push
+        pointers = np.full(count, len(start_push), dtype=np.int64)  # stack sizes
+        positions = np.zeros(count, dtype=np.int64)
+
+        # like the DPDA, an input that starts at '$' is accepted before the start move
+        outcome[codes[:, 0] == self.end_code] = -1
+        active = np.flatnonzero(outcome == self.RUNNING)
+
+        table = self.table
+        row_offsets = self.row_offsets
+        productions = self.productions
+        production_lengths = self.production_lengths
+        end_code = self.end_code
+        bottom_code = self.bottom_code
+
+        while len(active):
+            tops = stack[active, pointers[active] - 1]
+            current = codes[active, positions[active]]
+
+            # match: pop the terminal and advance the cursor
+            matched = tops == current
+            matched_rows = active[matched]
+            pointers[matched_rows] -= 1
+            positions[matched_rows] += 1
+
+            # expand: replace the non-terminal by its production
+            rows = row_offsets[tops]
+            expanding = (rows >= 0) & ~matched
+            expanding_rows = active[expanding]
+            chosen = table[rows[expanding] + current[expanding]]
+            found = chosen >= 0
+            expanded_rows = expanding_rows[found]
+            chosen = chosen[found]
+            lengths = production_lengths[chosen]
+            bases = pointers[expanded_rows] - 1
+            needed = int((bases + lengths).max(initial=0))
+            if needed > stack.shape[1]:
+                stack = np.concatenate([stack, np.empty((count, max(needed, 2 * stack.shape[1]) - stack.shape[1]),
+                                                        dtype=np.int32)], axis=1)
+            for column in range(self.longest_production):
+                pushing = lengths > column
+                stack[expanded_rows[pushing], bases[pushing] + column] = productions[chosen[pushing], column]
+            pointers[expanded_rows] = bases + lengths
+
+            # stop: Z0 with '$' ahead accepts, anything else that moved neither way rejects
+            stopped = ~matched
+            stopped[expanding] = ~found
+            stopped_rows = active[stopped]
+            accepting = (tops[stopped] == bottom_code) & (current[stopped] == end_code)
+            outcome[stopped_rows] = np.where(accepting, -1, positions[stopped_rows])
+
+            active = active[~stopped]
+
+        return outcome == -1, outcome
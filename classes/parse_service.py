@@ -0,0 +1,401 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import stat
+import struct
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from classes.batch_parser import BatchParser
+from classes.grammar_cache import GrammarCache
+from classes.scope_analyzer import ScopeAnalyzer
+from classes.symbol_index import SymbolIndex
+from classes.symbole_renamer import SymbolRenamer
+from classes.tree_traversal import iter_preorder
+
+# frames are a 4-byte big-endian length followed by that many bytes of UTF-8 JSON
+FRAME_HEADER = struct.Struct('>I')
+MAX_FRAME_SIZE = 1 << 26
+
+
+def encode_frame(message):
+    body = json.dumps(message, separators=(',', ':')).encode('utf-8')
+    if len(body) > MAX_FRAME_SIZE:
+        raise ValueError(f"Message of {len(body)} bytes exceeds the {MAX_FRAME_SIZE} byte frame limit")
+    return FRAME_HEADER.pack(len(body)) + body
+
+
+async def read_frame(reader):
+    """Next decoded message, or None at a clean end of stream."""
+    try:
+        header = await reader.readexactly(FRAME_HEADER.size)
+    except asyncio.IncompleteReadError as e:
+        if e.partial:
+            raise ValueError("Connection closed inside a frame header")
+        return None
+    size, = FRAME_HEADER.unpack(header)
+    if size > MAX_FRAME_SIZE:
+        raise ValueError(f"Frame of {size} bytes exceeds the {MAX_FRAME_SIZE} byte limit")
+    return json.loads(await reader.readexactly(size))
+
+
+class RequestHandler:
+    """Answers one request against a grammar's prebuilt lexer and automata.
+
+    Requests are dicts with an 'op' (one of OPS) and the 'source' text;
+    the answer is a dict with 'ok' and either the op's fields or an 'error'
+    message. handle() never raises, so a bad request cannot take a worker
+    down.
+    """
+    OPS = ('validate', 'tokens', 'parse', 'symbols', 'rename')
+
+    def __init__(self, grammar, lexer, dpda, compiled_dpda):
+        self.grammar = grammar
+        self.lexer = lexer
+        self.dpda = dpda
+        self.compiled_dpda = compiled_dpda
+
+    def handle(self, request):
+        try:
+            if not isinstance(request, dict):
+                raise ValueError("A request must be a JSON object")
+            op = request.get('op')
+            if op not in self.OPS:
+                raise ValueError(f"Unknown op {op!r}, expected one of {list(self.OPS)}")
+            source = request.get('source')
+            if not isinstance(source, str):
+                raise ValueError("'source' must be a string")
+            response = getattr(self, op)(source, request)
+            response['ok'] = True
+        except (ValueError, TypeError, KeyError) as e:
+            response = {'ok': False, 'error': str(e)}
+        except RecursionError:
+            response = {'ok': False, 'error': "Input nested too deeply"}
+        except Exception as e:
+            # a request the ops did not expect (a field of the wrong type, say)
+            response = {'ok': False, 'error': f"Internal error: {type(e).__name__}: {e}"}
+        if isinstance(request, dict) and 'id' in request:
+            response['id'] = request['id']
+        return response
+
+    def validate(self, source, request=None):
+        tokens = self.lexer.lex(source)
+        lexical_errors = [token for token in tokens if token.type == 'ERROR']
+        token_types = [token_type for token_type in tokens.types if token_type != 'ERROR']
+        accepted, trace = self.compiled_dpda.process_input(token_types + ['$'], trace_level='errors')
+        return self._result(accepted, trace, len(token_types), lexical_errors)
+
+    def tokens(self, source, request=None):
+        tokens = self.lexer.lex(source)
+        token_data = []
+        for token in tokens:
+            line, column = token.source.location(token.start)
+            token_data.append({'type': token.type, 'lexeme': token.lexeme, 'line': line, 'column': column})
+        lexical_errors = sum(1 for token_type in tokens.types if token_type == 'ERROR')
+        return {'tokens': token_data, 'lexical_errors': lexical_errors}
+
+    def parse(self, source, request=None):
+        """The validate fields plus, with 'tree': true, the parse tree as a
+        flat preorder list of nodes (deep trees need no nesting)."""
+        response, tokens, tree = self._parse(source)
+        nodes = list(iter_preorder(tree)) if tree is not None else []
+        response['nodes'] = len(nodes)
+        if request and request.get('tree'):
+            response['tree'] = [self._node_data(node) for node in nodes]
+        return response
+
+    def rename(self, source, request):
+        """'renames' maps node ids (as given by parse) or symbol names to new
+        names; a name renames every declaration of that name."""
+        renames = request.get('renames')
+        if not isinstance(renames, dict) or not renames:
+            raise ValueError("'renames' must be a non-empty object")
+        tree, symbol_table, symbol_index = self._analyze(source, 'rename in')
+        by_node = {}
+        for target, new_name in renames.items():
+            if str(target).isdigit():
+                by_node[int(target)] = new_name
+                continue
+            declarations = symbol_index.declarations_named(target)
+            if not declarations:
+                raise ValueError(f"No declaration named '{target}'")
+            for node_id in declarations:
+                by_node[node_id] = new_name
+
+        renamer = SymbolRenamer(tree, symbol_table, self.lexer, symbol_index)
+        renamed = renamer.rename_symbols(by_node)
+        # never hand back (or let the CLI write) source that no longer parses
+        check = self.validate(renamed)
+        if not check['accepted']:
+            raise ValueError(f"Renamed source is rejected: {check['error']}")
+        return {'source': renamed, 'renamed': len(by_node)}
+
+    def symbols(self, source, request=None):
+        """Every declaration with its scope, position and references."""
+        tree, symbol_table, symbol_index = self._analyze(source, 'analyze')
+        declarations = []
+        for node_id, declaration in symbol_table.declarations.items():
+            scope = symbol_index.scope(declaration['scope_id'])
+            data = {'id': node_id, 'name': declaration['name'], 'scope': declaration['scope_id'],
+                    'scope_type': scope['type'] if scope else None}
+            data.update(self._position(declaration['node']))
+            data['references'] = [{'id': reference_id, **self._position(symbol_table.references[reference_id]['node'])}
+                                  for reference_id in declaration['references']]
+            declarations.append(data)
+        return {'symbols': declarations}
+
+    def _analyze(self, source, action):
+        response, tokens, tree = self._parse(source)
+        if not response['accepted']:
+            raise ValueError(f"Cannot {action} rejected input: {response['error']}")
+        symbol_table = ScopeAnalyzer(tree, self.grammar, verbose=False).analyze()
+        return tree, symbol_table, SymbolIndex(tree, symbol_table)
+
+    def _position(self, node):
+        if node.token is None:
+            return {}
+        line, column = node.token.source.location(node.token.start)
+        return {'line': line, 'column': column}
+
+    def _parse(self, source):
+        tokens = self.lexer.lex(source)
+        lexical_errors = [token for token in tokens if token.type == 'ERROR']
+        tokens = tokens.without('ERROR')
+        accepted, trace, tree = self.dpda.process_input_with_tree(tokens.types + ['$'], trace_level='errors',
+                                                                   tokens=tokens)
+        return self._result(accepted, trace, len(tokens), lexical_errors), tokens, tree
+
+    def _result(self, accepted, trace, token_count, lexical_errors):
+        errors = [f"Unrecognized character '{token.lexeme}' at line {token.line}, column {token.column}"
+                  for token in lexical_errors[:1]]
+        if len(lexical_errors) > 1:
+            errors.append(f"{len(lexical_errors) - 1} more unrecognized character(s)")
+        if not accepted:
+            errors.append(trace[0] if trace else "Input rejected")
+        return {
+            'accepted': accepted and not lexical_errors,
+            'tokens': token_count,
+            'lexical_errors': len(lexical_errors),
+            'error': '; '.join(errors) or None,
+        }
+
+    def _node_data(self, node):
+        data = {'id': node.id, 'symbol': node.symbol,
+                'parent': node.parent.id if node.parent is not None else None}
+        if node.production_rule is not None:
+            data['rule'] = node.production_rule
+        if node.token is not None:
+            data['start'] = node.token.start
+            data['end'] = node.token.end
+        return data
+
+
+# per-process handler installed by _init_worker
+_worker_handler = None
+
+
+def _init_worker(handler):
+    global _worker_handler
+    _worker_handler = handler
+
+
+def _handle_in_worker(request):
+    return _worker_handler.handle(request)
+
+
+class ParseService:
+    """asyncio server answering framed JSON requests for one grammar.
+
+    The grammar, LL(1) table, lexer and automata are built once (or loaded
+    from a GrammarCache); every worker process gets a copy at start-up, so a
+    request only costs its own lexing and parsing. Requests are bounded at
+    two points: each connection has at most max_connection_pending requests
+    in flight (the connection is not read any further until the oldest is
+    answered) and the whole service at most max_pending, so a flood of
+    clients waits in the socket buffers instead of in memory. Answers go
+    back in request order.
+    """
+    DEFAULT_MAX_PENDING = 64
+    DEFAULT_MAX_CONNECTION_PENDING = 8
+
+    def __init__(self, grammar_file, workers=None, cache=None,
+                 max_pending=DEFAULT_MAX_PENDING, max_connection_pending=DEFAULT_MAX_CONNECTION_PENDING):
+        """workers defaults to os.cpu_count(); 0 answers requests on a single
+        thread of this process instead of a process pool."""
+        batch = BatchParser(grammar_file, cache)
+        self.handler = RequestHandler(batch.grammar, batch.lexer, batch.dpda, batch.compiled_dpda)
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_pending = max_pending
+        self.max_connection_pending = max_connection_pending
+        self.pool = None
+        self.slots = None
+        self.server = None
+        self.connections = {}  # task serving an open connection -> its writer
+
+    async def start(self, path=None, host='127.0.0.1', port=0):
+        """Listen on the Unix socket path or, without one, on host:port.
+        A stale socket at path is replaced; any other file there is an error."""
+        if path is not None and os.path.lexists(path):
+            if not stat.S_ISSOCK(os.lstat(path).st_mode):
+                raise ValueError(f"{path} exists and is not a socket")
+            os.remove(path)
+        if self.workers == 0:
+            self.pool = ThreadPoolExecutor(max_workers=1, initializer=_init_worker, initargs=(self.handler,))
+        else:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                            initargs=(self.handler,))
+        self.slots = asyncio.Semaphore(self.max_pending)
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self._serve_connection, path=path)
+        else:
+            self.server = await asyncio.start_server(self._serve_connection, host=host, port=port)
+        return self.server
+
+    def address(self):
+        return self.server.sockets[0].getsockname()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        # closing the transports ends every connection as if the client had
+        # hung up: requests already taken are still answered
+        for writer in self.connections.values():
+            writer.close()
+        await asyncio.gather(*self.connections, return_exceptions=True)
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    async def serve_forever(self, path=None, host='127.0.0.1', port=0):
+        await self.start(path, host, port)
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.close()
+
+    async def _serve_connection(self, reader, writer):
+        task = asyncio.current_task()
+        self.connections[task] = writer
+        pending = asyncio.Queue(self.max_connection_pending)
+        responder = asyncio.ensure_future(self._write_responses(pending, writer))
+        try:
+            await self._read_requests(reader, pending, responder)
+            await pending.put(None)
+            await responder
+        finally:
+            responder.cancel()
+            writer.close()
+            self.connections.pop(task, None)
+
+    async def _read_requests(self, reader, pending, responder):
+        loop = asyncio.get_running_loop()
+        try:
+            while not responder.done():
+                try:
+                    request = await read_frame(reader)
+                except (ValueError, asyncio.IncompleteReadError) as e:
+                    # the stream cannot be resynchronized after a bad frame
+                    await pending.put(self._answered({'ok': False, 'error': f"Bad frame: {e}"}))
+                    return
+                if request is None:
+                    return
+                await self.slots.acquire()
+                answer = loop.run_in_executor(self.pool, _handle_in_worker, request)
+                answer.add_done_callback(lambda _: self.slots.release())
+                await pending.put(answer)
+        except ConnectionError:
+            pass
+
+    def _answered(self, response):
+        answer = asyncio.get_running_loop().create_future()
+        answer.set_result(response)
+        return answer
+
+    async def _write_responses(self, pending, writer):
+        while True:
+            answer = await pending.get()
+            if answer is None:
+                return
+            try:
+                response = await answer
+            except Exception as e:  # a worker died or the pool was shut down
+                response = {'ok': False, 'error': f"Worker failed: {e}"}
+            try:
+                writer.write(encode_frame(response))
+            except ValueError as e:
+                writer.write(encode_frame({'ok': False, 'id': response.get('id'), 'error': str(e)}))
+            try:
+                await writer.drain()
+            except ConnectionError:
+                # keep taking answers so the reader is never stuck on a full queue
+                while await pending.get() is not None:
+                    pass
+                return
+
+
+class ParseClient:
+    """Blocking client for a ParseService, one request at a time."""
+
+    def __init__(self, path=None, host='127.0.0.1', port=None, timeout=None):
+        if path is not None:
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.settimeout(timeout)
+            self.socket.connect(path)
+        else:
+            self.socket = socket.create_connection((host, port), timeout=timeout)
+        self.stream = self.socket.makefile('rb')
+
+    def request(self, op, source, **fields):
+        fields['op'] = op
+        fields['source'] = source
+        self.socket.sendall(encode_frame(fields))
+        header = self.stream.read(FRAME_HEADER.size)
+        if len(header) < FRAME_HEADER.size:
+            raise ConnectionError("Service closed the connection")
+        size, = FRAME_HEADER.unpack(header)
+        return json.loads(self.stream.read(size))
+
+    def validate(self, source):
+        return self.request('validate', source)
+
+    def parse(self, source, tree=False):
+        return self.request('parse', source, tree=tree)
+
+    def rename(self, source, renames):
+        return self.request('rename', source, renames=renames)
+
+    def close(self):
+        self.stream.close()
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve parse/validate/rename requests for a grammar")
+    parser.add_argument('--grammar', default='grammar1.txt')
+    parser.add_argument('--socket', help="Unix socket path (default: TCP on --host/--port)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, help="worker processes (default: CPU count, 0: in-process)")
+    parser.add_argument('--max-pending', type=int, default=ParseService.DEFAULT_MAX_PENDING)
+    parser.add_argument('--cache-dir', help="grammar cache directory")
+    args = parser.parse_args()
+
+    cache = GrammarCache(args.cache_dir) if args.cache_dir else None
+    service = ParseService(args.grammar, workers=args.workers, cache=cache, max_pending=args.max_pending)
+    where = args.socket or f"{args.host}:{args.port}"
+    print(f"Serving {args.grammar} on {where} with {service.workers or 'no'} worker process(es)")
+    try:
+        asyncio.run(service.serve_forever(args.socket, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
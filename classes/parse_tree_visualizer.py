@@ -1,22 +1,83 @@
-import graphviz
+import json
+import os
+from collections import deque
+
+from classes.symbol_index import SymbolIndex
+from classes.symbole_table import SymbolTable
+from classes.tree_traversal import iter_preorder
+
+HTML_TEMPLATE = '''<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Parse Tree</title>
+<style>
+body { font-family: monospace; }
+ul { list-style: none; padding-left: 1.4em; }
+span { cursor: pointer; white-space: pre; }
+.terminal { color: #05a; }
+.selected { background: #ffd; }
+.more { color: #888; }
+</style></head>
+<body><ul id="tree"></ul>
+<script>
+const tree = __DATA__;
+// list items are only created when their parent is expanded
+function item(key) {
+  const node = tree.nodes[key];
+  const li = document.createElement('li');
+  const label = document.createElement('span');
+  const expandable = node.children.length > 0 || node.hidden > 0;
+  let open = null;
+  const show = () => { label.textContent = (expandable ? (open ? '\u25be ' : '\u25b8 ') : '  ') + node.label; };
+  label.className = (node.terminal ? 'terminal' : '') + (key === tree.selected ? ' selected' : '');
+  label.onclick = () => {
+    if (open) { open.remove(); open = null; show(); return; }
+    if (!expandable) return;
+    open = document.createElement('ul');
+    for (const child of node.children) open.appendChild(item(child));
+    if (node.hidden) {
+      const more = document.createElement('li');
+      more.className = 'more';
+      more.textContent = '\u2026 ' + node.hidden + ' more';
+      open.appendChild(more);
+    }
+    li.appendChild(open);
+    show();
+  };
+  show();
+  li.appendChild(label);
+  return li;
+}
+document.getElementById('tree').appendChild(item(tree.root));
+</script></body></html>
+'''
 
 class ParseTreeVisualizer:
-    def __init__(self, parse_tree, symbol_table=None):
+    # past this many nodes the whole tree is no longer drawn, only a
+    # bounded view around the selected node (or the root)
+    MAX_RENDER_NODES = 2000
+    DEFAULT_MAX_DEPTH = 12
+    DEFAULT_CONTEXT = 3  # ancestors of the selected node shown above it
+    
+    def __init__(self, parse_tree, symbol_table=None, symbol_index=None):
         self.parse_tree = parse_tree
         self.selected_node = None
         self.symbol_table = symbol_table
+        self.symbol_index = symbol_index
         
     
     def visualize_tree(self, output_path=None):
         if not self.parse_tree:
             print("No parse tree to visualize")
             return
-        self.draw(output_path=output_path)
+        if self.selected_node is not None or len(self._index().nodes) > self.MAX_RENDER_NODES:
+            self.draw_subtree(self.selected_node, output_path=output_path)
+        else:
+            self.draw(output_path=output_path)
 
     def draw(self, filename='parse_tree.png', view=True, output_path=None):
         if not self.parse_tree:
             print("No parse tree to visualize")
             return
+        import graphviz
         dot = graphviz.Digraph(comment='Parse Tree')
         self._add_graphviz_nodes(dot, self.parse_tree)
         dot.format = 'png'
@@ -28,30 +89,164 @@ class ParseTreeVisualizer:
             
         dot.render(full_output_path, view=view, cleanup=True)
 
-    def _add_graphviz_nodes(self, dot, node):
-        label = f"{node.symbol}\\n[{node.id}]"
-        if node.production_rule:
-            label += f"\\n{node.production_rule}"
-        shape = 'ellipse' if node.is_terminal else 'box'
-        color = 'lightblue' if node.is_terminal else 'lightgreen'
-        dot.node(str(node.id), label, shape=shape, style='filled', fillcolor=color)
-        for child in node.children:
-            dot.edge(str(node.id), str(child.id))
-            self._add_graphviz_nodes(dot, child)
-    
-    def _get_all_nodes(self, node):
-        nodes = [node]
-        for child in node.children:
-            nodes.extend(self._get_all_nodes(child))
-        return nodes
+    def _add_graphviz_nodes(self, dot, root):
+        # same statement order as a recursive walk: the edge into a node
+        # comes right before the node itself
+        for node in iter_preorder(root):
+            if node is not root:
+                dot.edge(str(node.parent.id), str(node.id))
+            label = f"{node.symbol}\\n[{node.id}]"
+            if node.production_rule:
+                label += f"\\n{node.production_rule}"
+            shape = 'ellipse' if node.is_terminal else 'box'
+            color = 'lightblue' if node.is_terminal else 'lightgreen'
+            dot.node(str(node.id), label, shape=shape, style='filled', fillcolor=color)
+    
+    def draw_subtree(self, node=None, filename='parse_tree.png', view=True, output_path=None,
+                     max_depth=DEFAULT_MAX_DEPTH, max_nodes=MAX_RENDER_NODES, collapse=True):
+        """Render a bounded view around node (the root by default); the DOT
+        text is streamed to a file next to the image and laid out from there."""
+        if not self.parse_tree:
+            print("No parse tree to visualize")
+            return None
+        full_output_path = f'{output_path}/{filename}' if output_path else filename
+        base, extension = os.path.splitext(full_output_path)
+        image_format = extension[1:] or 'png'
+        dot_path = f'{base}.dot'
+        self.write_dot(dot_path, node, max_depth, max_nodes, collapse)
+        
+        import graphviz
+        image_path = graphviz.render('dot', image_format, dot_path, outfile=f'{base}.{image_format}')
+        if view:
+            graphviz.view(image_path)
+        return image_path
+    
+    def write_dot(self, filename, node=None, max_depth=DEFAULT_MAX_DEPTH, max_nodes=MAX_RENDER_NODES, collapse=True):
+        """Write the bounded view around node as DOT text; returns the number of boxes."""
+        root, selected = self._view_root(node)
+        count = 0
+        with open(filename, 'w', encoding='utf-8') as file:
+            file.write('// Parse Tree\ndigraph {\n')
+            for key, chain, parent_key, hidden in self._bounded_boxes(root, max_depth, max_nodes, collapse):
+                count += 1
+                last = chain[-1]
+                shape = 'ellipse' if last.is_terminal else 'box'
+                color = 'lightblue' if last.is_terminal else 'lightgreen'
+                if selected is not None and any(node is selected for node in chain):
+                    color = 'gold'
+                label = '\\n'.join(self._escape(line) for line in self._box_lines(chain))
+                file.write(f'\t{key} [label="{label}" fillcolor={color} shape={shape} style=filled]\n')
+                if parent_key is not None:
+                    file.write(f'\t{parent_key} -> {key}\n')
+                if hidden:
+                    file.write(f'\tmore{key} [label="\u2026 {hidden} more" shape=plaintext]\n')
+                    file.write(f'\t{key} -> more{key} [style=dashed]\n')
+            file.write('}\n')
+        return count
+    
+    def write_json(self, filename, node=None, max_depth=None, max_nodes=None, collapse=True):
+        """Write the view around node as flat JSON: {root, selected, nodes: {key: box}}.
+        
+        Boxes list their children by key, so deep trees need no nesting.
+        """
+        with open(filename, 'w', encoding='utf-8') as file:
+            json.dump(self._view_data(node, max_depth, max_nodes, collapse), file)
+    
+    def write_html(self, filename, node=None, max_depth=None, max_nodes=None, collapse=True):
+        """Write a standalone HTML page that expands the view around node on click."""
+        data = json.dumps(self._view_data(node, max_depth, max_nodes, collapse)).replace('</', '<\\/')
+        with open(filename, 'w', encoding='utf-8') as file:
+            file.write(HTML_TEMPLATE.replace('__DATA__', data))
+    
+    def _view_data(self, node, max_depth, max_nodes, collapse):
+        root, selected = self._view_root(node)
+        data = {'root': None, 'selected': None, 'nodes': {}}
+        boxes = data['nodes']
+        for key, chain, parent_key, hidden in self._bounded_boxes(root, max_depth, max_nodes, collapse):
+            key = str(key)
+            if parent_key is None:
+                data['root'] = key
+            else:
+                boxes[str(parent_key)]['children'].append(key)
+            if selected is not None and any(node is selected for node in chain):
+                data['selected'] = key
+            boxes[key] = {
+                'ids': [node.id for node in chain],
+                'label': ' '.join(self._box_lines(chain)),
+                'terminal': chain[-1].is_terminal,
+                'children': [],
+                'hidden': hidden,
+            }
+        return data
+    
+    def _view_root(self, node):
+        # (root of the view, node to highlight): a selected node is shown
+        # with a few of its ancestors for context
+        if node is None:
+            return self.parse_tree, None
+        root = node
+        for _ in range(self.DEFAULT_CONTEXT):
+            if root.parent is None:
+                break
+            root = root.parent
+        return root, node
+    
+    def _visible_children(self, node, collapse):
+        if not collapse:
+            return node.children
+        return [child for child in node.children if not (child.is_terminal and child.symbol == 'ε')]
+    
+    def _bounded_boxes(self, root, max_depth, max_nodes, collapse):
+        # Breadth-first (key, chain, parent key, hidden children count).
+        # With collapse, epsilon leaves are dropped and every run of nodes
+        # with a single child becomes one box (its chain). A box's children
+        # are only queued while they fit in max_nodes, so the nearest levels
+        # are shown first and the hidden count is known when it is yielded.
+        queue = deque([(root, None, 0)])
+        reserved = 1
+        while queue:
+            node, parent_key, depth = queue.popleft()
+            chain = [node]
+            children = self._visible_children(node, collapse)
+            while collapse and len(children) == 1:
+                node = children[0]
+                chain.append(node)
+                children = self._visible_children(node, collapse)
+            
+            key = chain[0].id
+            shown = len(children)
+            if max_depth is not None and depth >= max_depth:
+                shown = 0
+            if max_nodes is not None:
+                shown = max(0, min(shown, max_nodes - reserved))
+            reserved += shown
+            for child in children[:shown]:
+                queue.append((child, key, depth + 1))
+            yield key, chain, parent_key, len(children) - shown
+    
+    def _box_lines(self, chain):
+        if len(chain) == 1:
+            node = chain[0]
+            lines = [node.symbol, f'[{node.id}]']
+            if node.production_rule:
+                lines.append(node.production_rule)
+            return lines
+        return [' / '.join(node.symbol for node in chain), f'[{chain[0].id}..{chain[-1].id}]']
+    
+    def _escape(self, text):
+        return text.replace('\\', '\\\\').replace('"', '\\"')
+    
+    def _index(self):
+        if self.symbol_index is None:
+            self.symbol_index = SymbolIndex(self.parse_tree, self.symbol_table or SymbolTable())
+        return self.symbol_index
     
     def select_node_by_id(self, node_id):
-        all_nodes = self._get_all_nodes(self.parse_tree)
-        for node in all_nodes:
-            if node.id == node_id:
-                self.select_node(node)
-                return True
-        return False
+        node = self._index().node(node_id)
+        if node is None:
+            return False
+        self.select_node(node)
+        return True
     
     def select_node(self, node):
         self.selected_node = node
@@ -66,20 +261,19 @@ class ParseTreeVisualizer:
         print(f"Is Leaf: {len(node.children) == 0}")
         
         if self.symbol_table:
-            if node.id in self.symbol_table.declarations:
-                decl = self.symbol_table.declarations[node.id]
-                print(f"Symbol Info: DECLARATION of '{decl['name']}' in scope {decl['scope_id']}")
-                print(f"References: {decl['references']}")
-            elif node.id in self.symbol_table.references:
-                ref = self.symbol_table.references[node.id]
-                print(f"Symbol Info: REFERENCE to '{ref['name']}' (declared at node {ref['declaration_node_id']})")
+            info = self._index().symbol_info(node.id)
+            if info['type'] == 'declaration':
+                print(f"Symbol Info: DECLARATION of '{info['name']}' in scope {info['scope_id']}")
+                print(f"References: {info['references']}")
+            elif info['type'] == 'reference':
+                print(f"Symbol Info: REFERENCE to '{info['name']}' (declared at node {info['declaration_node_id']})")
             else:
                 print("Symbol Info: Not a symbol")
         
         print("=" * 35)
     
     def list_all_nodes(self):
-        all_nodes = self._get_all_nodes(self.parse_tree)
+        all_nodes = self._index().nodes.values()
         print("\n=== All Nodes in Parse Tree ===")
         for node in all_nodes:
             node_type = "Terminal" if node.is_terminal else "Non-terminal"
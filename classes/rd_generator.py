@@ -0,0 +1,251 @@
+import hashlib
+import importlib.util
+import os
+import re
+
+
+class RecursiveDescentGenerator:
+    """Writes a standalone recursive-descent parser for an LL(1) table.
+
+    The generated module has one method per non-terminal that picks a
+    production with an if/elif over integer token codes (the table row,
+    i.e. FIRST of each production plus FOLLOW for the nullable ones) and
+    builds the same ParseTreeNode tree, node ids included, as
+    DPDA.process_input_with_tree. A production ending in its own
+    non-terminal (Statements -> Statement Statements) loops instead of
+    recursing, so only nesting adds Python frames.
+
+    Modules are cached by a digest of the table and VERSION: load()
+    reuses a file generated earlier for the same table. Input nested
+    deeper than the recursion limit is rejected with an error rather than
+    parsed; DPDA.process_input_with_tree handles any depth.
+    """
+    UNKNOWN = -1
+    # part of the digest: bump it whenever the generated code changes, so
+    # modules cached by an older generator are not reused
+    VERSION = 3
+
+    def __init__(self, ll1_parser):
+        self.grammar = ll1_parser.grammar
+        self.parse_table = ll1_parser.get_parse_table()
+        self.terminals = sorted(self.grammar.terminals)
+        self.codes = {terminal: code for code, terminal in enumerate(self.terminals)}
+        self.end_code = len(self.terminals)
+        self.method_names = self._method_names()
+
+    def _method_names(self):
+        names = {}
+        used = set()
+        for non_terminal in sorted(self.grammar.non_terminals):
+            name = 'parse_' + re.sub(r'\W', '_', non_terminal)
+            while name in used:
+                name += '_'
+            used.add(name)
+            names[non_terminal] = name
+        return names
+
+    def digest(self):
+        table = sorted((key, tuple(production)) for key, production in self.parse_table.items())
+        return hashlib.sha256(repr((self.VERSION, self.grammar.start_symbol, table)).encode()).hexdigest()
+
+    def generate(self):
+        """Source text of the parser module."""
+        lines = [
+            '# Generated by RecursiveDescentGenerator; do not edit.',
+            f'# table digest: {self.digest()}',
+            'import gc',
+            '',
+            'from classes.dpda import ParseTreeNode',
+            '',
+            f'START_SYMBOL = {self.grammar.start_symbol!r}',
+            f'TERMINALS = {tuple(self.terminals)!r}',
+            f'END = {self.end_code}',
+            f'UNKNOWN = {self.UNKNOWN}',
+            "CODES = {terminal: code for code, terminal in enumerate(TERMINALS)}",
+            "CODES['$'] = END",
+            '',
+            '',
+            'class ParseError(Exception):',
+            '    pass',
+            '',
+            '',
+            RUNTIME.replace('__START_METHOD__', self.method_names[self.grammar.start_symbol]),
+        ]
+        for non_terminal in sorted(self.grammar.non_terminals):
+            lines.append(self._generate_method(non_terminal))
+        lines.append(ENTRY_POINT)
+        return '\n'.join(lines)
+
+    def _row(self, non_terminal):
+        # [(production, lookahead codes)] in grammar order
+        lookaheads = {}
+        for (row_non_terminal, terminal), production in self.parse_table.items():
+            if row_non_terminal == non_terminal:
+                code = self.end_code if terminal == '$' else self.codes[terminal]
+                lookaheads.setdefault(tuple(production), []).append(code)
+        row = []
+        for production in self.grammar.get_productions(non_terminal):
+            codes = lookaheads.pop(tuple(production), None)
+            if codes is not None:
+                row.append((tuple(production), sorted(codes)))
+        # table entries whose production is no longer in the grammar
+        row.extend((production, sorted(codes)) for production, codes in lookaheads.items())
+        return row
+
+    def _generate_method(self, non_terminal):
+        row = self._row(non_terminal)
+        loops = any(production and production[-1] == non_terminal for production, _ in row)
+        indent = ' ' * (12 if loops else 8)
+        body = [f'    def {self.method_names[non_terminal]}(self, node):']
+        if loops:
+            body.append('        while True:')
+        body.append(f'{indent}code = self.code')
+        for index, (production, codes) in enumerate(row):
+            keyword = 'if' if index == 0 else 'elif'
+            condition = f'code == {codes[0]}' if len(codes) == 1 else f"code in {{{', '.join(map(str, codes))}}}"
+            body.append(f'{indent}{keyword} {condition}:')
+            body.extend(indent + '    ' + line for line in self._generate_production(non_terminal, production, loops))
+        if row:
+            body.append(f'{indent}else:')
+            body.append(f'{indent}    self.no_entry({non_terminal!r})')
+        else:
+            body.append(f'{indent}self.no_entry({non_terminal!r})')
+        return '\n'.join(body) + '\n'
+
+    def _generate_production(self, non_terminal, production, loops):
+        rule = f"{non_terminal} -> {' '.join(production) if production else 'ε'}"
+        lines = [f'node.production_rule = {rule!r}']
+        if not production:
+            lines.append("node.add_child(ParseTreeNode('ε', True))")
+            if loops:
+                lines.append('return')
+            return lines
+
+        children = [f'c{index}' for index in range(len(production))]
+        for child, symbol in zip(children, production):
+            is_terminal = symbol in self.grammar.terminals
+            lines.append(f'{child} = ParseTreeNode({symbol!r}{", True" if is_terminal else ""})')
+        lines.append(f"{' = '.join(child + '.parent' for child in children)} = node")
+        lines.append(f"node.children = [{', '.join(children)}]")
+
+        tail = len(production) - 1 if loops and production[-1] == non_terminal else None
+        for index, (child, symbol) in enumerate(zip(children, production)):
+            if index == tail:
+                lines.append(f'node = {child}')
+                lines.append('continue')
+            elif symbol in self.grammar.terminals:
+                # the first terminal is the lookahead that chose this branch
+                if index > 0:
+                    lines.append(f'if self.code != {self.codes[symbol]}:')
+                    lines.append(f'    self.unexpected({symbol!r})')
+                lines.append(f'self.shift({child})')
+            elif symbol in self.grammar.non_terminals:
+                lines.append(f'self.{self.method_names[symbol]}({child})')
+            else:
+                lines.append(f'self.unexpected({symbol!r})')
+        if loops and tail is None:
+            lines.append('return')
+        return lines
+
+    def write(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            file.write(self.generate())
+        os.replace(temporary, path)
+        return path
+
+    def load(self, cache_dir='.ll1_cache'):
+        """Import the parser for this table, generating it on a cache miss."""
+        path = os.path.join(cache_dir, f'rd_parser_{self.digest()[:32]}.py')
+        if not os.path.exists(path):
+            self.write(path)
+        return self.import_module(path)
+
+    @staticmethod
+    def import_module(path):
+        name = os.path.splitext(os.path.basename(path))[0]
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+
+
+RUNTIME = '''class Parser:
+    def __init__(self, token_types, lexemes=None, tokens=None):
+        self.token_types = list(token_types)
+        self.codes = [CODES.get(token_type, UNKNOWN) for token_type in self.token_types]
+        self.codes.append(END)
+        self.position = 0
+        self.code = self.codes[0]
+        self.tree = None
+        self.error = None
+        self.lexemes = lexemes
+        self.tokens = tokens
+        if tokens is not None:
+            self.shift = self.shift_token
+        elif lexemes is not None:
+            self.shift = self.shift_lexeme
+
+    def parse(self):
+        """True when the input is accepted; tree and error are set either way."""
+        ParseTreeNode.node_counter = 0
+        self.tree = ParseTreeNode(START_SYMBOL)
+        # the tree only grows while parsing, so cyclic GC passes over it
+        # would find nothing to free
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            self.__START_METHOD__(self.tree)
+            if self.code != END:
+                raise ParseError(f"Unexpected {self.found()!r} after the end of {START_SYMBOL}")
+        except ParseError as e:
+            self.error = str(e)
+            return False
+        except RecursionError:
+            # every nesting level is a Python frame; the DPDA has no such limit
+            self.error = f"Input nested too deeply at token {self.position}"
+            return False
+        finally:
+            if collecting:
+                gc.enable()
+        return True
+
+    def found(self):
+        return self.token_types[self.position] if self.position < len(self.token_types) else '$'
+
+    def no_entry(self, non_terminal):
+        raise ParseError(f"No parse table entry for ({non_terminal}, {self.found()}) at token {self.position}")
+
+    def unexpected(self, terminal):
+        raise ParseError(f"Expected {terminal!r} but found {self.found()!r} at token {self.position}")
+
+    def shift(self, node):
+        self.position += 1
+        self.code = self.codes[self.position]
+
+    def shift_lexeme(self, node):
+        position = self.position
+        if position < len(self.lexemes):
+            node.symbol = self.lexemes[position]
+        self.position = position + 1
+        self.code = self.codes[position + 1]
+
+    def shift_token(self, node):
+        position = self.position
+        if position < len(self.tokens):
+            node.set_token(self.tokens[position])
+        self.position = position + 1
+        self.code = self.codes[position + 1]
+'''
+
+ENTRY_POINT = '''
+
+def parse(token_types, lexemes=None, tokens=None):
+    """Returns (accepted, tree, error message); a rejected input keeps the partial tree."""
+    parser = Parser(token_types, lexemes, tokens)
+    accepted = parser.parse()
+    return accepted, parser.tree, parser.error
+'''
@@ -1,12 +1,23 @@
 import re
 from classes.symbole_table import SymbolTable
+from classes.tree_traversal import walk
 
 class ScopeAnalyzer:
-    def __init__(self, parse_tree, grammar):
+    FUNCTION_SCOPE_SYMBOLS = frozenset([
+        'Function', 'FunctionDeclaration', 'Procedure', 'Method',
+        'Program', 'Module', 'Namespace', 'Class'
+    ])
+    ASSIGNMENT_SYMBOLS = frozenset(['=', 'EQUALS', 'ASSIGN'])
+    
+    def __init__(self, parse_tree, grammar, verbose=True):
         self.parse_tree = parse_tree
         self.grammar = grammar
+        self.verbose = verbose  # report the detected variable terminals
         self.symbol_table = SymbolTable()
         self.variable_terminals = self._detect_variable_terminals()
+        self.variable_matchers = self._compile_variable_matchers()
+        self.variable_values = {}  # lexeme -> matches a variable pattern
+        self.rule_symbols = {}  # production rule string -> its right-hand side
     
     def _detect_variable_terminals(self):
         variable_terminals = set()
@@ -17,10 +28,11 @@ class ScopeAnalyzer:
             
             if any(keyword in terminal_lower for keyword in identifier_keywords):
                 variable_terminals.add(terminal)
-                pattern = self.grammar.terminal_patterns.get(terminal, 'unknown')
-                print(f"Detected variable terminal by name: {terminal} with pattern: {pattern}")
+                if self.verbose:
+                    pattern = self.grammar.terminal_patterns.get(terminal, 'unknown')
+                    print(f"Detected variable terminal by name: {terminal} with pattern: {pattern}")
         
-        if not variable_terminals:
+        if not variable_terminals and self.verbose:
             print("No variable terminals detected.")
             print("Available terminals and their patterns:")
             for terminal, pattern in self.grammar.terminal_patterns.items():
@@ -28,57 +40,66 @@ class ScopeAnalyzer:
         
         return variable_terminals
     
+    def _compile_variable_matchers(self):
+        matchers = []
+        for terminal in self.variable_terminals:
+            pattern = self.grammar.terminal_patterns.get(terminal)
+            if pattern:
+                try:
+                    matchers.append(re.compile(pattern.replace(' ', '')).fullmatch)
+                except re.error:
+                    continue
+        return matchers
+    
     def analyze(self):
         if not self.variable_terminals:
-            print("No variable terminals detected in grammar")
+            if self.verbose:
+                print("No variable terminals detected in grammar")
             return self.symbol_table
         
-        print(f"Using variable terminals: {self.variable_terminals}")
+        if self.verbose:
+            print(f"Using variable terminals: {self.variable_terminals}")
         self._analyze_with_scopes(self.parse_tree)
         
         return self.symbol_table
     
-    def _analyze_with_scopes(self, node):
-        if not self.symbol_table.scopes:
-            self.symbol_table.enter_scope('global')
-        
-        # if this node creates a new scope
-        if self._creates_new_scope(node):
-            scope_type = self._get_scope_type(node)
-            self.symbol_table.enter_scope(scope_type, node)
+    def _analyze_with_scopes(self, root):
+        symbol_table = self.symbol_table
+        if not symbol_table.scopes:
+            symbol_table.enter_scope('global')
+        variable_terminals = self.variable_terminals
+        
+        for node, index, entering in walk(root, self._creates_new_scope):
+            if not entering:
+                symbol_table.exit_scope()
+                continue
             
-            for child in node.children:
-                self._analyze_with_scopes(child)
+            if not node.is_terminal:
+                # if this node creates a new scope
+                if node.symbol in self.FUNCTION_SCOPE_SYMBOLS:
+                    symbol_table.enter_scope(self._get_scope_type(node), node)
+                continue
             
-            self.symbol_table.exit_scope()
-        else:
             # if this node is a variable declaration or reference
-            if self._is_variable_node(node):
-                var_name = self._extract_variable_name(node)
-                if var_name:
-                    # Determine if this is a declaration or reference based on context
-                    if self._is_declaration_context(node):
-                        self.symbol_table.declare_symbol(var_name, node.id, node)
-                    else:
-                        # This is a reference - look for declaration in current and parent scopes
-                        declaration_id = self.symbol_table.reference_symbol(var_name, node.id, node)
-                        if not declaration_id:
-                            self.symbol_table.declare_symbol(var_name, node.id, node)
-            
-            for child in node.children:
-                self._analyze_with_scopes(child)
+            token = node.token
+            if token is not None:
+                if token.type not in variable_terminals:
+                    continue
+            elif not self._is_variable_node(node, index):
+                continue
+            var_name = node.symbol
+            # Determine if this is a declaration or reference based on context
+            if self._is_declaration_context(node, index):
+                symbol_table.declare_symbol(var_name, node.id, node)
+            else:
+                # This is a reference - look for declaration in current and parent scopes
+                declaration_id = symbol_table.reference_symbol(var_name, node.id, node)
+                if not declaration_id:
+                    symbol_table.declare_symbol(var_name, node.id, node)
     
     def _creates_new_scope(self, node):
-        if node.is_terminal:
-            return False
-        
-        # Only create new scopes for functions/procedures, not for control flow blocks
-        function_scope_symbols = [
-            'Function', 'FunctionDeclaration', 'Procedure', 'Method',
-            'Program', 'Module', 'Namespace', 'Class'
-        ]
-        
-        return node.symbol in function_scope_symbols
+        # Only functions/procedures open scopes, not control flow blocks
+        return not node.is_terminal and node.symbol in self.FUNCTION_SCOPE_SYMBOLS
     
     def _get_scope_type(self, node):
         symbol_lower = node.symbol.lower()
@@ -92,67 +113,56 @@ class ScopeAnalyzer:
         else:
             return 'function'  # Default to function scope
     
-    def _is_declaration_context(self, node):
+    def _is_declaration_context(self, node, index):
         if not node.parent:
             return True  
         
-        parent = node.parent
+        siblings = node.parent.children
         
-        # Check if this is an assignment (left side of =)
-        if parent and len(parent.children) >= 2:
-            siblings = parent.children
-            try:
-                node_index = siblings.index(node)
-                
-                # If next sibling is assignment operator, this is a declaration/assignment
-                if (node_index + 1 < len(siblings) and 
-                    siblings[node_index + 1].symbol in ['=', 'EQUALS', 'ASSIGN']):
-                    
-                    # Check if this variable name already exists in current function scope
-                    var_name = self._extract_variable_name(node)
-                    if var_name and self.symbol_table.scopes:
-                        current_scope = self.symbol_table.scopes[-1]
-                        return var_name not in current_scope['symbols']
-                    return True
-            except ValueError:
-                pass
+        # If next sibling is assignment operator, this is a declaration/assignment
+        if index + 1 < len(siblings) and self._is_assignment(siblings[index + 1], index + 1):
+            # Check if this variable name already exists in current function scope
+            if self.symbol_table.scopes:
+                current_scope = self.symbol_table.scopes[-1]
+                return node.symbol not in current_scope['symbols']
+            return True
         
         return False
     
-    def _is_variable_node(self, node):
+    def _is_assignment(self, node, index):
+        return (node.symbol in self.ASSIGNMENT_SYMBOLS or
+                self._terminal_type(node, index) in self.ASSIGNMENT_SYMBOLS)
+    
+    def _is_variable_node(self, node, index):
         if not node.is_terminal:
             return False
         
-        if node.symbol in self.variable_terminals:
-            return True
+        terminal = self._terminal_type(node, index)
+        if terminal is not None:
+            return terminal in self.variable_terminals
         
-        if self._is_variable_value(node.symbol):
+        # no grammar symbol to go by (a hand-built tree), so recognize the lexeme
+        if node.symbol in self.variable_terminals:
             return True
-        return False
+        return self._is_variable_value(node.symbol)
     
-    def _is_variable_value(self, symbol):
-        for terminal in self.variable_terminals:
-            pattern = self.grammar.terminal_patterns.get(terminal)
-            if pattern:
-                try:
-                    clean_pattern = pattern.replace(' ', '')
-                    compiled_pattern = re.compile(f'^{clean_pattern}$')
-                    if compiled_pattern.match(symbol):
-                        return True
-                    if compiled_pattern.match(symbol):
-                        return True
-                except re.error:
-                    continue
-        
-        return False
+    def _terminal_type(self, node, index):
+        # the lexer's token type when the tree was parsed from tokens,
+        # otherwise the symbol at node's position in its parent's production
+        if node.token is not None:
+            return node.token.type
+        parent = node.parent
+        if parent is None or not parent.production_rule:
+            return None
+        symbols = self.rule_symbols.get(parent.production_rule)
+        if symbols is None:
+            symbols = parent.production_rule.split(' -> ', 1)[1].split()
+            self.rule_symbols[parent.production_rule] = symbols
+        return symbols[index] if index < len(symbols) else None
     
-    def _extract_variable_name(self, node):
-        if node.is_terminal:
-            if self._is_variable_value(node.symbol):
-                return node.symbol
-        
-            if node.symbol in self.variable_terminals:
-                return node.symbol
-        
-        return None
-
+    def _is_variable_value(self, symbol):
+        matched = self.variable_values.get(symbol)
+        if matched is None:
+            matched = any(matcher(symbol) for matcher in self.variable_matchers)
+            self.variable_values[symbol] = matched
+        return matched
@@ -0,0 +1,75 @@
+from classes.tree_traversal import iter_preorder
+
+
+class SymbolIndex:
+    """Lookups over a parse tree and its symbol table, built once after analysis.
+
+    node id -> node, symbol name -> declarations, scope id -> declarations
+    and declaration -> references are all plain dict lookups, so the
+    interactive session never has to walk the tree again.
+    """
+
+    def __init__(self, parse_tree, symbol_table):
+        self.parse_tree = parse_tree
+        self.symbol_table = symbol_table
+        self.nodes = {}  # node id -> node, in preorder
+        self.declarations_by_name = {}  # name -> declaration node ids, in tree order
+        self.declarations_by_scope = {}  # scope id -> declaration node ids, in tree order
+        self._index_nodes()
+        self._index_declarations()
+
+    def _index_nodes(self):
+        if self.parse_tree is None:
+            return
+        nodes = self.nodes
+        for node in iter_preorder(self.parse_tree):
+            nodes[node.id] = node
+
+    def _index_declarations(self):
+        for node_id, declaration in self.symbol_table.declarations.items():
+            self.declarations_by_name.setdefault(declaration['name'], []).append(node_id)
+            self.declarations_by_scope.setdefault(declaration['scope_id'], []).append(node_id)
+
+    def node(self, node_id):
+        return self.nodes.get(node_id)
+
+    def declaration_of(self, node_id):
+        """Declaration node id for a declaration or reference node, else None."""
+        if node_id in self.symbol_table.declarations:
+            return node_id
+        reference = self.symbol_table.references.get(node_id)
+        return reference['declaration_node_id'] if reference else None
+
+    def references_of(self, declaration_node_id):
+        declaration = self.symbol_table.declarations.get(declaration_node_id)
+        return declaration['references'] if declaration else []
+
+    def declarations_named(self, name):
+        return self.declarations_by_name.get(name, [])
+
+    def declarations_in_scope(self, scope_id):
+        return self.declarations_by_scope.get(scope_id, [])
+
+    def scope(self, scope_id):
+        return self.symbol_table.all_scopes.get(scope_id)
+
+    def symbol_info(self, node_id):
+        info = {}
+        
+        if node_id in self.symbol_table.declarations:
+            decl = self.symbol_table.declarations[node_id]
+            info['type'] = 'declaration'
+            info['name'] = decl['name']
+            info['scope_id'] = decl['scope_id']
+            info['references'] = decl['references']
+        
+        elif node_id in self.symbol_table.references:
+            ref = self.symbol_table.references[node_id]
+            info['type'] = 'reference'
+            info['name'] = ref['name']
+            info['declaration_node_id'] = ref['declaration_node_id']
+        
+        else:
+            info['type'] = 'not_symbol'
+        
+        return info
@@ -1,13 +1,55 @@
 import re
 
+from classes.symbol_index import SymbolIndex
+
 class SymbolRenamer:
-    def __init__(self, parse_tree, symbol_table, lexer):
+    def __init__(self, parse_tree, symbol_table, lexer, symbol_index=None):
         self.parse_tree = parse_tree
         self.symbol_table = symbol_table
         self.lexer = lexer
+        self.symbol_index = symbol_index
         self.original_tokens = []
     
     def rename_symbol(self, target_node_id, new_name):
+        declaration_node_id = self._resolve_declaration(target_node_id, new_name)
+        declaration_info = self.symbol_table.declarations[declaration_node_id]
+        occurrences = 1 + len(declaration_info['references'])
+        print(f"Renaming '{declaration_info['name']}' to '{new_name}' ({occurrences} occurrences)")
+        return self._apply_renames({declaration_node_id: new_name})
+
+    def rename_symbols(self, renames):
+        """Apply several renames in one pass; renames maps a declaration or
+        reference node id to the new name of its symbol.
+
+        The edits come straight from the symbol table's declaration and
+        reference lists. When the tree was parsed from lexer tokens they are
+        spliced into the original text, which keeps its formatting;
+        otherwise the source is rebuilt from the leaves.
+        """
+        new_names = {}  # declaration node id -> new name
+        for target_node_id, new_name in renames.items():
+            declaration_node_id = self._resolve_declaration(target_node_id, new_name)
+            if new_names.setdefault(declaration_node_id, new_name) != new_name:
+                name = self.symbol_table.declarations[declaration_node_id]['name']
+                raise ValueError(f"Conflicting new names for '{name}': "
+                                 f"'{new_names[declaration_node_id]}' and '{new_name}'")
+        return self._apply_renames(new_names)
+
+    def _apply_renames(self, new_names):
+        # new_names maps resolved declaration node ids to their new names
+        edits = self._collect_edits(new_names)
+        if edits is not None:
+            source, edits = edits
+            return source.splice(edits)
+
+        renamed_nodes = {}
+        for declaration_node_id, new_name in new_names.items():
+            declaration_info = self.symbol_table.declarations[declaration_node_id]
+            for node_id in [declaration_node_id] + declaration_info['references']:
+                renamed_nodes[node_id] = new_name
+        return self._reconstruct_source_with_rename(self.parse_tree.get_leaves(), renamed_nodes)
+
+    def _resolve_declaration(self, target_node_id, new_name):
         if new_name in {'function', 'return'}:
             raise ValueError(f"Renaming to '{new_name}' is not allowed (reserved keyword)")
 
@@ -32,34 +74,41 @@ class SymbolRenamer:
         if declaration_info['name'] in {'function', 'return'}:
             raise ValueError(f"Renaming symbol '{declaration_info['name']}' is not allowed (reserved keyword)")
 
-        nodes_to_rename = [declaration_node_id] + declaration_info['references']
-        
-        print(f"Renaming '{declaration_info['name']}' to '{new_name}' in nodes: {nodes_to_rename}")
-        
-        leaves = self.parse_tree.get_leaves()
-        
-        return self._reconstruct_source_with_rename(leaves, nodes_to_rename, new_name)
+        # the new name has to lex as one token of the old name's terminal,
+        # so grammar keywords such as 'while' are refused
+        old_types = self.lexer.lex(declaration_info['name']).types
+        if self.lexer.lex(new_name).types != old_types:
+            raise ValueError(f"Renaming to '{new_name}' is not allowed (it does not lex as the same token type "
+                             f"as '{declaration_info['name']}')")
+
+        return declaration_node_id
+
+    def _collect_edits(self, new_names):
+        # (source, [(start, end, new name), ...]) or None when some renamed
+        # node has no token to say where it is in the text
+        source = None
+        edits = []
+        declarations = self.symbol_table.declarations
+        references = self.symbol_table.references
+        for declaration_node_id, new_name in new_names.items():
+            declaration_info = declarations[declaration_node_id]
+            nodes = [declaration_info['node']]
+            nodes.extend(references[node_id]['node'] for node_id in declaration_info['references'])
+            for node in nodes:
+                token = node.token
+                if token is None or (source is not None and token.source is not source):
+                    return None
+                source = token.source
+                if node.symbol not in {'function', 'return'}:
+                    edits.append((token.start, token.end, new_name))
+        if source is None:
+            return None
+        return source, edits
     
     def get_symbol_info(self, node_id):
-        info = {}
-        
-        if node_id in self.symbol_table.declarations:
-            decl = self.symbol_table.declarations[node_id]
-            info['type'] = 'declaration'
-            info['name'] = decl['name']
-            info['scope_id'] = decl['scope_id']
-            info['references'] = decl['references']
-        
-        elif node_id in self.symbol_table.references:
-            ref = self.symbol_table.references[node_id]
-            info['type'] = 'reference'
-            info['name'] = ref['name']
-            info['declaration_node_id'] = ref['declaration_node_id']
-        
-        else:
-            info['type'] = 'not_symbol'
-        
-        return info
+        if self.symbol_index is None:
+            self.symbol_index = SymbolIndex(self.parse_tree, self.symbol_table)
+        return self.symbol_index.symbol_info(node_id)
     
     def save_renamed_code_to_file(self, target_node_id, new_name, output_filename, prefix_address="E:\IUST\Term4\TLA-Entezari\Project"):
         try:
@@ -80,7 +129,7 @@ class SymbolRenamer:
     def _is_valid_identifier(self, name):
         return bool(re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*$', name))
     
-    def _reconstruct_source_with_rename(self, leaves, nodes_to_rename, new_name):
+    def _reconstruct_source_with_rename(self, leaves, renamed_nodes):
         result = []
 
         for leaf in leaves:
@@ -88,9 +137,8 @@ class SymbolRenamer:
                 continue
 
             # Prevent renaming of 'function' and 'return' in the leaves
-            if leaf.id in nodes_to_rename and leaf.symbol not in {'function', 'return'}:
-                result.append(new_name)
-                print(f"Renamed node {leaf.id}: '{leaf.symbol}' -> '{new_name}'")
+            if leaf.id in renamed_nodes and leaf.symbol not in {'function', 'return'}:
+                result.append(renamed_nodes[leaf.id])
             else:
                 result.append(leaf.symbol)
 
@@ -4,6 +4,7 @@ class SymbolTable:
         self.declarations = {}  # Maps node_id to declaration info
         self.references = {}  # Maps node_id to reference info
         self.scope_counter = 0
+        self.all_scopes = {}  # scope id -> scope, kept after the scope is exited
     
     def enter_scope(self, scope_type, scope_node=None):
         self.scope_counter += 1
@@ -15,6 +16,7 @@ class SymbolTable:
             'parent': self.scopes[-1]['id'] if self.scopes else None
         }
         self.scopes.append(scope)
+        self.all_scopes[scope['id']] = scope
         return scope['id']
     
     def exit_scope(self):
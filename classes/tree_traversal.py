@@ -0,0 +1,70 @@
+"""Explicit-stack traversals of parse trees.
+
+Right-recursive lists (Statements -> Statement Statements) make trees as
+deep as the input is long, so nothing here recurses; every traversal is a
+generator and builds no intermediate lists.
+"""
+
+
+def iter_preorder(root):
+    pending = [root]
+    pop = pending.pop
+    extend = pending.extend
+    while pending:
+        node = pop()
+        yield node
+        children = node.children
+        if children:
+            extend(reversed(children))
+
+
+def iter_postorder(root):
+    # (node, children done) pairs; a node is yielded once its subtree has been
+    pending = [(root, False)]
+    pop = pending.pop
+    push = pending.append
+    while pending:
+        node, expanded = pop()
+        if expanded or not node.children:
+            yield node
+            continue
+        push((node, True))
+        children = node.children
+        for index in range(len(children) - 1, -1, -1):
+            push((children[index], False))
+
+
+def iter_leaves(root):
+    pending = [root]
+    pop = pending.pop
+    extend = pending.extend
+    while pending:
+        node = pop()
+        children = node.children
+        if children:
+            extend(reversed(children))
+        else:
+            yield node
+
+
+def walk(root, exit_when=None):
+    """Preorder (node, index, entering) events, index being the node's
+    position among its parent's children (0 for root).
+
+    For nodes where exit_when(node) is true, a second (node, index, False)
+    event follows the last event of their subtree.
+    """
+    pending = [(root, 0, True)]
+    pop = pending.pop
+    push = pending.append
+    while pending:
+        event = pop()
+        yield event
+        node, _, entering = event
+        if not entering:
+            continue
+        if exit_when is not None and exit_when(node):
+            push((node, event[1], False))
+        children = node.children
+        for index in range(len(children) - 1, -1, -1):
+            push((children[index], index, True))
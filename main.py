@@ -1,7 +1,9 @@
 import os
+import sys
 from classes.grammar import Grammar
 from classes.scope_analyzer import ScopeAnalyzer
 from classes.symbole_renamer import SymbolRenamer
+from classes.symbol_index import SymbolIndex
 from classes.parse_tree_visualizer import ParseTreeVisualizer
 from classes.lexer import Lexer
 from classes.ll1_parser import LL1Parser
@@ -33,7 +35,11 @@ def main():
     print()
     
     try:
-        ll1_parser = LL1Parser(grammar)
+        try:
+            ll1_parser = LL1Parser(grammar)
+        except ValueError:
+            LL1Parser(grammar, strict=False).print_conflicts()
+            raise
         print("=== Parse Table ===")
         ll1_parser.print_parse_table()
         print()
@@ -61,31 +67,24 @@ def main():
         lexer = Lexer(grammar)
 
         with open(input_file, 'r') as file:
-            test_input = file.read()
-        test_input = test_input.strip()
-        if not test_input:
+            tokens = lexer.lex(file.read())
+        if not tokens:
             raise ValueError("Input file is empty or contains only whitespace.")
-        print(f"Input: {test_input}")
-        tokens = lexer.tokenize(test_input)
+        print(f"Input: {input_file}")
         print("Tokens:")
-        for token_type, token_value in tokens:
-            print(f"  {token_type}: '{token_value}'")
+        for token in tokens:
+            print(f"  {token.type}: '{token.lexeme}'")
+        for token in tokens:
+            if token.type == 'ERROR':
+                print(f"Unrecognized character '{token.lexeme}' at line {token.line}, column {token.column}")
         print()
         
         print("=== DPDA Test with Parse Tree ===")
-        token_string = [token_type for token_type, _ in tokens if token_type != 'ERROR'] + ['$']
+        tokens = tokens.without('ERROR')
+        token_string = tokens.types + ['$']
         print(f"Token sequence: {' '.join(token_string)}")
         
-        lexeme_values = {}
-        for token_type, token_value in tokens:
-            if token_type != 'ERROR':
-                if token_type not in lexeme_values:
-                    lexeme_values[token_type] = []
-                lexeme_values[token_type].append(token_value)
-        
-        dpda.current_lexeme_values = lexeme_values
-        
-        accepted, trace, parse_tree = dpda.process_input_with_tree(token_string)
+        accepted, trace, parse_tree = dpda.process_input_with_tree(token_string, tokens=tokens)
         print("DPDA Execution Trace:")
         for step in trace:
             print(f"  {step}")
@@ -93,12 +92,13 @@ def main():
         if parse_tree:
             analyzer = ScopeAnalyzer(parse_tree, grammar)
             symbol_table = analyzer.analyze()
+            symbol_index = SymbolIndex(parse_tree, symbol_table)
             
-            visualizer = ParseTreeVisualizer(parse_tree, symbol_table)
+            visualizer = ParseTreeVisualizer(parse_tree, symbol_table, symbol_index)
             
             # visualizer.list_all_nodes()
             
-            renamer = SymbolRenamer(parse_tree, symbol_table, lexer)
+            renamer = SymbolRenamer(parse_tree, symbol_table, lexer, symbol_index)
             
             while True:
                 try:
@@ -111,7 +111,7 @@ def main():
                     elif choice.lower() == 'r':
                         try:
                             node_id = int(input("Enter node ID to rename: "))
-                            symbol_info = renamer.get_symbol_info(node_id)
+                            symbol_info = symbol_index.symbol_info(node_id)
                             
                             if symbol_info['type'] == 'not_symbol':
                                 print(f"Node {node_id} is not a symbol (identifier/variable)")
@@ -142,7 +142,7 @@ def main():
                     elif choice.lower() == 's':
                         try:
                             node_id = int(input("Enter node ID to rename: "))
-                            symbol_info = renamer.get_symbol_info(node_id)
+                            symbol_info = symbol_index.symbol_info(node_id)
                             
                             if symbol_info['type'] == 'not_symbol':
                                 print(f"Node {node_id} is not a symbol (identifier/variable)")
@@ -169,7 +169,7 @@ def main():
                     else:
                         print("Invalid input. Enter 'v' for visualization, 'r' for renaming, 's' to save, node ID to select, or 'q' to quit.")
                         
-                except KeyboardInterrupt:
+                except (KeyboardInterrupt, EOFError):
                     break
                 except Exception as e:
                     print(f"Error: {e}")
@@ -180,4 +180,8 @@ def main():
         print(f"Error: {e}")
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # subcommands (check, tokens, tree, symbols, rename) run without prompts
+        from classes.cli import run
+        sys.exit(run())
     main()